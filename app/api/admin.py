@@ -7,7 +7,6 @@ from sqlmodel import Session, select
 
 from app.core.auth import get_current_super_admin, get_password_hash
 from app.core.database import get_session
-from app.core.milvus_client import milvus_client
 from app.models.sql_models import Tenant, User
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -75,20 +74,6 @@ async def create_tenant_with_admin(
     session.commit()
     session.refresh(admin_user)
 
-    # Best-effort mirror in Milvus tenant collection.
-    try:
-        milvus_client.insert_tenant(
-            [
-                [tenant.id],
-                [tenant.name],
-                [tenant.api_key],
-                [{"config": tenant.config or ""}],
-                [[0.0, 0.0]],
-            ]
-        )
-    except Exception:
-        pass
-
     return TenantAdminCreateResponse(
         tenant_id=tenant.id,
         tenant_name=tenant.name,
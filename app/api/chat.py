@@ -1,4 +1,4 @@
-import json
+import asyncio
 import logging
 import os
 from datetime import datetime
@@ -10,7 +10,7 @@ from sqlmodel import Session, select
 
 from app.core.auth import get_current_user
 from app.core.database import get_session
-from app.chat.session import chat_session_store
+from app.chat.session import SessionBusyError, chat_session_store
 from app.models.sql_models import ChatSession, ChatMessage, User, FinalVideo, Itinerary
 from app.providers.factory import ProviderFactory
 
@@ -18,6 +18,10 @@ logger = logging.getLogger("manike.chat")
 
 router = APIRouter(prefix="/api", tags=["Chat"])
 
+# Caps in-flight chat turns per worker so bursts queue here instead of
+# tripping provider rate limits (Gemini backs off 5-15s on a 429).
+_chat_slots = asyncio.Semaphore(int(os.getenv("CHAT_MAX_CONCURRENT_TURNS", "5")))
+
 
 # ---------------------------------------------------------------------------
 # Request / Response models
@@ -58,7 +62,8 @@ async def new_session(
     """Create a new chat session persisted to PostgreSQL."""
     try:
         provider = ProviderFactory.create()
-        session_id, greeting = chat_session_store.create(
+        session_id, greeting = await asyncio.to_thread(
+            chat_session_store.create,
             provider=provider,
             db=db,
             user_id=current_user.id,
@@ -88,24 +93,12 @@ async def send_message(
     _check_session_access(db_session, current_user)
 
     provider = ProviderFactory.create()
-    manager = chat_session_store.get_manager(req.session_id, db=db, provider=provider)
-    if not manager:
+    logger.info("Message received in session=%s (user=%s)", req.session_id, current_user.id)
+    turn = await _run_turn(req.session_id, req.message, db, provider, current_user.tenant_id)
+    if turn is None:
         logger.error("Session %s could not be loaded for user=%s", req.session_id, current_user.id)
         raise HTTPException(status_code=404, detail="Chat session could not be loaded")
-
-    logger.info("Message received in session=%s (user=%s)", req.session_id, current_user.id)
-    response = manager.send_message(req.message)
-    requirements = manager.extract_requirements()
-
-    chat_session_store.persist_exchange(
-        session_id=req.session_id,
-        user_message=req.message,
-        assistant_message=response,
-        requirements=requirements,
-        db=db,
-        tenant_id=current_user.tenant_id,
-        destination=requirements.get("destination"),
-    )
+    manager, response, requirements = turn
 
     return {
         "response": response,
@@ -138,22 +131,10 @@ async def process_voice_message(
         raise HTTPException(status_code=400, detail="Empty transcript")
 
     provider = ProviderFactory.create()
-    manager = chat_session_store.get_manager(req.session_id, db=db, provider=provider)
-    if not manager:
+    turn = await _run_turn(req.session_id, transcript, db, provider, current_user.tenant_id)
+    if turn is None:
         raise HTTPException(status_code=404, detail="Chat session could not be loaded")
-
-    response = manager.send_message(transcript)
-    requirements = manager.extract_requirements()
-
-    chat_session_store.persist_exchange(
-        session_id=req.session_id,
-        user_message=transcript,
-        assistant_message=response,
-        requirements=requirements,
-        db=db,
-        tenant_id=current_user.tenant_id,
-        destination=requirements.get("destination"),
-    )
+    manager, response, requirements = turn
 
     return {
         "response": response,
@@ -211,7 +192,7 @@ async def get_history(
     _check_session_access(db_session, current_user)
 
     provider = ProviderFactory.create()
-    manager = chat_session_store.get_manager(session_id, db=db, provider=provider)
+    manager = await asyncio.to_thread(chat_session_store.get_manager, session_id, db=db, provider=provider)
 
     if manager:
         return {
@@ -229,7 +210,7 @@ async def get_history(
 
     return {
         "messages": [{"role": m.role, "content": m.content} for m in messages],
-        "requirements": json.loads(db_session.requirements_json or "{}"),
+        "requirements": db_session.requirements_json or {},
         "is_complete": False,
     }
 
@@ -251,7 +232,7 @@ async def resume_session(
     _check_session_access(db_session, current_user)
 
     provider = ProviderFactory.create()
-    manager = chat_session_store.get_manager(session_id, db=db, provider=provider)
+    manager = await asyncio.to_thread(chat_session_store.get_manager, session_id, db=db, provider=provider)
     if not manager:
         logger.error("Failed to rebuild session=%s from DB for user=%s", session_id, current_user.id)
         raise HTTPException(status_code=500, detail="Failed to rebuild session from database")
@@ -333,7 +314,7 @@ async def delete_session(
     db.add(db_session)
     db.commit()
 
-    chat_session_store.delete(session_id)
+    await asyncio.to_thread(chat_session_store.delete, session_id)
     return {"message": "Session deleted", "session_id": session_id}
 
 
@@ -360,6 +341,40 @@ def _delete_gcs_blob(video_url: str) -> None:
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
+async def _run_turn(session_id: str, message: str, db: Session, provider, tenant_id: str) -> Optional[tuple]:
+    """Run one chat turn off the event loop; the LLM round-trip and DB writes block."""
+    async with _chat_slots:
+        try:
+            return await asyncio.to_thread(_run_turn_locked, session_id, message, db, provider, tenant_id)
+        except SessionBusyError:
+            raise HTTPException(status_code=409, detail="Another message in this session is still being processed")
+
+
+def _run_turn_locked(session_id: str, message: str, db: Session, provider, tenant_id: str) -> Optional[tuple]:
+    """Load, advance and persist one session under its lock.
+
+    Returns (manager, response, requirements), or None if the session can't be loaded.
+    """
+    with chat_session_store.lock(session_id):
+        manager = chat_session_store.get_manager(session_id, db=db, provider=provider)
+        if not manager:
+            return None
+        with manager.lock:
+            response = manager.send_message(message)
+            requirements = manager.extract_requirements()
+            chat_session_store.persist_exchange(
+                session_id=session_id,
+                user_message=message,
+                assistant_message=response,
+                requirements=requirements,
+                db=db,
+                tenant_id=tenant_id,
+                destination=requirements.get("destination"),
+                manager=manager,
+            )
+        return manager, response, requirements
+
+
 def _check_session_access(db_session: ChatSession, current_user: User) -> None:
     """Raise 403 if the user has no access to this session."""
     is_owner = db_session.user_id == current_user.id
@@ -371,12 +386,6 @@ def _check_session_access(db_session: ChatSession, current_user: User) -> None:
 
 
 def _to_summary(s: ChatSession, is_owner: bool) -> SessionSummary:
-    reqs = None
-    if s.requirements_json:
-        try:
-            reqs = json.loads(s.requirements_json)
-        except Exception:
-            pass
     return SessionSummary(
         session_id=s.id,
         title=s.title,
@@ -384,6 +393,6 @@ def _to_summary(s: ChatSession, is_owner: bool) -> SessionSummary:
         is_owner=is_owner,
         created_at=s.created_at.isoformat(),
         updated_at=s.updated_at.isoformat(),
-        requirements=reqs,
+        requirements=s.requirements_json,
         itinerary_id=s.itinerary_id,
     )
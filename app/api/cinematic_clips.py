@@ -218,7 +218,7 @@ async def search_clips(
     Example: query="aerial coastal view" will match beach/drone clips.
     """
     query_embedding = generate_embedding(req.query)
-    results = milvus_client.search_clips(tenant_id, query_embedding, req.limit)
+    results = await milvus_client.asearch_clips(tenant_id, query_embedding, req.limit)
 
     output = []
     for hits in results:
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.exceptions import RequestValidationError
 from typing import List, Optional
+from pydantic import ValidationError
 from app.models.experience import Experience
-from app.core.milvus_client import milvus_client
+from app.core.milvus_client import milvus_client, experience_insert_batcher
+from app.core.responses import NumpyORJSONResponse
 import json
 
 router = APIRouter(prefix="/experiences", tags=["Experiences (Vector Search)"])
 
-@router.get("/", response_model=List[Experience])
+@router.get("/", responses={200: {"model": List[Experience]}})
 async def list_experiences(limit: int = 100):
     try:
         results = milvus_client.list_experiences(limit)
@@ -23,8 +26,8 @@ async def list_experiences(limit: int = 100):
                 "slug": res["slug"],
                 "embedding": res.get("embedding")
             }
-            experiences.append(Experience(**full_data))
-        return experiences
+            experiences.append(Experience(**full_data).model_dump())
+        return NumpyORJSONResponse(experiences)
     except Exception as e:
         if "ConnectionNotExistException" in str(e) or "Fail connecting to server" in str(e):
             raise HTTPException(
@@ -33,30 +36,41 @@ async def list_experiences(limit: int = 100):
             )
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/", response_model=Experience)
-async def create_experience(experience: Experience):
+@router.post(
+    "/",
+    responses={200: {"model": Experience}},
+    openapi_extra={"requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/Experience"}}},
+    }},
+)
+async def create_experience(request: Request):
+    # Validate straight from the raw bytes instead of FastAPI's json.loads + validate
+    try:
+        experience = Experience.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
     try:
         metadata = experience.model_dump(exclude={"embedding"})
-        milvus_data = [
-            [experience.id],
-            [experience.tenantId],
-            [experience.embedding],
-            [metadata],
-            [experience.slug]
-        ]
-        milvus_client.insert_experience(milvus_data)
-        return experience
+        await experience_insert_batcher.submit([
+            experience.id,
+            experience.tenantId,
+            experience.embedding,
+            metadata,
+            experience.slug,
+        ])
+        return NumpyORJSONResponse(experience.model_dump())
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/search/", response_model=List[dict])
+@router.post("/search/", responses={200: {"model": List[dict]}})
 async def search_experiences(
     tenant_id: str,
     embedding: List[float],
     limit: int = 10
 ):
     try:
-        results = milvus_client.search_experiences(tenant_id, embedding, limit)
+        results = await milvus_client.asearch_experiences(tenant_id, embedding, limit)
         output = []
         for hits in results:
             for hit in hits:
@@ -65,6 +79,6 @@ async def search_experiences(
                     "distance": hit.distance,
                     "metadata": hit.entity.get("metadata")
                 })
-        return output
+        return NumpyORJSONResponse(output)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
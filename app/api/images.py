@@ -195,7 +195,7 @@ async def search_images(
     query_embedding = generate_embedding(req.query)
 
     # Search Milvus
-    results = milvus_client.search_images(tenant_id, query_embedding, req.limit)
+    results = await milvus_client.asearch_images(tenant_id, query_embedding, req.limit)
 
     output = []
     for hits in results:
@@ -1,5 +1,4 @@
 import asyncio
-import json
 from datetime import datetime
 from fastapi import APIRouter, Body, Depends, HTTPException
 from app.core.auth import get_current_tenant_id, get_current_user
@@ -8,13 +7,14 @@ from app.models.sql_models import (
     Itinerary, ItineraryActivity, ImageLibrary, CinematicClip, FinalVideo, User, ChatSession
 )
 from app.services.generators import ItineraryGenerator
-from app.services.matcher import match_image, match_clip
+from app.services.matcher import match_activities
 from app.services.ai_itinerary_generator import AIItineraryGenerator
 from app.services.video_compiler import VideoCompilerFactory
 from app.services.cinematic_video_builder import cinematic_builder
-from app.chat.session import chat_session_store
+from app.chat.session import SessionBusyError, chat_session_store
 from app.providers.factory import ProviderFactory
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import flag_modified
 from sqlmodel import Session, select
 from pydantic import BaseModel
 from typing import List, Optional
@@ -93,7 +93,9 @@ async def generate_itinerary(
         # ----------------------------------------------------------------
         # AI-POWERED CHAT-BASED FLOW
         # ----------------------------------------------------------------
-        manager = chat_session_store.get_manager(req.session_id, db=session, provider=ProviderFactory.create())
+        manager = await asyncio.to_thread(
+            chat_session_store.get_manager, req.session_id, db=session, provider=ProviderFactory.create()
+        )
         if not manager:
             raise HTTPException(
                 status_code=404,
@@ -127,7 +129,9 @@ async def generate_itinerary(
             raise HTTPException(status_code=500, detail=f"AI provider not configured: {str(e)}")
 
         ai_gen = AIItineraryGenerator(provider)
-        rich_itinerary = ai_gen.generate_itinerary(conversation_summary)
+        # Async client + asyncio.sleep backoff: a slow or rate-limited LLM
+        # call no longer stalls the event loop for other requests.
+        rich_itinerary = await ai_gen.agenerate_itinerary(conversation_summary)
 
         if not rich_itinerary:
             raise HTTPException(
@@ -164,7 +168,7 @@ async def generate_itinerary(
         destination=destination,
         days=days,
         status="generated",
-        rich_itinerary_json=json.dumps(rich_itinerary) if rich_itinerary else None,
+        rich_itinerary_json=rich_itinerary or None,
     )
     session.add(itinerary)
     session.commit()
@@ -174,27 +178,22 @@ async def generate_itinerary(
     # Milvus semantic search: match each activity → image + clip
     # ------------------------------------------------------------------
     db_activities = []
-    used_image_ids: set = set()
-    used_clip_ids: set = set()
 
-    for idx, raw in enumerate(raw_activities):
-        # Build a rich query string for semantic search
-        query_parts = [
+    # Build a rich query string per activity for semantic search
+    query_texts = [
+        " ".join(p for p in (
             raw.get("activity_name", ""),
             raw.get("location", ""),
             raw.get("keywords", ""),
             raw.get("description", "")[:80],
-        ]
-        query_text = " ".join(p for p in query_parts if p)
-
-        matched_image = match_image(tenant_id, query_text, exclude_ids=used_image_ids)
-        matched_clip = match_clip(tenant_id, query_text, exclude_ids=used_clip_ids)
-
-        if matched_image:
-            used_image_ids.add(matched_image.id)
-        if matched_clip:
-            used_clip_ids.add(matched_clip.id)
-
+        ) if p)
+        for raw in raw_activities
+    ]
+    # One embedding batch + one Milvus RPC per collection for all activities;
+    # each activity still excludes media picked for earlier ones.
+    matches = await asyncio.to_thread(match_activities, tenant_id, query_texts)
+
+    for idx, (raw, (matched_image, matched_clip)) in enumerate(zip(raw_activities, matches)):
         activity = ItineraryActivity(
             tenant_id=tenant_id,
             itinerary_id=itinerary.id,
@@ -235,7 +234,8 @@ async def generate_itinerary(
                     break
 
         # Persist the enriched JSON back to DB
-        itinerary.rich_itinerary_json = json.dumps(rich_itinerary)
+        itinerary.rich_itinerary_json = rich_itinerary
+        flag_modified(itinerary, "rich_itinerary_json")
         session.add(itinerary)
         session.commit()
 
@@ -252,9 +252,16 @@ async def generate_itinerary(
     # Without this, every subsequent user message would set has_changes=True
     # and trigger an unnecessary auto-regeneration on the frontend.
     if req.session_id:
-        manager = chat_session_store.get_manager(req.session_id, db=session, provider=ProviderFactory.create())
-        if manager:
-            manager.mark_generated()
+        try:
+            await asyncio.to_thread(
+                chat_session_store.mark_generated, req.session_id, db=session, provider=ProviderFactory.create()
+            )
+        except SessionBusyError:
+            # A chat turn is in flight; the itinerary is saved, the flag just stays set
+            import logging
+            logging.getLogger(__name__).warning(
+                "Session %s busy — has_changes not reset after generation", req.session_id
+            )
 
     activities_list = [act for _, act in db_activities]
     return _build_response(itinerary, activities_list, session, rich_itinerary)
@@ -281,7 +288,7 @@ async def list_itineraries(
             .where(ItineraryActivity.tenant_id == tenant_id)
             .order_by(ItineraryActivity.order_index)
         ).all()
-        rich = json.loads(itin.rich_itinerary_json) if itin.rich_itinerary_json else None
+        rich = itin.rich_itinerary_json
         results.append(_build_response(itin, activities, session, rich))
     return results
 
@@ -307,7 +314,7 @@ async def get_itinerary(
         .order_by(ItineraryActivity.order_index)
     ).all()
 
-    rich = json.loads(itinerary.rich_itinerary_json) if itinerary.rich_itinerary_json else None
+    rich = itinerary.rich_itinerary_json
     return _build_response(itinerary, activities, session, rich)
 
 
@@ -382,7 +389,8 @@ async def compile_video(
 
         # Cloud Run async path — dispatch job and return 202 immediately
         if hasattr(compiler, "compile_cinematic"):
-            result = compiler.compile_cinematic(
+            result = await asyncio.to_thread(
+                compiler.compile_cinematic,
                 itinerary_id=itinerary.id,
                 tenant_id=tenant_id,
                 target_seconds=target_secs,
@@ -394,7 +402,7 @@ async def compile_video(
 
         # Local sync path — run the full pipeline in a thread executor
         else:
-            rich_itinerary = json.loads(itinerary.rich_itinerary_json)
+            rich_itinerary = itinerary.rich_itinerary_json
             loop = asyncio.get_event_loop()
             try:
                 build_result = await loop.run_in_executor(
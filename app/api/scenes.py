@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from app.services.orchestrator import SceneOrchestrator
 from app.core.auth import get_current_tenant_id
-from app.core.database import get_session
+from app.core.database import engine, get_session
+from app.core.responses import NDJSON_MEDIA_TYPE, stream_json_rows
+from app.models.sql_models import Scene
 from sqlmodel import Session
 from pydantic import BaseModel
 
@@ -21,10 +25,24 @@ async def create_scene(
     scene = await orchestrator.create_scene(tenant_id, scene_data.name, scene_data.description)
     return scene
 
-@router.get("/")
+@router.get("/", response_model=List[Scene], responses={200: {
+    "description": (
+        "Scenes oldest first. Pass the last id as `after` for the next page. "
+        "Send `Accept: application/x-ndjson` for one Scene per line instead of an array."
+    ),
+    "content": {NDJSON_MEDIA_TYPE: {}},
+}})
 async def list_scenes(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, min_length=1, max_length=64),
     tenant_id: str = Depends(get_current_tenant_id),
-    session: Session = Depends(get_session)
 ):
-    orchestrator = SceneOrchestrator(session)
-    return orchestrator.list_scenes(tenant_id)
+    # Streams rows as they are fetched; the generator owns its session
+    # because it runs after the request's dependencies are torn down.
+    def rows():
+        with Session(engine) as session:
+            for scene in SceneOrchestrator(session).list_scenes(tenant_id, limit, after):
+                yield scene.model_dump()
+
+    return stream_json_rows(request, rows())
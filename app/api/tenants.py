@@ -1,90 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
 from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select
+import orjson
+from app.core.auth import get_current_super_admin
+from app.core.database import engine, get_session
+from app.core.responses import NDJSON_MEDIA_TYPE, stream_json_rows
 from app.models.tenant import Tenant
-from app.core.milvus_client import milvus_client
+from app.models.sql_models import Tenant as TenantRow
 
-router = APIRouter(prefix="/tenants", tags=["Tenant Management"])
+router = APIRouter(
+    prefix="/tenants",
+    tags=["Tenant Management"],
+    dependencies=[Depends(get_current_super_admin)],
+)
 
 
-def _tenant_to_milvus_metadata(tenant: Tenant) -> dict:
-    return {
-        "config": tenant.config,
-        "email": tenant.email,
-        "contactPerson": tenant.contact_person,
-        "isActive": tenant.is_active,
-        "createdAt": tenant.created_at.isoformat(),
-        "updatedAt": tenant.updated_at.isoformat(),
-    }
+def _apply_tenant(row: TenantRow, tenant: Tenant) -> TenantRow:
+    """Copy API fields onto the SQL row; config is stored as a JSON string."""
+    row.name = tenant.name
+    row.api_key = tenant.api_key
+    row.config = orjson.dumps(tenant.config).decode() if tenant.config else None
+    row.email = tenant.email
+    row.contact_person = tenant.contact_person
+    row.is_active = tenant.is_active
+    return row
+
+
+def _config_from_row(row: TenantRow) -> dict:
+    try:
+        config = orjson.loads(row.config) if row.config else {}
+    except orjson.JSONDecodeError:
+        return {}
+    return config if isinstance(config, dict) else {}
 
 
-def _tenant_from_milvus_record(res: dict) -> Tenant:
-    metadata = res.get("metadata", {}) or {}
-    return Tenant(
-        id=res["id"],
-        name=res["name"],
-        api_key=res["apikey"],
-        config=metadata.get("config", {}),
-        email=metadata.get("email"),
-        contact_person=metadata.get("contactPerson"),
-        is_active=metadata.get("isActive", True),
+def _tenant_from_row(row: TenantRow) -> Tenant:
+    """Build a Tenant from a stored row; trusted data, so validation is skipped."""
+    return Tenant.model_construct(
+        id=row.id,
+        name=row.name,
+        api_key=row.api_key,
+        config=_config_from_row(row),
+        email=row.email,
+        contact_person=row.contact_person,
+        is_active=row.is_active,
+        created_at=row.created_at,
+        updated_at=row.updated_at,
     )
 
-@router.post("/", response_model=Tenant)
-async def create_tenant(tenant: Tenant):
-    try:
-        milvus_data = [
-            [tenant.id],
-            [tenant.name],
-            [tenant.api_key],
-            [_tenant_to_milvus_metadata(tenant)],
-            [[0.0, 0.0]]
-        ]
-        milvus_client.insert_tenant(milvus_data)
-        return tenant
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.get("/{tenant_id}", response_model=Tenant)
-async def get_tenant(tenant_id: str):
-    try:
-        res = milvus_client.get_tenant(tenant_id)
-        if not res:
-            raise HTTPException(status_code=404, detail="Tenant not found")
-        return _tenant_from_milvus_record(res)
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.get("/", response_model=List[Tenant])
-async def list_tenants(limit: int = 100):
-    try:
-        results = milvus_client.list_tenants(limit)
-        return [_tenant_from_milvus_record(res) for res in results]
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
 
-@router.put("/{tenant_id}", response_model=Tenant)
-async def update_tenant(tenant_id: str, tenant: Tenant):
+def _tenant_response(tenant: Tenant, include_api_key: bool = False) -> dict:
+    """Dump for ORJSONResponse in the Tenant alias shape.
+
+    The API key is only echoed back to the caller that just set it.
+    """
+    exclude = None if include_api_key else {"api_key"}
+    return tenant.model_dump(mode="json", by_alias=True, exclude=exclude)
+
+
+# Tenant routes return ORJSONResponse directly so FastAPI skips the
+# jsonable_encoder pass and response_model re-validation; `responses`
+# keeps the OpenAPI schema.
+
+@router.post("/", responses={200: {"model": Tenant}})
+async def create_tenant(tenant: Tenant, session: Session = Depends(get_session)):
+    if session.get(TenantRow, tenant.id):
+        raise HTTPException(status_code=409, detail="Tenant ID already exists")
+    row = _apply_tenant(TenantRow(id=tenant.id, created_at=tenant.created_at), tenant)
+    row.updated_at = tenant.updated_at
+    session.add(row)
     try:
-        if tenant.id != tenant_id:
-            raise HTTPException(status_code=400, detail="ID in path and body must match")
-        milvus_data = [
-            [tenant.id],
-            [tenant.name],
-            [tenant.api_key],
-            [_tenant_to_milvus_metadata(tenant)],
-            [[0.0, 0.0]]
-        ]
-        milvus_client.update_tenant(tenant_id, milvus_data)
-        return tenant
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        session.commit()
+    except IntegrityError:
+        # A concurrent create won the race between the check and the insert.
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Tenant ID already exists")
+    return ORJSONResponse(_tenant_response(tenant, include_api_key=True))
+
+@router.get("/{tenant_id}", responses={200: {"model": Tenant}})
+async def get_tenant(tenant_id: str, session: Session = Depends(get_session)):
+    row = session.get(TenantRow, tenant_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Tenant not found")
+    return ORJSONResponse(_tenant_response(_tenant_from_row(row)))
+
+def _tenant_list_item(row: TenantRow) -> dict:
+    """One list entry in the Tenant alias shape (minus apiKey), without a pydantic round-trip."""
+    return {
+        "id": row.id,
+        "name": row.name,
+        "email": row.email,
+        "contactPerson": row.contact_person,
+        "config": _config_from_row(row),
+        "isActive": row.is_active,
+        "createdAt": row.created_at,
+        "updatedAt": row.updated_at,
+    }
+
+
+@router.get("/", responses={200: {
+    "model": List[Tenant],
+    "description": "Tenants oldest first. Send `Accept: application/x-ndjson` for one Tenant per line instead of an array.",
+    "content": {NDJSON_MEDIA_TYPE: {}},
+}})
+async def list_tenants(request: Request, limit: int = Query(100, ge=1, le=1000)):
+    # Streams rows as they are fetched; the generator owns its session
+    # because it runs after the request's dependencies are torn down.
+    def rows():
+        with Session(engine) as session:
+            stmt = (
+                select(TenantRow)
+                .order_by(TenantRow.created_at)
+                .limit(limit)
+                .execution_options(yield_per=100)
+            )
+            for row in session.exec(stmt):
+                yield _tenant_list_item(row)
+
+    return stream_json_rows(request, rows())
+
+@router.put("/{tenant_id}", responses={200: {"model": Tenant}})
+async def update_tenant(tenant_id: str, tenant: Tenant, session: Session = Depends(get_session)):
+    if tenant.id != tenant_id:
+        raise HTTPException(status_code=400, detail="ID in path and body must match")
+    row = session.get(TenantRow, tenant_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Tenant not found")
+    _apply_tenant(row, tenant).updated_at = datetime.utcnow()
+    session.add(row)
+    session.commit()
+    session.refresh(row)
+    return ORJSONResponse(_tenant_response(_tenant_from_row(row)))
 
 @router.delete("/{tenant_id}")
-async def delete_tenant(tenant_id: str):
+async def delete_tenant(tenant_id: str, session: Session = Depends(get_session)):
+    row = session.get(TenantRow, tenant_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Tenant not found")
     try:
-        milvus_client.delete_tenant(tenant_id)
-        return {"message": f"Tenant {tenant_id} deleted successfully"}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        session.delete(row)
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(status_code=409, detail="Tenant still has users or content")
+    return {"message": f"Tenant {tenant_id} deleted successfully"}
@@ -1,5 +1,8 @@
+import logging
 from typing import Optional, Set, Dict
-from datetime import datetime, timedelta
+from datetime import date, timedelta
+
+logger = logging.getLogger(__name__)
 
 
 CONVERSATION_STEPS = [
@@ -50,7 +53,13 @@ CONVERSATION_STEPS = [
     },
 ]
 
-REQUIRED_FIELDS = ["destination", "start_date", "end_date", "travelers"]
+REQUIRED_FIELDS = frozenset({"destination", "start_date", "end_date", "travelers"})
+
+# (field, question, required) in step order, precomputed for the per-turn scans
+_ORDERED_FIELDS = tuple(
+    (step["field"], step["question"], step.get("required", True))
+    for step in CONVERSATION_STEPS
+)
 
 
 class ConversationFlow:
@@ -84,10 +93,7 @@ class ConversationFlow:
 
     def get_next_question(self) -> Optional[str]:
         """Get the next unanswered required question."""
-        for step in CONVERSATION_STEPS:
-            field = step["field"]
-            is_required = step.get("required", True)
-
+        for field, question, is_required in _ORDERED_FIELDS:
             if self.user_requirements[field] is not None:
                 continue
 
@@ -95,14 +101,14 @@ class ConversationFlow:
             if field == "end_date" and self.user_requirements.get("start_date"):
                 if self.trip_duration:
                     try:
-                        start = datetime.strptime(self.user_requirements["start_date"], "%Y-%m-%d")
+                        start = date.fromisoformat(self.user_requirements["start_date"])
                         end = start + timedelta(days=self.trip_duration - 1)
-                        self.user_requirements["end_date"] = end.strftime("%Y-%m-%d")
+                        self.user_requirements["end_date"] = end.isoformat()
                         self.answered_fields.add("end_date")
-                        print(f"DEBUG - Auto-calculated end_date from duration: {self.user_requirements['end_date']}")
+                        logger.debug("Auto-calculated end_date from duration: %s", self.user_requirements["end_date"])
                         continue
                     except Exception as e:
-                        print(f"DEBUG - Error auto-calculating end_date: {e}")
+                        logger.debug("Error auto-calculating end_date: %s", e)
 
             # Skip accommodation for day trips or when user has indicated no need
             if field == "accommodations":
@@ -114,7 +120,7 @@ class ConversationFlow:
                     continue
 
             if is_required:
-                return step["question"]
+                return question
 
         return None
 
@@ -124,20 +130,21 @@ class ConversationFlow:
             self.answered_fields.add(field)
 
     def is_complete(self) -> bool:
-        return all(self.user_requirements.get(f) for f in REQUIRED_FIELDS)
+        reqs = self.user_requirements
+        return all(reqs[f] for f in REQUIRED_FIELDS)
 
     def get_current_field(self) -> Optional[str]:
         """Get the field corresponding to the current next question."""
         next_question = self.get_next_question()
         if next_question is None:
             return None
-        for step in CONVERSATION_STEPS:
-            if step["question"] == next_question:
-                return step["field"]
+        for field, question, _ in _ORDERED_FIELDS:
+            if question == next_question:
+                return field
         return None
 
     def is_field_required(self, field: str) -> bool:
-        for step in CONVERSATION_STEPS:
-            if step["field"] == field:
-                return step.get("required", True)
+        for step_field, _, required in _ORDERED_FIELDS:
+            if step_field == field:
+                return required
         return True
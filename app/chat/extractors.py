@@ -1,10 +1,50 @@
 import json
+import logging
 import re
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import date, timedelta
 from app.providers.base import AIProvider, AIProviderError
 from .conversation_flow import CONVERSATION_STEPS
 
+logger = logging.getLogger(__name__)
+
+# Single-pass scan for trip duration, skip phrases and self-introductions.
+# Only the name capture is case-sensitive so "I'm going" is not read as a name.
+_SKIP_KEYWORDS = (
+    "skip", "no thanks", "pass", "not needed", "dont care",
+    "no preference", "whatever", "anything", "nope",
+    "dont worry", "don't worry",
+)
+_QUICK_SCAN_PATTERN = re.compile(
+    r"(?P<dur>\d+)[\s-]*(?i:days?|d)\b"
+    r"|(?P<skip>(?i:" + "|".join(re.escape(k) for k in _SKIP_KEYWORDS) + r"))"
+    r"|\b(?i:i'?m|my name is|this is|call me)\s+(?P<name>[A-Z][a-z]+)"
+)
+_SKIP_EXACT = frozenset({"no", "nah", "nope", "n", "na"})
+
+# Replies that never carry travel details; extraction is skipped for these.
+_TRIVIAL_REPLIES = frozenset({
+    "yes", "yeah", "yep", "ok", "okay", "sure", "fine", "cool", "great",
+    "thanks", "thank you", "no", "nah", "nope", "n", "na", "skip", "pass",
+})
+
+# Structured-output schemas for providers with native JSON mode
+_NAME_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {"name": {"type": "STRING", "nullable": True}},
+}
+_FIELD_TYPES = {"travelers": "INTEGER", "budget": "NUMBER"}
+
+
+def _requirements_schema(keys) -> dict:
+    return {
+        "type": "OBJECT",
+        "properties": {
+            key: {"type": _FIELD_TYPES.get(key, "STRING"), "nullable": True}
+            for key in keys
+        },
+    }
+
 
 class FieldExtractor:
     """Extracts travel information from user messages using AI and regex."""
@@ -12,6 +52,31 @@ class FieldExtractor:
     def __init__(self, provider: AIProvider):
         self.provider = provider
 
+    def quick_scan(self, message: str) -> tuple[Optional[int], bool, Optional[str]]:
+        """Regex-only pass over the message, without calling the AI provider.
+
+        Returns:
+            A tuple of (trip_duration, is_skip, name). trip_duration is the
+            first day count in 1..365, name is an introduced first name.
+        """
+        duration = None
+        is_skip = message.lower().strip() in _SKIP_EXACT
+        name = None
+
+        for match in _QUICK_SCAN_PATTERN.finditer(message):
+            kind = match.lastgroup
+            if kind == "dur":
+                if duration is None:
+                    value = int(match.group("dur"))
+                    if 1 <= value <= 365:
+                        duration = value
+            elif kind == "skip":
+                is_skip = True
+            elif name is None:
+                name = match.group("name")
+
+        return duration, is_skip, name
+
     def extract_name(self, message: str) -> Optional[str]:
         """Extract user's name from their message."""
         extraction_prompt = f"""Extract the person's name from this message.
@@ -26,19 +91,13 @@ Examples:
 Return ONLY the JSON object, no other text."""
 
         try:
-            response_text = self.provider.generate_content(extraction_prompt)
-
-            cleaned_response = response_text.strip()
-            if cleaned_response.startswith("```"):
-                cleaned_response = cleaned_response.split("```")[1]
-                if cleaned_response.startswith("json"):
-                    cleaned_response = cleaned_response[4:]
-                cleaned_response = cleaned_response.strip()
-
-            extracted = json.loads(cleaned_response)
+            response_text = self.provider.generate_content(
+                extraction_prompt, json_mode=True, response_schema=_NAME_SCHEMA
+            )
+            extracted = json.loads(response_text)
             return extracted.get("name")
         except Exception as e:
-            print(f"Error extracting name: {str(e)}")
+            logger.warning("Error extracting name: %s", e)
             return None
 
     def extract_all_fields(self, message: str, current_requirements: dict) -> tuple[dict, bool]:
@@ -49,12 +108,16 @@ Return ONLY the JSON object, no other text."""
             when the AI provider call failed, signaling the caller to track
             consecutive failures rather than silently re-asking the same question.
         """
+        # Only describe the fields still missing; collected values are sent
+        # once as compact context so the prompt doesn't grow every turn.
+        needed = [s for s in CONVERSATION_STEPS if current_requirements.get(s["field"]) is None]
         fields_description = "\n".join([
             f"- {step['field']}: {step['question']}"
-            for step in CONVERSATION_STEPS
-        ])
+            for step in needed
+        ]) or "- (all fields collected; only update values the user changes)"
 
-        current_data = json.dumps(current_requirements, indent=2)
+        filled_summary = {k: v for k, v in current_requirements.items() if v}
+        current_data = json.dumps(filled_summary)
 
         extraction_prompt = f"""You are an intelligent travel information extractor. Your job is to understand the user's intent and extract ALL relevant travel information, even when expressed informally or indirectly. Please Prioritize to answer user's questions first before taking the next iteration.
 
@@ -63,7 +126,7 @@ User message: "{message}"
 Current extracted data (already collected):
 {current_data}
 
-Fields to extract:
+Fields still to extract:
 {fields_description}
 
 ## CRITICAL: MERGING WITH EXISTING DATA
@@ -148,84 +211,61 @@ Return a JSON object with these exact keys: {", ".join(current_requirements.keys
 Return ONLY valid JSON, no markdown, no explanation."""
 
         try:
-            response_text = self.provider.generate_content(extraction_prompt)
-            print(f"DEBUG - Raw response from AI: {repr(response_text)}")
+            response_text = self.provider.generate_content(
+                extraction_prompt,
+                json_mode=True,
+                response_schema=_requirements_schema(current_requirements.keys()),
+            )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Raw response from AI: %r", response_text)
 
             if not response_text or response_text.strip() == "":
-                print("DEBUG - Empty response from AI provider")
+                logger.debug("Empty response from AI provider")
                 return dict(current_requirements), True
 
-            cleaned_response = response_text.strip()
-            if cleaned_response.startswith("```"):
-                cleaned_response = cleaned_response.split("```")[1]
-                if cleaned_response.startswith("json"):
-                    cleaned_response = cleaned_response[4:]
-                cleaned_response = cleaned_response.strip()
-
-            extracted = json.loads(cleaned_response)
+            extracted = json.loads(response_text)
 
-            for key in current_requirements.keys():
+            # Merge into the full dict: omitted keys keep their current value
+            for key, value in current_requirements.items():
                 if key not in extracted:
-                    extracted[key] = None
+                    extracted[key] = value
 
             # Post-processing: calculate end_date from start_date + duration
             if extracted.get("start_date") and not extracted.get("end_date"):
                 duration_match = self.extract_trip_duration(message)
                 if duration_match:
                     try:
-                        start = datetime.strptime(extracted["start_date"], "%Y-%m-%d")
+                        start = date.fromisoformat(extracted["start_date"])
                         end = start + timedelta(days=duration_match - 1)
-                        extracted["end_date"] = end.strftime("%Y-%m-%d")
-                        print(f"DEBUG - Calculated end_date from duration: {extracted['end_date']}")
+                        extracted["end_date"] = end.isoformat()
+                        logger.debug("Calculated end_date from duration: %s", extracted["end_date"])
                     except Exception as e:
-                        print(f"DEBUG - Error calculating end_date: {e}")
+                        logger.debug("Error calculating end_date: %s", e)
 
             return extracted, False
         except AIProviderError as e:
-            print(f"API error extracting information: {str(e)}")
+            logger.warning("API error extracting information: %s", e)
             return dict(current_requirements), True
         except (json.JSONDecodeError, Exception) as e:
-            print(f"Error extracting information: {str(e)}")
-            print(f"DEBUG - Response text that failed to parse: {repr(response_text) if 'response_text' in locals() else 'N/A'}")
+            logger.warning("Error extracting information: %s", e)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Response text that failed to parse: %r",
+                    response_text if "response_text" in locals() else "N/A",
+                )
             return dict(current_requirements), False
 
     def extract_trip_duration(self, message: str) -> Optional[int]:
         """Extract trip duration in days from user message using regex."""
-        message_lower = message.lower()
-
-        patterns = [
-            r'(\d+)\s*(?:day|d)\s*trip',
-            r'trip\s*(?:of\s*)?(\d+)\s*(?:day|d)',
-            r'(\d+)\s*(?:day|d)(?:\s+trip)?',
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, message_lower)
-            if match:
-                try:
-                    duration = int(match.group(1))
-                    if 1 <= duration <= 365:
-                        print(f"DEBUG - Extracted trip duration: {duration} days")
-                        return duration
-                except (ValueError, IndexError):
-                    continue
-
-        return None
+        duration = self.quick_scan(message)[0]
+        if duration:
+            logger.debug("Extracted trip duration: %d days", duration)
+        return duration
+
+    def is_trivial_reply(self, message: str) -> bool:
+        """Check if the message is a bare acknowledgement or skip with nothing to extract."""
+        return message.lower().strip(" \t\n.!?,") in _TRIVIAL_REPLIES
 
     def is_skip_request(self, message: str) -> bool:
         """Check if user is trying to skip an optional question."""
-        skip_keywords = [
-            'skip', 'no thanks', 'pass', 'not needed', 'dont care',
-            'no preference', 'whatever', 'anything', 'nope',
-            'dont worry', "don't worry",
-        ]
-        message_lower = message.lower().strip()
-
-        for keyword in skip_keywords:
-            if keyword in message_lower:
-                return True
-
-        if message_lower in ['no', 'nah', 'nope', 'n', 'na']:
-            return True
-
-        return False
+        return self.quick_scan(message)[1]
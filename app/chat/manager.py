@@ -1,9 +1,14 @@
+import logging
+import threading
+import zlib
 from typing import Optional
 from app.providers.base import AIProvider, AIProviderError
 from .conversation_flow import ConversationFlow
 from .extractors import FieldExtractor
 from .response_generator import ResponseGenerator
 
+logger = logging.getLogger(__name__)
+
 
 class ChatManager:
     """Orchestrates conversational flow for step-by-step travel planning."""
@@ -19,6 +24,11 @@ class ChatManager:
         self.user_name = None
         self._consecutive_failures = 0
         self._changed_since_generation = False
+        self._name_tried_hashes: set[int] = set()
+        # send_message runs in a worker thread; serialise turns on one session
+        self.lock = threading.Lock()
+        # Last requirements written to the DB; persistence sends only the delta
+        self._last_requirements: Optional[dict] = None
 
     @property
     def user_requirements(self):
@@ -28,77 +38,96 @@ class ChatManager:
         return self.responder.get_greeting()
 
     def send_message(self, user_message: str) -> str:
+        flow = self.flow
+        reqs = flow.user_requirements
+        update = flow.update_field
+        extractor = self.extractor
+        hist_append = self.chat_history.append
+
         try:
-            self.chat_history.append({
+            hist_append({
                 "role": "user",
                 "content": user_message
             })
 
+            # One regex pass for duration, skip phrases and self-introductions
+            trip_duration, is_skip, name_extracted = extractor.quick_scan(user_message)
+
             # Extract name if not captured yet
             if self.user_name is None:
-                name_extracted = self.extractor.extract_name(user_message)
+                if name_extracted is None:
+                    # Only ask the LLM once per distinct message
+                    # crc32, not hash(): str hashes are salted per process and
+                    # this set is shared across workers via the session snapshot
+                    message_hash = zlib.crc32(user_message.strip().lower().encode())
+                    if message_hash not in self._name_tried_hashes:
+                        self._name_tried_hashes.add(message_hash)
+                        name_extracted = extractor.extract_name(user_message)
                 if name_extracted:
                     self.user_name = name_extracted
-                    self.flow.update_field("name", name_extracted)
-
-            # Extract all fields from the message
-            extracted_data, had_api_error = self.extractor.extract_all_fields(
-                user_message, self.flow.user_requirements
-            )
-
-            print(f"DEBUG - Extracted data: {extracted_data}")
-            print(f"DEBUG - Current user_requirements: {self.flow.user_requirements}")
+                    update("name", name_extracted)
 
-            # Track consecutive API failures
-            if had_api_error:
-                self._consecutive_failures += 1
-                print(f"DEBUG - Consecutive API failures: {self._consecutive_failures}")
-                if self._consecutive_failures >= self.MAX_CONSECUTIVE_FAILURES:
-                    return self._get_service_unavailable_message()
+            if extractor.is_trivial_reply(user_message):
+                # "ok" / "skip" style replies carry no travel details; skip the LLM call
+                extracted_data = dict.fromkeys(reqs)
             else:
-                self._consecutive_failures = 0
+                # Extract all fields from the message
+                extracted_data, had_api_error = extractor.extract_all_fields(
+                    user_message, reqs
+                )
+
+                # Track consecutive API failures
+                if had_api_error:
+                    self._consecutive_failures += 1
+                    logger.debug("Consecutive API failures: %d", self._consecutive_failures)
+                    if self._consecutive_failures >= self.MAX_CONSECUTIVE_FAILURES:
+                        return self._get_service_unavailable_message()
+                else:
+                    self._consecutive_failures = 0
+
+            logger.debug("Extracted data: %s", extracted_data)
+            logger.debug("Current user_requirements: %s", reqs)
 
             # Track trip duration
-            trip_duration = self.extractor.extract_trip_duration(user_message)
             if trip_duration:
-                self.flow.trip_duration = trip_duration
-                print(f"DEBUG - Stored trip duration: {trip_duration} days")
+                flow.trip_duration = trip_duration
+                logger.debug("Stored trip duration: %d days", trip_duration)
 
             # Update requirements with extracted data
             for field, value in extracted_data.items():
                 if value is not None:
-                    current = self.flow.user_requirements.get(field)
+                    current = reqs.get(field)
                     if current is None or str(value) != str(current):
-                        self.flow.update_field(field, value)
+                        update(field, value)
                         self._changed_since_generation = True
-                        print(f"DEBUG - Updated {field}: {current!r} → {value!r}")
+                        logger.debug("Updated %s: %r → %r", field, current, value)
 
             # Handle skip requests on optional fields and accommodations declines
-            next_question = self.flow.get_next_question()
+            next_question = flow.get_next_question()
             if next_question:
-                current_field = self.flow.get_current_field()
+                current_field = flow.get_current_field()
                 if current_field:
-                    if not self.flow.is_field_required(current_field):
-                        if self.extractor.is_skip_request(user_message):
-                            self.flow.answered_fields.add(current_field)
+                    if not flow.is_field_required(current_field):
+                        if is_skip:
+                            flow.answered_fields.add(current_field)
                     elif current_field == "accommodations":
-                        if self.extractor.is_skip_request(user_message):
-                            self.flow.update_field("accommodations", "none")
+                        if is_skip:
+                            update("accommodations", "none")
                             self._changed_since_generation = True
 
-            next_question = self.flow.get_next_question()
+            next_question = flow.get_next_question()
 
             # Generate response
             assistant_message = self.responder.generate_response(
                 user_message,
                 self.user_name,
-                self.flow.user_requirements,
+                reqs,
                 next_question,
                 len(self.chat_history),
                 chat_history=self.chat_history,
             )
 
-            self.chat_history.append({
+            hist_append({
                 "role": "assistant",
                 "content": assistant_message
             })
@@ -107,14 +136,14 @@ class ChatManager:
 
         except AIProviderError as e:
             self._consecutive_failures += 1
-            print(f"Error: {str(e)}")
+            logger.error("Error: %s", e)
             if self._consecutive_failures >= self.MAX_CONSECUTIVE_FAILURES:
                 return self._get_service_unavailable_message()
             error_msg = "I'm so sorry, but I ran into a technical issue! Let me try that again. Could you please repeat what you just said? 🙏"
             return error_msg
         except Exception as e:
             self._consecutive_failures += 1
-            print(f"Error: {str(e)}")
+            logger.error("Error: %s", e)
             if self._consecutive_failures >= self.MAX_CONSECUTIVE_FAILURES:
                 return self._get_service_unavailable_message()
             error_msg = "Oops! Something went wrong on my end. Let's try that again! 😊"
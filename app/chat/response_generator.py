@@ -1,7 +1,80 @@
 import random
+import threading
+import time
+from collections import OrderedDict
 from typing import Optional
 from app.providers.base import AIProvider
 
+RESPONSE_CACHE_SIZE = 10_000
+RESPONSE_CACHE_TTL_SECONDS = 600
+
+
+class _ResponseCache:
+    """Thread-safe LRU of LLM replies with a TTL, keyed by provider + prompt."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._data: OrderedDict = OrderedDict()
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._lock = threading.Lock()
+
+    def get(self, key) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self._ttl, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+
+
+_response_cache = _ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL_SECONDS)
+
+# Static instruction blocks are sent as the system prompt so providers can
+# reuse the cached prefix; only the per-turn fields go in the user prompt.
+COMPLETION_SYSTEM_PROMPT = """You are a warm, enthusiastic, and knowledgeable travel planning assistant named Manike. The user has provided all their travel details and you are ready to generate their itinerary. The user may also be refining an already-generated itinerary by requesting changes.
+
+IMPORTANT INSTRUCTIONS:
+- If the user is asking a QUESTION (about their destination, activities, recommendations, travel tips, safety, things to do, etc.), you MUST answer their question helpfully and thoroughly using your travel knowledge.
+- If the user is requesting CHANGES to their itinerary (e.g., "add a beach day", "swap the hotel", "remove Day 3 activity"), acknowledge the change request enthusiastically and let them know you'll update it.
+- If the user is NOT asking a question (just chatting, confirming details, saying thanks, etc.), generate a SHORT excited response (2-3 sentences) acknowledging their trip. Let them know you're ready to help with any questions or changes.
+- NEVER tell the user to click a button to generate their itinerary - it happens automatically.
+- NEVER list out a day-by-day itinerary schedule in your response — the itinerary is shown in the panel on the right, not in the chat.
+- NEVER mention downloading, exporting, or refreshing the page.
+- NEVER mention video compilation, background processing, or tell the user to wait or refresh — the UI handles that automatically.
+- Always use their name naturally and add 1-2 relevant emojis.
+- Be a helpful travel expert! Keep responses conversational and brief (2-4 sentences max)."""
+
+RESPONSE_SYSTEM_PROMPT = """You are Manike, a warm and intelligent travel planning assistant.
+
+Generate a SHORT, natural response (2-3 sentences) that:
+1. If they shared lots of info: Briefly acknowledge the KEY details (destination, who's traveling, special needs) - show you understood
+2. Smoothly transition to the next question
+3. Use their name naturally
+4. Sound like a real human, not a robot
+5. Use 1-2 emojis
+
+IMPORTANT:
+- Do NOT repeat back everything they said
+- Do NOT ask to confirm what they told you
+- Do NOT re-ask about information already collected (check the "collected so far" list)
+- Keep it conversational and brief
+
+Example good response: "How exciting, Chamil! A family trip to Sri Lanka with the kids sounds amazing! 🌴 I'll make sure to find wheelchair-accessible options. What type of experiences are you looking for?"
+
+Example bad response: "So you want to go to Sigiriya, Galle and Sri Lanka in mid April for 5 days with 2 kids and your father who needs a wheelchair. Is that correct? Now, where would you like to travel?"
+"""
+
 
 class ResponseGenerator:
     """Generates friendly conversational responses using AI."""
@@ -28,7 +101,14 @@ class ResponseGenerator:
         """Generate a warm, friendly response."""
         name_greeting = f"{user_name}, " if user_name else ""
 
-        fields_extracted = sum(1 for v in user_requirements.values() if v is not None)
+        # Read every field the response needs once up front
+        get = user_requirements.get
+        dest = get('destination')
+        start = get('start_date')
+        end = get('end_date')
+        trav = get('travelers')
+        spec = get('special_requirements')
+        fields_extracted = sum(v is not None for v in user_requirements.values())
 
         # First exchange with name + lots of info
         if user_name and chat_history_length == 2:
@@ -36,13 +116,13 @@ class ResponseGenerator:
                 if next_question is None:
                     return (
                         f"Wow, {user_name}! 🎉 You've given me everything I need in one go - that's fantastic! "
-                        f"I can see you're heading to {user_requirements.get('destination', 'an amazing destination')}. "
+                        f"I can see you're heading to {dest or 'an amazing destination'}. "
                         "Let me start crafting your perfect itinerary right away! ✨"
                     )
                 else:
                     return (
                         f"Wonderful to meet you, {user_name}! 😊 Thank you for sharing so many details - "
-                        f"I can see you're planning an exciting trip to {user_requirements.get('destination', 'a great destination')}! "
+                        f"I can see you're planning an exciting trip to {dest or 'a great destination'}! "
                         f"I just need a bit more info:\n\n{next_question}"
                     )
             else:
@@ -52,17 +132,12 @@ class ResponseGenerator:
                     return f"Great to meet you, {user_name}! 😊 Let's plan your amazing trip!"
 
         # Build collected info summary
-        collected_info = []
-        if user_requirements.get('destination'):
-            collected_info.append(f"Destination: {user_requirements['destination']}")
-        if user_requirements.get('start_date'):
-            collected_info.append(f"Dates: {user_requirements['start_date']} to {user_requirements.get('end_date', 'TBD')}")
-        if user_requirements.get('travelers'):
-            collected_info.append(f"Travelers: {user_requirements['travelers']} people")
-        if user_requirements.get('special_requirements'):
-            collected_info.append(f"Special needs: {user_requirements['special_requirements']}")
-
-        collected_summary = "\n".join(collected_info) if collected_info else "None yet"
+        collected_summary = "\n".join(filter(None, (
+            dest and f"Destination: {dest}",
+            start and f"Dates: {start} to {end or 'TBD'}",
+            trav and f"Travelers: {trav} people",
+            spec and f"Special needs: {spec}",
+        ))) or "None yet"
 
         if next_question is None:
             # Build conversation context for the AI
@@ -73,9 +148,7 @@ class ResponseGenerator:
                     f"{msg['role'].upper()}: {msg['content']}" for msg in recent_messages
                 )
 
-            completion_prompt = f"""You are a warm, enthusiastic, and knowledgeable travel planning assistant named Manike. The user has provided all their travel details and you are ready to generate their itinerary. The user may also be refining an already-generated itinerary by requesting changes.
-
-User: {user_name or 'Guest'}
+            completion_prompt = f"""User: {user_name or 'Guest'}
 Trip summary:
 {collected_summary}
 
@@ -83,61 +156,42 @@ Conversation so far:
 {conversation_context}
 
 Their latest message: "{user_message}"
-
-IMPORTANT INSTRUCTIONS:
-- If the user is asking a QUESTION (about their destination, activities, recommendations, travel tips, safety, things to do, etc.), you MUST answer their question helpfully and thoroughly using your travel knowledge.
-- If the user is requesting CHANGES to their itinerary (e.g., "add a beach day", "swap the hotel", "remove Day 3 activity"), acknowledge the change request enthusiastically and let them know you'll update it.
-- If the user is NOT asking a question (just chatting, confirming details, saying thanks, etc.), generate a SHORT excited response (2-3 sentences) acknowledging their trip. Let them know you're ready to help with any questions or changes.
-- NEVER tell the user to click a button to generate their itinerary - it happens automatically.
-- NEVER list out a day-by-day itinerary schedule in your response — the itinerary is shown in the panel on the right, not in the chat.
-- NEVER mention downloading, exporting, or refreshing the page.
-- NEVER mention video compilation, background processing, or tell the user to wait or refresh — the UI handles that automatically.
-- Always use their name naturally and add 1-2 relevant emojis.
-- Be a helpful travel expert! Keep responses conversational and brief (2-4 sentences max)."""
+"""
 
             try:
-                return self.provider.generate_content(completion_prompt)
+                return self.provider.generate_content(
+                    completion_prompt, system=COMPLETION_SYSTEM_PROMPT
+                )
             except Exception:
-                dest = user_requirements.get('destination', 'your destination')
                 return (
-                    f"Perfect, {name_greeting}I have everything I need for your trip to {dest}! 🎉 "
+                    f"Perfect, {name_greeting}I have everything I need for your trip to {dest or 'your destination'}! 🎉 "
                     "Let me put together your itinerary now! ✨"
                 )
         else:
-            response_prompt = f"""You are Manike, a warm and intelligent travel planning assistant.
-
-User: {user_name or 'Guest'}
+            response_prompt = f"""User: {user_name or 'Guest'}
 Their message: "{user_message}"
 
 Information I've collected so far:
 {collected_summary}
 
 What I still need to ask: {next_question}
-
-Generate a SHORT, natural response (2-3 sentences) that:
-1. If they shared lots of info: Briefly acknowledge the KEY details (destination, who's traveling, special needs) - show you understood
-2. Smoothly transition to the next question
-3. Use their name naturally
-4. Sound like a real human, not a robot
-5. Use 1-2 emojis
-
-IMPORTANT:
-- Do NOT repeat back everything they said
-- Do NOT ask to confirm what they told you
-- Do NOT re-ask about information already collected (check the "collected so far" list)
-- Keep it conversational and brief
-
-Example good response: "How exciting, Chamil! A family trip to Sri Lanka with the kids sounds amazing! 🌴 I'll make sure to find wheelchair-accessible options. What type of experiences are you looking for?"
-
-Example bad response: "So you want to go to Sigiriya, Galle and Sri Lanka in mid April for 5 days with 2 kids and your father who needs a wheelchair. Is that correct? Now, where would you like to travel?"
 """
 
+            # Next-question replies depend only on this prompt (no history), so an
+            # identical prompt can reuse an earlier reply
+            cache_key = (type(self.provider).__name__, getattr(self.provider, "model", None), response_prompt)
+            cached = _response_cache.get(cache_key)
+            if cached is not None:
+                return cached
             try:
-                return self.provider.generate_content(response_prompt)
+                reply = self.provider.generate_content(
+                    response_prompt, system=RESPONSE_SYSTEM_PROMPT
+                )
+                _response_cache.set(cache_key, reply)
+                return reply
             except Exception:
-                if len(collected_info) >= 3:
-                    dest = user_requirements.get('destination', 'there')
-                    return f"This is going to be an amazing trip to {dest}, {name_greeting}! 🌟 {next_question}"
+                if sum(map(bool, (dest, start, trav, spec))) >= 3:
+                    return f"This is going to be an amazing trip to {dest or 'there'}, {name_greeting}! 🌟 {next_question}"
                 else:
                     acknowledgments = [
                         f"That's wonderful, {name_greeting}",
@@ -1,14 +1,50 @@
-import json
 import logging
+import os
+import threading
+import time
 import uuid
+from contextlib import contextmanager
 from typing import Dict, Optional
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import orjson
 
 from app.chat.manager import ChatManager
 from app.providers.base import AIProvider
 
 logger = logging.getLogger("manike.session")
 
+REDIS_URL = os.getenv("REDIS_URL")
+SESSION_TTL_SECONDS = int(os.getenv("CHAT_SESSION_TTL", "3600"))
+# Upper bound for one locked turn (LLM calls + DB writes)
+SESSION_LOCK_TTL_MS = int(os.getenv("CHAT_SESSION_LOCK_TTL_MS", "120000"))
+# How long a second request for the same session waits before it is refused
+SESSION_LOCK_WAIT_MS = int(os.getenv("CHAT_SESSION_LOCK_WAIT_MS", "2000"))
+
+# Delete the lock only if we still own it (it may have expired and been retaken)
+_UNLOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SessionBusyError(Exception):
+    """Another request holds the session's lock."""
+
+
+def _connect_redis():
+    """Return a Redis client when REDIS_URL is set, else None (per-process dict)."""
+    if not REDIS_URL:
+        return None
+    try:
+        import redis
+    except ImportError:
+        logger.warning("REDIS_URL is set but redis is not installed — using in-process session cache")
+        return None
+    return redis.Redis.from_url(REDIS_URL)
+
 
 class ChatSessionStore:
     """In-memory write-through cache for chat sessions.
@@ -16,27 +52,44 @@ class ChatSessionStore:
     Active sessions are kept in _sessions for fast access.
     Every mutation is also written to PostgreSQL via the injected DB session.
     On cache miss (server restart), the manager is rebuilt from DB records.
+
+    With REDIS_URL set, manager state is kept in Redis instead so every
+    worker process shares one warm cache. Postgres stays the source of
+    truth, so Redis can run without persistence. Each worker restores its
+    own ChatManager from the snapshot, so a read-modify-write of one session
+    must hold lock(session_id) (SET NX PX) to avoid lost updates.
+
+    All methods block on Redis/Postgres; async callers run them through
+    asyncio.to_thread.
     """
 
     def __init__(self):
         self._sessions: Dict[str, dict] = {}
+        # In-process backend only: per-session turn locks; _store_lock guards
+        # the two dicts
+        self._locks: Dict[str, threading.Lock] = {}
+        self._store_lock = threading.Lock()
+        self._redis = _connect_redis()
 
     # ------------------------------------------------------------------
     # create — called by POST /api/session/new
     # ------------------------------------------------------------------
     def create(self, provider: AIProvider, db, user_id: str, tenant_id: str) -> tuple:
         """Create a new chat session, persist to DB, return (session_id, greeting)."""
-        from app.models.sql_models import ChatSession, ChatMessage
+        from app.models.sql_models import ChatSession, ChatMessage, new_id
 
-        session_id = str(uuid.uuid4())
+        session_id = new_id()
         manager = ChatManager(provider)
         greeting = manager.get_greeting()
+        requirements = dict(manager.user_requirements)
+        manager._last_requirements = requirements
 
         # In-memory store
-        self._sessions[session_id] = {
-            "manager": manager,
-            "created_at": datetime.utcnow().isoformat(),
-        }
+        if self._redis is None:
+            self._sessions[session_id] = {
+                "manager": manager,
+                "created_at": datetime.utcnow().isoformat(),
+            }
 
         # Persist ChatSession row
         db_chat_session = ChatSession(
@@ -44,7 +97,7 @@ class ChatSessionStore:
             tenant_id=tenant_id,
             user_id=user_id,
             title="New Chat",
-            requirements_json=json.dumps(manager.user_requirements),
+            requirements_json=requirements,
         )
         db.add(db_chat_session)
         db.flush()  # ensure chat_session row exists before FK reference in chat_message
@@ -57,6 +110,7 @@ class ChatSessionStore:
             content=greeting,
         ))
         db.commit()
+        self.save(session_id, manager)
         logger.info("Session %s persisted to DB (user=%s, tenant=%s)", session_id, user_id, tenant_id)
         return session_id, greeting
 
@@ -72,35 +126,68 @@ class ChatSessionStore:
         db,
         tenant_id: str,
         destination: Optional[str] = None,
+        manager: Optional[ChatManager] = None,
     ) -> None:
-        """Append user + assistant messages to DB and update session metadata."""
-        from app.models.sql_models import ChatSession, ChatMessage
+        """Append user + assistant messages to DB and update session metadata.
+
+        Pass the session's manager so the shared cache is refreshed after commit.
+        """
+        from app.models.sql_models import ChatSession, ChatMessage, new_id
+        from sqlalchemy import case, func, insert, literal, update
+        from sqlalchemy.dialects.postgresql import JSONB
 
         now = datetime.utcnow()
 
-        db.add(ChatMessage(
-            session_id=session_id,
-            tenant_id=tenant_id,
-            role="user",
-            content=user_message,
-            created_at=now,
-        ))
-        db.add(ChatMessage(
-            session_id=session_id,
-            tenant_id=tenant_id,
-            role="assistant",
-            content=assistant_message,
-        ))
+        # One multi-row INSERT; ids/timestamps are set here because Core
+        # inserts bypass the model default factories. The assistant row is
+        # stamped 1µs later so ordering by created_at stays stable.
+        db.exec(insert(ChatMessage), params=[
+            {
+                "id": new_id(),
+                "session_id": session_id,
+                "tenant_id": tenant_id,
+                "role": "user",
+                "content": user_message,
+                "created_at": now,
+            },
+            {
+                "id": new_id(),
+                "session_id": session_id,
+                "tenant_id": tenant_id,
+                "role": "assistant",
+                "content": assistant_message,
+                "created_at": now + timedelta(microseconds=1),
+            },
+        ])
 
-        db_session = db.get(ChatSession, session_id)
-        if db_session:
-            db_session.requirements_json = json.dumps(requirements)
-            db_session.updated_at = datetime.utcnow()
-            if destination and db_session.title == "New Chat":
-                db_session.title = destination
-            db.add(db_session)
+        # Update by PK without loading the row; title logic runs server-side
+        values = {"updated_at": now}
+        last = manager._last_requirements if manager is not None else None
+        if last is None:
+            values["requirements_json"] = requirements
+        else:
+            # Merge only the changed keys server-side with jsonb ||
+            delta = {k: v for k, v in requirements.items() if k not in last or last[k] != v}
+            if delta:
+                values["requirements_json"] = func.coalesce(
+                    ChatSession.requirements_json, literal({}, JSONB)
+                ).op("||")(literal(delta, JSONB))
+        if destination:
+            values["title"] = case(
+                (ChatSession.title == "New Chat", destination),
+                else_=ChatSession.title,
+            )
+        db.exec(
+            update(ChatSession)
+            .where(ChatSession.id == session_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
 
         db.commit()
+        if manager is not None:
+            manager._last_requirements = dict(requirements)
+            self.save(session_id, manager)
 
     # ------------------------------------------------------------------
     # get_manager — hot path returns from memory; falls back to DB rebuild
@@ -111,40 +198,135 @@ class ChatSessionStore:
         db=None,
         provider: Optional[AIProvider] = None,
     ) -> Optional[ChatManager]:
-        if session_id in self._sessions:
+        if self._redis is None and session_id in self._sessions:
             return self._sessions[session_id]["manager"]
-        if db is None or provider is None:
+        blob = self._redis.get(self._key(session_id)) if self._redis is not None else None
+        if blob is None and db is None:
             return None
+        if provider is None:
+            # Restoring or rebuilding needs a provider for the new ChatManager
+            from app.providers.factory import ProviderFactory
+            provider = ProviderFactory.create()
+        if blob is not None:
+            return self._restore(blob, provider)
         return self._rebuild_from_db(session_id, db, provider)
 
+    # ------------------------------------------------------------------
+    # lock — serialise read-modify-write of one session across workers
+    # ------------------------------------------------------------------
+    @contextmanager
+    def lock(self, session_id: str):
+        """Hold the session's lock: a Redis key shared by all workers, or a
+        threading.Lock for the in-process cache.
+
+        Raises SessionBusyError if another request still holds it after
+        SESSION_LOCK_WAIT_MS, so a caller never parks a worker thread for a
+        whole turn.
+        """
+        if self._redis is None:
+            with self._store_lock:
+                session_lock = self._locks.setdefault(session_id, threading.Lock())
+            if not session_lock.acquire(timeout=SESSION_LOCK_WAIT_MS / 1000):
+                raise SessionBusyError(f"Chat session {session_id} is busy")
+            try:
+                yield
+            finally:
+                session_lock.release()
+            return
+        key = f"chat-lock:{session_id}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + SESSION_LOCK_WAIT_MS / 1000
+        while not self._redis.set(key, token, nx=True, px=SESSION_LOCK_TTL_MS):
+            if time.monotonic() >= deadline:
+                raise SessionBusyError(f"Chat session {session_id} is busy")
+            time.sleep(0.05)
+        try:
+            yield
+        finally:
+            self._redis.eval(_UNLOCK_SCRIPT, 1, key, token)
+
+    # ------------------------------------------------------------------
+    # mark_generated — reset has_changes after an itinerary is built
+    # ------------------------------------------------------------------
+    def mark_generated(self, session_id: str, db=None, provider: Optional[AIProvider] = None) -> None:
+        with self.lock(session_id):
+            manager = self.get_manager(session_id, db=db, provider=provider)
+            if manager:
+                manager.mark_generated()
+                self.save(session_id, manager)
+
+    # ------------------------------------------------------------------
+    # save — write manager state back to the shared cache
+    # ------------------------------------------------------------------
+    def save(self, session_id: str, manager: ChatManager) -> None:
+        """Store manager state in Redis; the in-process cache holds live objects already."""
+        if self._redis is not None:
+            self._redis.set(self._key(session_id), self._snapshot(manager), ex=SESSION_TTL_SECONDS)
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"chat:{session_id}"
+
+    @staticmethod
+    def _snapshot(manager: ChatManager) -> bytes:
+        # Everything ChatManager/ConversationFlow mutate between turns
+        flow = manager.flow
+        return orjson.dumps({
+            "requirements": flow.user_requirements,
+            "answered_fields": sorted(flow.answered_fields),
+            "trip_duration": flow.trip_duration,
+            "user_name": manager.user_name,
+            "changed_since_generation": manager.has_changes_since_generation(),
+            "consecutive_failures": manager._consecutive_failures,
+            "name_tried_hashes": sorted(manager._name_tried_hashes),
+            "last_requirements": manager._last_requirements,
+            "history": manager.chat_history,
+        })
+
+    @staticmethod
+    def _restore(blob, provider: AIProvider) -> ChatManager:
+        state = orjson.loads(blob)
+        manager = ChatManager(provider)
+        flow = manager.flow
+        flow.user_requirements.update(state["requirements"])
+        flow.answered_fields.update(state["answered_fields"])
+        flow.trip_duration = state["trip_duration"]
+        manager.user_name = state["user_name"]
+        manager._changed_since_generation = state["changed_since_generation"]
+        manager._consecutive_failures = state.get("consecutive_failures", 0)
+        manager._name_tried_hashes.update(state.get("name_tried_hashes", ()))
+        manager._last_requirements = state.get("last_requirements")
+        manager.chat_history.extend(state["history"])
+        return manager
+
     # ------------------------------------------------------------------
     # _rebuild_from_db — reconstruct ChatManager from persisted rows
     # ------------------------------------------------------------------
     def _rebuild_from_db(self, session_id: str, db, provider: AIProvider) -> Optional[ChatManager]:
-        from app.models.sql_models import ChatSession, ChatMessage
+        from app.models.sql_models import ChatSession
+        from sqlalchemy.orm import joinedload
         from sqlmodel import select
 
-        db_session = db.get(ChatSession, session_id)
+        # Session row and its messages in a single JOINed round-trip
+        db_session = db.exec(
+            select(ChatSession)
+            .where(ChatSession.id == session_id)
+            .options(joinedload(ChatSession.messages))
+        ).unique().first()
         if not db_session or db_session.is_deleted:
             return None
 
-        messages = db.exec(
-            select(ChatMessage)
-            .where(ChatMessage.session_id == session_id)
-            .order_by(ChatMessage.created_at)
-        ).all()
+        messages = db_session.messages
 
         manager = ChatManager(provider)
 
-        # Restore requirements from JSON snapshot (avoids re-running AI extraction)
-        if db_session.requirements_json:
-            try:
-                saved_reqs = json.loads(db_session.requirements_json)
-                for field, value in saved_reqs.items():
-                    if value is not None:
-                        manager.flow.update_field(field, value)
-            except Exception:
-                pass
+        # Restore requirements from JSONB snapshot (avoids re-running AI extraction)
+        saved_reqs = db_session.requirements_json
+        if saved_reqs:
+            for field, value in saved_reqs.items():
+                if value is not None:
+                    manager.flow.update_field(field, value)
+            manager._last_requirements = dict(saved_reqs)
 
         # Replay chat history
         for msg in messages:
@@ -153,23 +335,35 @@ class ChatSessionStore:
                 "content": msg.content,
             })
 
-        # Cache for subsequent requests in this server process
-        self._sessions[session_id] = {
-            "manager": manager,
-            "created_at": db_session.created_at.isoformat(),
-        }
         logger.info("Session %s rebuilt from DB (%d messages)", session_id, len(messages))
+
+        # Cache for subsequent requests. Unlocked readers may rebuild the
+        # same session concurrently; the first one published wins.
+        if self._redis is None:
+            with self._store_lock:
+                entry = self._sessions.setdefault(session_id, {
+                    "manager": manager,
+                    "created_at": db_session.created_at.isoformat(),
+                })
+            return entry["manager"]
+        self.save(session_id, manager)
         return manager
 
     # ------------------------------------------------------------------
     # Convenience helpers
     # ------------------------------------------------------------------
     def exists(self, session_id: str) -> bool:
+        if self._redis is not None:
+            return bool(self._redis.exists(self._key(session_id)))
         return session_id in self._sessions
 
     def delete(self, session_id: str) -> None:
         """Evict from in-memory cache. API layer handles DB soft-delete."""
-        self._sessions.pop(session_id, None)
+        if self._redis is not None:
+            self._redis.delete(self._key(session_id))
+        with self._store_lock:
+            self._sessions.pop(session_id, None)
+            self._locks.pop(session_id, None)
         logger.info("Session %s evicted from cache", session_id)
 
 
@@ -1,4 +1,6 @@
 import os
+import time
+from functools import lru_cache
 from datetime import datetime, timedelta
 from typing import Optional, Union
 from jose import JWTError, jwt
@@ -14,7 +16,15 @@ SECRET_KEY = os.getenv("SECRET_KEY", "super-secret-key-manike-ai")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 # 1 day
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# argon2 for new hashes; existing pbkdf2_sha256 hashes still verify and are
+# upgraded on the next successful login.
+pwd_context = CryptContext(
+    schemes=["argon2", "pbkdf2_sha256"],
+    deprecated="auto",
+    argon2__memory_cost=65536,
+    argon2__time_cost=3,
+    argon2__parallelism=4,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
 def verify_password(plain_password, hashed_password):
@@ -33,6 +43,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+@lru_cache(maxsize=50_000)
+def _decode_token(token: str) -> tuple:
+    """Verify a JWT once and return (user_id, exp); repeat requests skip the HMAC/parse.
+
+    Raises JWTError for invalid tokens (exceptions are not cached). Callers
+    must still check exp, since a cached entry outlives the token.
+    """
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    return payload.get("sub"), payload.get("exp")
+
 async def get_current_user(token: str = Depends(oauth2_scheme), session: Session = Depends(get_session)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -40,9 +60,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme), session: Session
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+        user_id, exp = _decode_token(token)
+        if user_id is None or (exp is not None and exp <= time.time()):
             raise credentials_exception
     except JWTError:
         raise credentials_exception
@@ -57,8 +76,14 @@ def authenticate_user(session: Session, email: str, password: str):
     user = session.exec(statement).first()
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = pwd_context.verify_and_update(password, user.hashed_password)
+    if not valid:
         return False
+    if new_hash:
+        user.hashed_password = new_hash
+        session.add(user)
+        session.commit()
+        session.refresh(user)
     return user
 
 async def get_current_tenant_id(user: User = Depends(get_current_user)):
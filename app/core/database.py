@@ -10,7 +10,17 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL environment variable is not set")
 
-engine = create_engine(DATABASE_URL, echo=False)
+# Sized for FastAPI's threadpool plus the chat/search worker threads;
+# pre_ping drops connections the server or a proxy closed while idle.
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_size=int(os.getenv("DB_POOL_SIZE", "25")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "25")),
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    pool_use_lifo=True,
+)
 
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
@@ -1,5 +1,17 @@
+import asyncio
+import functools
 import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import grpc
+import numpy as np
 from pymilvus import connections, Collection, utility, DataType
+from pymilvus.client.types import LoadState
+from pymilvus.exceptions import MilvusException
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -7,172 +19,448 @@ load_dotenv()
 MILVUS_HOST = os.getenv("MILVUS_HOST", "localhost")
 MILVUS_PORT = os.getenv("MILVUS_PORT", "19530")
 COLLECTION_NAME = "experiences"
-TENANT_COLLECTION_NAME = "tenants"
 IMAGE_COLLECTION_NAME = "image_vectors"
 CLIP_COLLECTION_NAME = "clip_vectors"
 
+# Listing/lookup reads tolerate seconds-stale data; "Strong" made every
+# query wait for the latest guarantee timestamp.
+READ_CONSISTENCY = "Bounded"
+
+_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]+")
+
+# Dedicated pool for vector searches awaited from async routes, so they do
+# not compete with FastAPI's default threadpool.
+_search_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("MILVUS_SEARCH_WORKERS", "32")),
+    thread_name_prefix="milvus-search",
+)
+
+# HNSW build params shared by new collections and late index creation
+HNSW_INDEX_PARAMS = {
+    "metric_type": "COSINE",
+    "index_type": "HNSW",
+    "params": {"M": 16, "efConstruction": 200},
+}
+
+
+def _search_params(limit: int, ef: Optional[int]) -> dict:
+    """HNSW search params; ef defaults to 4x the result count (min 16)."""
+    return {"metric_type": "COSINE", "params": {"ef": ef or max(limit * 4, 16)}}
+
+
+# Rows per columnar insert; one gRPC call per chunk instead of per row.
+INSERT_BATCH_SIZE = 256
+
+_VECTOR_TYPES = (DataType.FLOAT_VECTOR, DataType.FLOAT16_VECTOR, DataType.BINARY_VECTOR)
+
+
+def _fp16(vector) -> np.ndarray:
+    """Quantize an embedding for the FLOAT16_VECTOR fields."""
+    return np.asarray(vector, dtype=np.float16)
+
+
+def _from_fp16(value):
+    """Decode a FLOAT16_VECTOR query result (raw little-endian bytes) to float32."""
+    if isinstance(value, list) and len(value) == 1 and isinstance(value[0], (bytes, bytearray)):
+        value = value[0]
+    if isinstance(value, (bytes, bytearray)):
+        return np.frombuffer(value, dtype=np.float16).astype(np.float32)
+    return value
+
+
+def _eq_expr(field: str, value: str) -> str:
+    """Build a `field == 'value'` filter, rejecting ids that could break out of the literal.
+
+    tenant_id is a partition key, so this predicate routes to one partition.
+    """
+    if not _ID_PATTERN.fullmatch(value):
+        raise ValueError(f"Invalid {field}: {value!r}")
+    return f"{field} == '{value}'"
+
+
+def _is_unavailable(exc: Exception) -> bool:
+    """True for connection-level failures where the request never reached Milvus."""
+    if isinstance(exc, grpc.RpcError):
+        return exc.code() == grpc.StatusCode.UNAVAILABLE
+    return "UNAVAILABLE" in str(exc)
+
+
+def _with_retry(tries: int = 3, backoff: float = 0.1):
+    """Reconnect and retry a client method when the gRPC channel was dropped."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            for attempt in range(tries):
+                try:
+                    return fn(self, *args, **kwargs)
+                except (MilvusException, grpc.RpcError) as e:
+                    if attempt == tries - 1 or not _is_unavailable(e):
+                        raise
+                    time.sleep(backoff * (2 ** attempt))
+                    self.connect()
+        return wrapper
+    return decorator
+
 
 class MilvusClient:
     def __init__(self):
-        self.connect()
+        # No network I/O here: the channel opens on first use
+        self._collections: dict[str, Collection] = {}
+        self._connected = False
+        self._connect_lock = threading.Lock()
+
+    def ensure_connected(self):
+        if not self._connected:
+            with self._connect_lock:
+                if not self._connected:
+                    self.connect()
 
     def connect(self):
+        # Handles are bound to the old connection; drop them on reconnect
+        self._collections.clear()
         try:
-            connections.connect("default", host=MILVUS_HOST, port=MILVUS_PORT)
+            if connections.has_connection("default"):
+                connections.disconnect("default")
+            # keep_alive pings idle channels so load balancers don't drop them
+            connections.connect("default", host=MILVUS_HOST, port=MILVUS_PORT, keep_alive=True)
+            self._connected = True
             print(f"Connected to Milvus at {MILVUS_HOST}:{MILVUS_PORT}")
         except Exception as e:
             print(f"Failed to connect to Milvus: {e}")
 
+    def close(self):
+        """Drop cached handles and close the gRPC channel (app shutdown)."""
+        with self._connect_lock:
+            self._collections.clear()
+            if self._connected:
+                connections.disconnect("default")
+                self._connected = False
+
     def create_collection(self, collection_name, schema):
+        """Create, index and load a collection, or check and load an existing one.
+
+        Runs at startup in every uvicorn worker, so it must tolerate another
+        process creating the same collection concurrently.
+        """
+        self.ensure_connected()
+        collection = None
         if not utility.has_collection(collection_name):
-            collection = Collection(name=collection_name, schema=schema)
+            try:
+                collection = Collection(name=collection_name, schema=schema)
+            except MilvusException:
+                # Lost the race to another worker; verify its collection below
+                if not utility.has_collection(collection_name):
+                    raise
+        if collection is not None:
+            # create_index/load are idempotent if another worker repeats them
             for field in schema.fields:
-                if field.dtype in [DataType.FLOAT_VECTOR, DataType.BINARY_VECTOR]:
-                    index_params = {
-                        "metric_type": "COSINE",
-                        "index_type": "HNSW",
-                        "params": {"M": 16, "efConstruction": 200}
-                    }
-                    collection.create_index(field_name=field.name, index_params=index_params)
+                if field.dtype in _VECTOR_TYPES:
+                    collection.create_index(field_name=field.name, index_params=HNSW_INDEX_PARAMS)
             collection.load()
+            self._collections[collection_name] = collection
             print(f"Collection {collection_name} created and loaded.")
         else:
-            collection = Collection(collection_name)
+            collection = self._col(collection_name)
+            existing = {field.name: field for field in collection.schema.fields}
             for field in schema.fields:
-                if field.dtype in [DataType.FLOAT_VECTOR, DataType.BINARY_VECTOR]:
-                    if not collection.has_index(field_name=field.name):
-                        collection.release()
-                        index_params = {
-                            "metric_type": "COSINE",
-                            "index_type": "HNSW",
-                            "params": {"M": 8, "efConstruction": 64}
-                        }
-                        collection.create_index(field_name=field.name, index_params=index_params)
-            collection.load()
+                old = existing.get(field.name)
+                if field.dtype in _VECTOR_TYPES and old is not None and (
+                    old.dtype != field.dtype or old.params.get("dim") != field.params.get("dim")
+                ):
+                    # Every insert and search against this collection would fail.
+                    raise RuntimeError(
+                        f"{collection_name}.{field.name} is {old.dtype.name}/{old.params.get('dim')}, "
+                        f"schema expects {field.dtype.name}/{field.params.get('dim')}; run reindex_milvus.py"
+                    )
+            # One describe-index call; release/reload only if an index is missing
+            indexed = {index.field_name for index in collection.indexes}
+            missing = [
+                field.name for field in schema.fields
+                if field.dtype in _VECTOR_TYPES
+                and field.name not in indexed
+            ]
+            if missing:
+                collection.release()
+                for field_name in missing:
+                    collection.create_index(field_name=field_name, index_params=HNSW_INDEX_PARAMS)
+            if missing or utility.load_state(collection_name) != LoadState.Loaded:
+                collection.load()
             print(f"Collection {collection_name} already exists and is now loaded (index checked).")
 
+    def _col(self, name: str) -> Collection:
+        """Return a cached Collection handle (Collection() issues a describe RPC)."""
+        collection = self._collections.get(name)
+        if collection is None:
+            self.ensure_connected()
+            collection = Collection(name)
+            self._collections[name] = collection
+        return collection
+
+    async def _run_search(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_search_executor, fn, *args)
+
+    async def asearch_experiences(self, tenant_id, vector, limit=10, ef: Optional[int] = None):
+        return await self._run_search(self.search_experiences, tenant_id, vector, limit, ef)
+
+    async def asearch_images(self, tenant_id: str, query_embedding: list, limit: int = 5, ef: Optional[int] = None):
+        return await self._run_search(self.search_images, tenant_id, query_embedding, limit, ef)
+
+    async def asearch_clips(self, tenant_id: str, query_embedding: list, limit: int = 5, ef: Optional[int] = None):
+        return await self._run_search(self.search_clips, tenant_id, query_embedding, limit, ef)
+
+    def _insert_rows(self, collection_name: str, rows: list):
+        """Insert (id, tenant_id, embedding, metadata) rows in columnar chunks.
+
+        Each chunk is retried on its own, so a dropped channel never replays
+        chunks that were already inserted (ids are not deduplicated).
+        """
+        return [
+            self._insert_chunk(collection_name, rows[start:start + INSERT_BATCH_SIZE])
+            for start in range(0, len(rows), INSERT_BATCH_SIZE)
+        ]
+
+    @_with_retry()
+    def _insert_chunk(self, collection_name: str, rows: list):
+        columns = [list(col) for col in zip(*rows)]
+        columns[2] = [_fp16(vector) for vector in columns[2]]
+        return self._col(collection_name).insert(columns)
+
     # -----------------------------------------------------------------------
     # Experiences (existing)
     # -----------------------------------------------------------------------
+    @_with_retry()
     def insert_experience(self, data):
-        collection = Collection(COLLECTION_NAME)
+        """Columnar insert: [ids, tenant_ids, embeddings, metadata, slugs]."""
+        collection = self._col(COLLECTION_NAME)
+        data = [*data[:2], [_fp16(vector) for vector in data[2]], *data[3:]]
         return collection.insert(data)
 
-    def search_experiences(self, tenant_id, vector, limit=10):
-        collection = Collection(COLLECTION_NAME)
+    @_with_retry()
+    def search_experiences(self, tenant_id, vector, limit=10, ef: Optional[int] = None):
+        collection = self._col(COLLECTION_NAME)
         res = collection.search(
-            data=[vector],
+            data=[_fp16(vector)],
             anns_field="embedding",
-            param={"metric_type": "COSINE", "params": {"ef": 64}},
+            param=_search_params(limit, ef),
             limit=limit,
-            expr=f"tenant_id == '{tenant_id}'",
+            expr=_eq_expr("tenant_id", tenant_id),
             output_fields=["id", "metadata", "slug"]
         )
         return res
 
+    @_with_retry()
     def list_experiences(self, limit=100):
-        collection = Collection(COLLECTION_NAME)
-        return collection.query(
+        collection = self._col(COLLECTION_NAME)
+        rows = collection.query(
             expr="", limit=limit,
             output_fields=["id", "tenant_id", "metadata", "slug", "embedding"],
-            consistency_level="Strong"
+            consistency_level=READ_CONSISTENCY
         )
-
-    # -----------------------------------------------------------------------
-    # Tenants (existing)
-    # -----------------------------------------------------------------------
-    def insert_tenant(self, data):
-        collection = Collection(TENANT_COLLECTION_NAME)
-        return collection.insert(data)
-
-    def get_tenant(self, tenant_id):
-        collection = Collection(TENANT_COLLECTION_NAME)
-        res = collection.query(
-            expr=f"id == '{tenant_id}'",
-            output_fields=["id", "name", "apikey", "metadata"],
-            consistency_level="Strong"
-        )
-        return res[0] if res else None
-
-    def list_tenants(self, limit=100):
-        collection = Collection(TENANT_COLLECTION_NAME)
-        return collection.query(
-            expr="", limit=limit,
-            output_fields=["id", "name", "apikey", "metadata"],
-            consistency_level="Strong"
-        )
-
-    def update_tenant(self, tenant_id, data):
-        collection = Collection(TENANT_COLLECTION_NAME)
-        return collection.insert(data)
-
-    def delete_tenant(self, tenant_id):
-        collection = Collection(TENANT_COLLECTION_NAME)
-        return collection.delete(expr=f"id == '{tenant_id}'")
+        for row in rows:
+            row["embedding"] = _from_fp16(row.get("embedding"))
+        return rows
 
     # -----------------------------------------------------------------------
     # Image Vectors (NEW - semantic search)
     # -----------------------------------------------------------------------
+    @_with_retry()
     def insert_image_vector(self, id: str, tenant_id: str, embedding: list, metadata: dict):
         """Insert an image embedding into Milvus for semantic search."""
-        collection = Collection(IMAGE_COLLECTION_NAME)
-        data = [[id], [tenant_id], [embedding], [metadata]]
+        collection = self._col(IMAGE_COLLECTION_NAME)
+        data = [[id], [tenant_id], [_fp16(embedding)], [metadata]]
         return collection.insert(data)
 
-    def search_images(self, tenant_id: str, query_embedding: list, limit: int = 5):
+    def insert_image_vectors(self, rows: list):
+        """Bulk-insert (id, tenant_id, embedding, metadata) image rows."""
+        return self._insert_rows(IMAGE_COLLECTION_NAME, rows)
+
+    @_with_retry()
+    def search_images(self, tenant_id: str, query_embedding: list, limit: int = 5, ef: Optional[int] = None):
         """Search for the most similar images using vector similarity."""
-        collection = Collection(IMAGE_COLLECTION_NAME)
+        collection = self._col(IMAGE_COLLECTION_NAME)
         results = collection.search(
-            data=[query_embedding],
+            data=[_fp16(query_embedding)],
             anns_field="embedding",
-            param={"metric_type": "COSINE", "params": {"ef": 64}},
+            param=_search_params(limit, ef),
             limit=limit,
-            expr=f"tenant_id == '{tenant_id}'",
+            expr=_eq_expr("tenant_id", tenant_id),
             output_fields=["id", "metadata"]
         )
         return results
 
+    @_with_retry()
+    def search_images_batch(self, tenant_id: str, query_embeddings, limit: int = 5, ef: Optional[int] = None):
+        """Multi-vector search: one RPC, results[i] holds the hits for query_embeddings[i]."""
+        collection = self._col(IMAGE_COLLECTION_NAME)
+        return collection.search(
+            data=[_fp16(vector) for vector in query_embeddings],
+            anns_field="embedding",
+            param=_search_params(limit, ef),
+            limit=limit,
+            expr=_eq_expr("tenant_id", tenant_id),
+            output_fields=["id", "metadata"]
+        )
+
+    @_with_retry()
     def list_image_vectors(self, tenant_id: str, limit: int = 100):
         """List all image vectors for a tenant."""
-        collection = Collection(IMAGE_COLLECTION_NAME)
+        collection = self._col(IMAGE_COLLECTION_NAME)
         return collection.query(
-            expr=f"tenant_id == '{tenant_id}'",
+            expr=_eq_expr("tenant_id", tenant_id),
             limit=limit,
             output_fields=["id", "tenant_id", "metadata"],
-            consistency_level="Strong"
+            consistency_level=READ_CONSISTENCY
         )
 
     # -----------------------------------------------------------------------
     # Clip Vectors (NEW - semantic search)
     # -----------------------------------------------------------------------
+    @_with_retry()
     def insert_clip_vector(self, id: str, tenant_id: str, embedding: list, metadata: dict):
         """Insert a cinematic clip embedding into Milvus for semantic search."""
-        collection = Collection(CLIP_COLLECTION_NAME)
-        data = [[id], [tenant_id], [embedding], [metadata]]
+        collection = self._col(CLIP_COLLECTION_NAME)
+        data = [[id], [tenant_id], [_fp16(embedding)], [metadata]]
         return collection.insert(data)
 
-    def search_clips(self, tenant_id: str, query_embedding: list, limit: int = 5):
+    def insert_clip_vectors(self, rows: list):
+        """Bulk-insert (id, tenant_id, embedding, metadata) clip rows."""
+        return self._insert_rows(CLIP_COLLECTION_NAME, rows)
+
+    @_with_retry()
+    def search_clips(self, tenant_id: str, query_embedding: list, limit: int = 5, ef: Optional[int] = None):
         """Search for the most similar cinematic clips using vector similarity."""
-        collection = Collection(CLIP_COLLECTION_NAME)
+        collection = self._col(CLIP_COLLECTION_NAME)
         results = collection.search(
-            data=[query_embedding],
+            data=[_fp16(query_embedding)],
             anns_field="embedding",
-            param={"metric_type": "COSINE", "params": {"ef": 64}},
+            param=_search_params(limit, ef),
             limit=limit,
-            expr=f"tenant_id == '{tenant_id}'",
+            expr=_eq_expr("tenant_id", tenant_id),
             output_fields=["id", "metadata"]
         )
         return results
 
+    @_with_retry()
+    def search_clips_batch(self, tenant_id: str, query_embeddings, limit: int = 5, ef: Optional[int] = None):
+        """Multi-vector search: one RPC, results[i] holds the hits for query_embeddings[i]."""
+        collection = self._col(CLIP_COLLECTION_NAME)
+        return collection.search(
+            data=[_fp16(vector) for vector in query_embeddings],
+            anns_field="embedding",
+            param=_search_params(limit, ef),
+            limit=limit,
+            expr=_eq_expr("tenant_id", tenant_id),
+            output_fields=["id", "metadata"]
+        )
+
+    @_with_retry()
     def list_clip_vectors(self, tenant_id: str, limit: int = 100):
         """List all clip vectors for a tenant."""
-        collection = Collection(CLIP_COLLECTION_NAME)
+        collection = self._col(CLIP_COLLECTION_NAME)
         return collection.query(
-            expr=f"tenant_id == '{tenant_id}'",
+            expr=_eq_expr("tenant_id", tenant_id),
             limit=limit,
             output_fields=["id", "tenant_id", "metadata"],
-            consistency_level="Strong"
+            consistency_level=READ_CONSISTENCY
         )
 
 
-milvus_client = MilvusClient()
+class InsertBatcher:
+    """Coalesces single-row inserts from concurrent requests into one columnar insert.
+
+    submit() resolves only after the batch containing the row is written, so
+    callers keep read-your-write semantics. Until start() is called (outside
+    the app lifespan, e.g. scripts) rows are inserted directly.
+    """
+
+    def __init__(self, insert_fn, max_rows: int = INSERT_BATCH_SIZE, window_ms: float = 5):
+        self._insert_fn = insert_fn
+        self._max_rows = max_rows
+        self._window = window_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, row: list):
+        if self._task is None:
+            return await asyncio.to_thread(self._insert_fn, [[value] for value in row])
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self._window
+                while len(batch) < self._max_rows:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                await self._flush(batch)
+                batch = []
+        except asyncio.CancelledError:
+            # stop(): fail everything still waiting instead of hanging the callers
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            error = RuntimeError("Insert batcher stopped before the row was confirmed")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            raise
+
+    async def _flush(self, batch: list):
+        columns = [list(col) for col in zip(*(row for row, _ in batch))]
+        try:
+            result = await asyncio.to_thread(self._insert_fn, columns)
+        except Exception as e:
+            if len(batch) == 1:
+                _, future = batch[0]
+                if not future.done():
+                    future.set_exception(e)
+                return
+            # One bad row rejects the whole insert; retry rows one by one so
+            # only the callers whose rows are bad see the error
+            for row, future in batch:
+                try:
+                    row_result = await asyncio.to_thread(self._insert_fn, [[value] for value in row])
+                except Exception as row_error:
+                    if not future.done():
+                        future.set_exception(row_error)
+                else:
+                    if not future.done():
+                        future.set_result(row_result)
+        else:
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(result)
+
+
+@functools.lru_cache(maxsize=1)
+def get_milvus_client() -> MilvusClient:
+    return MilvusClient()
+
+
+milvus_client = get_milvus_client()
+
+# Row order matches the experience collection schema
+experience_insert_batcher = InsertBatcher(milvus_client.insert_experience)
@@ -0,0 +1,43 @@
+from typing import Any, Iterable, Iterator
+
+import orjson
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class NumpyORJSONResponse(ORJSONResponse):
+    """ORJSONResponse that also encodes numpy arrays (embeddings) natively.
+
+    orjson already handles datetime, UUID and dataclasses in C, so payloads
+    can be plain model_dump() output rather than mode="json".
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+        )
+
+
+def stream_json_rows(request: Request, rows: Iterable[Any]) -> StreamingResponse:
+    """Stream rows as a JSON array, or as NDJSON when the client asks for it.
+
+    The array stays the default so existing clients keep working; clients
+    sending `Accept: application/x-ndjson` get one object per line instead.
+    Either way rows are encoded as they are produced, never held as a list.
+    """
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        lines = (orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+        return StreamingResponse(lines, media_type=NDJSON_MEDIA_TYPE)
+    return StreamingResponse(_json_array(rows), media_type="application/json")
+
+
+def _json_array(rows: Iterable[Any]) -> Iterator[bytes]:
+    yield b"["
+    separator = b""
+    for row in rows:
+        yield separator + orjson.dumps(row)
+        separator = b","
+    yield b"]"
@@ -1,5 +1,7 @@
+import asyncio
 import logging
 import sys
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -10,6 +12,7 @@ from app.api import chat as chat_api
 from app.api import pages as pages_api
 from app.api import heygen as heygen_api
 from app.core.database import create_db_and_tables
+from app.core.responses import NumpyORJSONResponse
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,15 +21,56 @@ logging.basicConfig(
 )
 logger = logging.getLogger("manike")
 from app.models.milvus_schema import (
-    get_experience_schema, get_tenant_schema, 
-    get_image_vector_schema, get_clip_vector_schema
+    EXPERIENCE_SCHEMA, IMAGE_VECTOR_SCHEMA, CLIP_VECTOR_SCHEMA,
 )
 from app.core.milvus_client import (
-    milvus_client, COLLECTION_NAME, TENANT_COLLECTION_NAME,
-    IMAGE_COLLECTION_NAME, CLIP_COLLECTION_NAME
+    milvus_client, COLLECTION_NAME,
+    IMAGE_COLLECTION_NAME, CLIP_COLLECTION_NAME,
+    experience_insert_batcher,
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 1. Initialize PostgreSQL (SQLModel)
+    try:
+        await asyncio.to_thread(create_db_and_tables)
+        logger.info("PostgreSQL tables initialised")
+    except Exception as e:
+        logger.error("Failed to initialise PostgreSQL: %s", e)
+
+    # 2. Initialize Milvus — open the shared channel once, then set up the
+    #    independent collections concurrently over it
+    try:
+        await asyncio.to_thread(milvus_client.ensure_connected)
+    except Exception as e:
+        logger.error("Failed to connect to Milvus: %s", e)
+    collections = [
+        (COLLECTION_NAME, EXPERIENCE_SCHEMA),
+        (IMAGE_COLLECTION_NAME, IMAGE_VECTOR_SCHEMA),
+        (CLIP_COLLECTION_NAME, CLIP_VECTOR_SCHEMA),
+    ]
+    results = await asyncio.gather(
+        *(asyncio.to_thread(milvus_client.create_collection, name, schema) for name, schema in collections),
+        return_exceptions=True,
+    )
+    failures = [(name, r) for (name, _), r in zip(collections, results) if isinstance(r, Exception)]
+    for name, e in failures:
+        logger.error("Failed to initialise Milvus collection %s: %s", name, e)
+    if not failures:
+        logger.info("Milvus collections initialised")
+
+    experience_insert_batcher.start()
+
+    yield
+
+    # Shutdown: stop insert batching, then close the persistent Milvus channel
+    await experience_insert_batcher.stop()
+    await asyncio.to_thread(milvus_client.close)
+
+
 app = FastAPI(
+    lifespan=lifespan,
+    default_response_class=NumpyORJSONResponse,
     title="Manike B2B AI Engine",
     version="2.0.0",
     description="Multi-tenant AI Scene Orchestrator and Itinerary Engine"
@@ -49,32 +93,6 @@ app.add_middleware(
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
-@app.on_event("startup")
-async def startup_event():
-    # 1. Initialize PostgreSQL (SQLModel)
-    try:
-        create_db_and_tables()
-        logger.info("PostgreSQL tables initialised")
-    except Exception as e:
-        logger.error("Failed to initialise PostgreSQL: %s", e)
-
-    # 2. Initialize Milvus
-    try:
-        exp_schema = get_experience_schema()
-        milvus_client.create_collection(COLLECTION_NAME, exp_schema)
-
-        tenant_schema = get_tenant_schema()
-        milvus_client.create_collection(TENANT_COLLECTION_NAME, tenant_schema)
-
-        img_schema = get_image_vector_schema()
-        milvus_client.create_collection(IMAGE_COLLECTION_NAME, img_schema)
-
-        clip_schema = get_clip_vector_schema()
-        milvus_client.create_collection(CLIP_COLLECTION_NAME, clip_schema)
-        logger.info("Milvus collections initialised")
-    except Exception as e:
-        logger.error("Failed to initialise Milvus: %s", e)
-
 app.include_router(pages_api.router)
 app.include_router(auth.router)
 app.include_router(chat_api.router)
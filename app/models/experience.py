@@ -1,6 +1,58 @@
+import base64
+import binascii
 from datetime import datetime
-from typing import List, Optional, Dict
-from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Dict
+
+import numpy as np
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, PlainSerializer, WithJsonSchema, model_validator
+from typing_extensions import Annotated, TypedDict
+
+from app.models.milvus_schema import EMBEDDING_DIM
+
+
+# Declared encoding of a base64 embedding; list input is always plain numbers.
+_EMBEDDING_DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2")}
+
+
+def _to_float32_vector(value, dtype: str = "float32") -> np.ndarray:
+    """Accept a number array or base64 of little-endian float32/float16 bytes.
+
+    The base64 form is decoded with one memcpy instead of parsing and boxing
+    one JSON float per dimension; its element type comes from `dtype` (the
+    request's embeddingDtype), never from the byte length.
+    """
+    if isinstance(value, (str, bytes)):
+        try:
+            raw = base64.b64decode(value, validate=True)
+        except binascii.Error as e:
+            raise ValueError(f"embedding is not valid base64: {e}")
+        item = _EMBEDDING_DTYPES[dtype]
+        if len(raw) != EMBEDDING_DIM * item.itemsize:
+            raise ValueError(
+                f"base64 {dtype} embedding must be {EMBEDDING_DIM * item.itemsize} bytes, got {len(raw)}"
+            )
+        return np.frombuffer(raw, dtype=item).astype(np.float32)
+    try:
+        vec = np.asarray(value, dtype=np.float32)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"embedding must be an array of numbers: {e}")
+    if vec.shape != (EMBEDDING_DIM,):
+        raise ValueError(f"embedding must have {EMBEDDING_DIM} dimensions, got shape {vec.shape}")
+    return vec
+
+
+# Packed float32 vector (4 bytes/dim instead of a boxed Python float).
+# Serialized as a plain list in JSON mode; input may also be base64 bytes
+# whose element type is given by Experience.embeddingDtype.
+Float32Vector = Annotated[
+    np.ndarray,
+    BeforeValidator(_to_float32_vector),
+    PlainSerializer(lambda v: v.tolist(), when_used="json"),
+    WithJsonSchema({"anyOf": [
+        {"type": "array", "items": {"type": "number"}, "minItems": EMBEDDING_DIM, "maxItems": EMBEDDING_DIM},
+        {"type": "string", "format": "byte", "description": "base64 little-endian floats, see embeddingDtype"},
+    ]}),
+]
 
 class Location(BaseModel):
     latitude: float
@@ -27,17 +79,19 @@ class GroupSizeRange(BaseModel):
 class GroupSize(BaseModel):
     default: GroupSizeRange
 
-class Media(BaseModel):
+# Plain data holders in lists are TypedDicts: validated in pydantic-core
+# without building a model instance per item.
+class Media(TypedDict):
     url: str
     type: str
 
-class CachedVideo(BaseModel):
+class CachedVideo(TypedDict):
     id: str
     url: str
     duration: float
     createdAt: datetime
 
-class Review(BaseModel):
+class Review(TypedDict):
     user: str
     comment: str
     rating: float
@@ -47,7 +101,7 @@ class ReviewAggregate(BaseModel):
     averageRating: float
     totalReviews: int
 
-class Availability(BaseModel):
+class Availability(TypedDict):
     startDate: datetime
     endDate: datetime
 
@@ -84,7 +138,9 @@ class Experience(BaseModel):
     viewCount: int = 0
     bookingCount: int = 0
     favoriteCount: int = 0
-    embedding: List[float]
+    embedding: Float32Vector
+    # Element type of a base64 embedding; input-only, not stored or returned
+    embeddingDtype: Literal["float32", "float16"] = Field("float32", exclude=True)
     embeddingMetadata: EmbeddingMetadata
     isActive: bool = True
     createdAt: datetime = Field(default_factory=datetime.utcnow)
@@ -93,7 +149,16 @@ class Experience(BaseModel):
     createdBy: str
     updatedBy: str
 
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
+    # datetimes serialize to ISO 8601 natively; the v1 json_encoders hook is gone
+    model_config = ConfigDict(extra="ignore", populate_by_name=True, arbitrary_types_allowed=True)
+
+    @model_validator(mode="before")
+    @classmethod
+    def _decode_embedding(cls, data):
+        # Field validators can't see siblings; decode base64 with the declared dtype here
+        if isinstance(data, dict) and isinstance(data.get("embedding"), (str, bytes)):
+            dtype = data.get("embeddingDtype", "float32")
+            if dtype not in _EMBEDDING_DTYPES:
+                raise ValueError(f"embeddingDtype must be one of {sorted(_EMBEDDING_DTYPES)}")
+            data = {**data, "embedding": _to_float32_vector(data["embedding"], dtype)}
+        return data
@@ -1,38 +1,40 @@
+import functools
+
 from pymilvus import FieldSchema, CollectionSchema, DataType
 
-EMBEDDING_DIM = 768  # Must match app/services/embedding.py (Gemini text-embedding-004)
+# Single source of truth for vector width; app/services/embedding.py requests
+# this many output dimensions from Gemini.
+EMBEDDING_DIM = 768
+
+# Half-precision storage halves vector RAM and HNSW memory traffic; the
+# client quantizes float32 embeddings on insert and search.
+VECTOR_DTYPE = DataType.FLOAT16_VECTOR
+
+# Schemas are static: each getter builds its CollectionSchema once and the
+# module-level constants below are the shared instances.
 
 
+@functools.cache
 def get_experience_schema():
     fields = [
         FieldSchema(name="id", dtype=DataType.VARCHAR, max_length=64, is_primary=True),
         FieldSchema(name="tenant_id", dtype=DataType.VARCHAR, max_length=64, is_partition_key=True),
-        FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=4),
+        FieldSchema(name="embedding", dtype=VECTOR_DTYPE, dim=EMBEDDING_DIM),
         FieldSchema(name="metadata", dtype=DataType.JSON),
         FieldSchema(name="slug", dtype=DataType.VARCHAR, max_length=256),
     ]
     return CollectionSchema(fields, description="Experience vector store with multi-tenancy support")
 
 
-def get_tenant_schema():
-    fields = [
-        FieldSchema(name="id", dtype=DataType.VARCHAR, max_length=64, is_primary=True),
-        FieldSchema(name="name", dtype=DataType.VARCHAR, max_length=256),
-        FieldSchema(name="apikey", dtype=DataType.VARCHAR, max_length=128),
-        FieldSchema(name="metadata", dtype=DataType.JSON),
-        FieldSchema(name="dummy_vector", dtype=DataType.FLOAT_VECTOR, dim=2),
-    ]
-    return CollectionSchema(fields, description="Tenants storage")
-
-
 # ---------------------------------------------------------------------------
 # NEW: Image Vectors - for semantic image matching
 # ---------------------------------------------------------------------------
+@functools.cache
 def get_image_vector_schema():
     fields = [
         FieldSchema(name="id", dtype=DataType.VARCHAR, max_length=64, is_primary=True),
         FieldSchema(name="tenant_id", dtype=DataType.VARCHAR, max_length=64, is_partition_key=True),
-        FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=EMBEDDING_DIM),
+        FieldSchema(name="embedding", dtype=VECTOR_DTYPE, dim=EMBEDDING_DIM),
         FieldSchema(name="metadata", dtype=DataType.JSON),  # {name, tags, location, image_url, pg_id}
     ]
     return CollectionSchema(fields, description="Image library vectors for semantic search")
@@ -41,11 +43,17 @@ def get_image_vector_schema():
 # ---------------------------------------------------------------------------
 # NEW: Clip Vectors - for semantic cinematic clip matching
 # ---------------------------------------------------------------------------
+@functools.cache
 def get_clip_vector_schema():
     fields = [
         FieldSchema(name="id", dtype=DataType.VARCHAR, max_length=64, is_primary=True),
         FieldSchema(name="tenant_id", dtype=DataType.VARCHAR, max_length=64, is_partition_key=True),
-        FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=EMBEDDING_DIM),
+        FieldSchema(name="embedding", dtype=VECTOR_DTYPE, dim=EMBEDDING_DIM),
         FieldSchema(name="metadata", dtype=DataType.JSON),  # {name, tags, video_url, duration, pg_id}
     ]
     return CollectionSchema(fields, description="Cinematic clip vectors for semantic search")
+
+
+EXPERIENCE_SCHEMA = get_experience_schema()
+IMAGE_VECTOR_SCHEMA = get_image_vector_schema()
+CLIP_VECTOR_SCHEMA = get_clip_vector_schema()
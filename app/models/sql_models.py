@@ -1,19 +1,52 @@
 from typing import Optional, List
+from sqlalchemy import Column, Index
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlmodel import SQLModel, Field, Relationship
 from datetime import datetime
+import os
+import time
 import uuid
 
+# Shared column default factories, bound once at import.
+# Timestamps stay naive UTC: the columns are TIMESTAMP WITHOUT TIME ZONE and
+# the API code compares against datetime.utcnow().
+_now = datetime.utcnow
+
+
+def _uuid7() -> uuid.UUID:
+    """RFC 9562 UUIDv7: 48-bit Unix ms timestamp, then random bits."""
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+
+_uuid7 = getattr(uuid, "uuid7", _uuid7)  # stdlib from Python 3.14
+
+
+def new_id() -> str:
+    """Primary-key factory for every table.
+
+    Time-ordered (UUIDv7) so new rows land at the right edge of the PK and
+    secondary B-tree indexes instead of splitting random pages.
+    """
+    return _uuid7().hex
+
 
 class Tenant(SQLModel, table=True):
     id: str = Field(primary_key=True)
     name: str
     api_key: str
     config: Optional[str] = None  # JSON string
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    email: Optional[str] = None
+    contact_person: Optional[str] = None
+    is_active: bool = True
+    created_at: datetime = Field(default_factory=_now)
+    updated_at: datetime = Field(default_factory=_now)
 
 
 class User(SQLModel, table=True):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    id: str = Field(default_factory=new_id, primary_key=True)
     tenant_id: str = Field(foreign_key="tenant.id", index=True)
     email: str = Field(unique=True, index=True)
     hashed_password: str
@@ -23,14 +56,20 @@ class User(SQLModel, table=True):
 
 
 class Scene(SQLModel, table=True):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
-    tenant_id: str = Field(foreign_key="tenant.id", index=True)
+    # Keyset pagination on (tenant_id, created_at, id); legacy ids are
+    # random uuid4, so id only breaks created_at ties.
+    __table_args__ = (
+        Index("ix_scene_tenant_created_id", "tenant_id", "created_at", "id"),
+    )
+
+    id: str = Field(default_factory=new_id, primary_key=True)
+    tenant_id: str = Field(foreign_key="tenant.id")
     name: str
     description: Optional[str] = None
     status: str = "pending"  # pending, processing, completed, failed
     media_url: Optional[str] = None
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_now)
+    updated_at: datetime = Field(default_factory=_now)
 
 
 # ---------------------------------------------------------------------------
@@ -38,7 +77,7 @@ class Scene(SQLModel, table=True):
 # ---------------------------------------------------------------------------
 class ImageLibrary(SQLModel, table=True):
     __tablename__ = "image_library"
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    id: str = Field(default_factory=new_id, primary_key=True)
     tenant_id: str = Field(foreign_key="tenant.id", index=True)
     name: str                               # e.g. "Galle Fort Sunset"
     tags: str                               # comma-separated: "galle,fort,sunset,heritage"
@@ -48,7 +87,7 @@ class ImageLibrary(SQLModel, table=True):
     type: Optional[str] = None             # e.g. "heritage", "beach", "nature", "adventure"
     reviews: Optional[str] = None          # e.g. "4.8/5 - Highly recommended for photographers"
     approximate: Optional[str] = None      # e.g. "Entry fee: $3, Best time: 5-7pm"
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_now)
 
 
 # ---------------------------------------------------------------------------
@@ -56,7 +95,7 @@ class ImageLibrary(SQLModel, table=True):
 # ---------------------------------------------------------------------------
 class CinematicClip(SQLModel, table=True):
     __tablename__ = "cinematic_clip"
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    id: str = Field(default_factory=new_id, primary_key=True)
     tenant_id: str = Field(foreign_key="tenant.id", index=True)
     name: str                               # e.g. "Galle Fort Drone Shot"
     tags: str                               # comma-separated: "galle,fort,drone,sunset"
@@ -68,22 +107,22 @@ class CinematicClip(SQLModel, table=True):
     reviews: Optional[str] = None          # e.g. "4.9/5 - Perfect for travel reels"
     approximate: Optional[str] = None      # e.g. "Duration: 30s, Resolution: 4K"
     source: Optional[str] = Field(default="uploaded")  # "uploaded" | "pexels" | "map_transition"
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_now)
 
 
 # ---------------------------------------------------------------------------
 # NEW: Itinerary - generated travel plans
 # ---------------------------------------------------------------------------
 class Itinerary(SQLModel, table=True):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    id: str = Field(default_factory=new_id, primary_key=True)
     tenant_id: str = Field(foreign_key="tenant.id", index=True)
     prompt: str                             # original user prompt / conversation summary
     destination: str
     days: int
     status: str = "generated"               # generated, video_compiled
-    rich_itinerary_json: Optional[str] = Field(default=None)  # Full AI-generated JSON
+    rich_itinerary_json: Optional[dict] = Field(default=None, sa_column=Column(JSONB))  # Full AI-generated JSON
     user_email: Optional[str] = Field(default=None)           # Traveler's email
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_now)
 
 
 # ---------------------------------------------------------------------------
@@ -91,9 +130,13 @@ class Itinerary(SQLModel, table=True):
 # ---------------------------------------------------------------------------
 class ItineraryActivity(SQLModel, table=True):
     __tablename__ = "itinerary_activity"
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    # Activities are always read per itinerary in order_index order
+    __table_args__ = (
+        Index("ix_itinerary_activity_itinerary_order", "itinerary_id", "order_index"),
+    )
+    id: str = Field(default_factory=new_id, primary_key=True)
     tenant_id: str = Field(foreign_key="tenant.id", index=True)
-    itinerary_id: str = Field(foreign_key="itinerary.id", index=True)
+    itinerary_id: str = Field(foreign_key="itinerary.id")
     day: int
     activity_name: str                      # e.g. "Visit Galle Fort"
     location: Optional[str] = None          # e.g. "Galle"
@@ -110,13 +153,13 @@ class ItineraryActivity(SQLModel, table=True):
 # ---------------------------------------------------------------------------
 class FinalVideo(SQLModel, table=True):
     __tablename__ = "final_video"
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    id: str = Field(default_factory=new_id, primary_key=True)
     tenant_id: str = Field(foreign_key="tenant.id", index=True)
     itinerary_id: str = Field(foreign_key="itinerary.id", index=True, unique=True)
     video_url: str                          # S3 URL of final compiled video
     duration: Optional[float] = None        # total seconds
     status: str = "compiled"                # compiled, failed
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_now)
 
 
 # ---------------------------------------------------------------------------
@@ -124,7 +167,7 @@ class FinalVideo(SQLModel, table=True):
 # ---------------------------------------------------------------------------
 class MapTransition(SQLModel, table=True):
     __tablename__ = "map_transition"
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    id: str = Field(default_factory=new_id, primary_key=True)
     tenant_id: str = Field(foreign_key="tenant.id", index=True)
     cache_key: str = Field(index=True)      # "{lat1:.4f}_{lon1:.4f}_{lat2:.4f}_{lon2:.4f}"
     from_location: str
@@ -132,7 +175,7 @@ class MapTransition(SQLModel, table=True):
     transport_type: Optional[str] = None    # "car" | "train" | "flight" | "bus" | "ferry"
     video_url: str                          # GCS URL of the generated map animation clip
     duration: float                         # seconds (typically 2.5)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_now)
 
 
 # ---------------------------------------------------------------------------
@@ -140,17 +183,25 @@ class MapTransition(SQLModel, table=True):
 # ---------------------------------------------------------------------------
 class ChatSession(SQLModel, table=True):
     __tablename__ = "chat_session"
+    # Session list: WHERE user_id = ? ORDER BY updated_at DESC
+    __table_args__ = (
+        Index("ix_chat_session_user_updated", "user_id", "updated_at"),
+    )
 
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    id: str = Field(default_factory=new_id, primary_key=True)
     tenant_id: str = Field(foreign_key="tenant.id", index=True)
-    user_id: str = Field(foreign_key="user.id", index=True)
+    user_id: str = Field(foreign_key="user.id")
     title: str = Field(default="New Chat")          # set to destination once known
     is_shared: bool = Field(default=False, index=True)
     is_deleted: bool = Field(default=False)          # soft-delete
-    requirements_json: Optional[str] = None          # JSON snapshot of user_requirements
+    requirements_json: Optional[dict] = Field(default=None, sa_column=Column(JSONB))  # snapshot of user_requirements
     itinerary_id: Optional[str] = Field(default=None, foreign_key="itinerary.id", index=True)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_now)
+    updated_at: datetime = Field(default_factory=_now)
+
+    messages: List["ChatMessage"] = Relationship(
+        sa_relationship_kwargs={"order_by": "ChatMessage.created_at"}
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -158,10 +209,14 @@ class ChatSession(SQLModel, table=True):
 # ---------------------------------------------------------------------------
 class ChatMessage(SQLModel, table=True):
     __tablename__ = "chat_message"
+    # History: WHERE session_id = ? ORDER BY created_at
+    __table_args__ = (
+        Index("ix_chat_message_session_created", "session_id", "created_at"),
+    )
 
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
-    session_id: str = Field(foreign_key="chat_session.id", index=True)
+    id: str = Field(default_factory=new_id, primary_key=True)
+    session_id: str = Field(foreign_key="chat_session.id")
     tenant_id: str = Field(foreign_key="tenant.id", index=True)  # denorm for isolation
     role: str                                        # "user" or "assistant"
     content: str
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=_now)
@@ -1,4 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
+from typing import List, Optional
 
 
 class AIProviderError(Exception):
@@ -10,6 +12,47 @@ class AIProvider(ABC):
     """Abstract base class for AI providers."""
 
     @abstractmethod
-    def generate_content(self, prompt: str) -> str:
-        """Generate content from a prompt and return the text response."""
+    def generate_content(
+        self,
+        prompt: str,
+        json_mode: bool = False,
+        response_schema: Optional[dict] = None,
+        system: Optional[str] = None,
+    ) -> str:
+        """Generate content from a prompt and return the text response.
+
+        When json_mode is True the provider must return a bare JSON document
+        (no markdown fences). response_schema is an OpenAPI-style schema that
+        providers with native structured output use to constrain the reply.
+        system is a static instruction block sent ahead of the prompt so the
+        provider can reuse its prefix cache across requests.
+        """
         pass
+
+    async def agenerate_content(
+        self,
+        prompt: str,
+        json_mode: bool = False,
+        response_schema: Optional[dict] = None,
+        system: Optional[str] = None,
+    ) -> str:
+        """Async generate_content. Providers with a native async client override
+        this; the default runs the sync call in a worker thread."""
+        return await asyncio.to_thread(
+            self.generate_content, prompt, json_mode, response_schema, system
+        )
+
+    async def generate_many(
+        self, prompts: List[str], max_concurrency: int = 5, **kwargs
+    ) -> List[str]:
+        """Run several prompts concurrently, at most max_concurrency in flight.
+
+        Results are aligned with prompts; the first failure propagates.
+        """
+        slots = asyncio.Semaphore(max_concurrency)
+
+        async def one(prompt: str) -> str:
+            async with slots:
+                return await self.agenerate_content(prompt, **kwargs)
+
+        return list(await asyncio.gather(*(one(p) for p in prompts)))
@@ -1,21 +1,55 @@
+import functools
+
 import anthropic
+from typing import Optional
 from .base import AIProvider, AIProviderError
 
+_JSON_SYSTEM_PROMPT = "Respond with a single valid JSON document only. No markdown, no code fences, no commentary."
+
+
+def _strip_code_fences(text: str) -> str:
+    """Remove a surrounding ```/```json fence if the model added one anyway."""
+    if text.startswith("```"):
+        text = text.split("```")[1]
+        if text.startswith("json"):
+            text = text[4:]
+        text = text.strip()
+    return text
+
+
+@functools.lru_cache(maxsize=4)
+def _get_client(api_key: str) -> anthropic.Anthropic:
+    """One client (and HTTP connection pool) per API key, shared process-wide."""
+    return anthropic.Anthropic(api_key=api_key)
+
 
 class ClaudeProvider(AIProvider):
     """Anthropic Claude API provider."""
 
     def __init__(self, api_key: str, model: str = "claude-sonnet-4-6"):
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.client = _get_client(api_key)
         self.model = model
 
-    def generate_content(self, prompt: str) -> str:
+    def generate_content(
+        self,
+        prompt: str,
+        json_mode: bool = False,
+        response_schema: Optional[dict] = None,
+        system: Optional[str] = None,
+    ) -> str:
+        kwargs = {}
+        if json_mode:
+            system = f"{system}\n\n{_JSON_SYSTEM_PROMPT}" if system else _JSON_SYSTEM_PROMPT
+        if system:
+            kwargs["system"] = system
         try:
             message = self.client.messages.create(
                 model=self.model,
                 max_tokens=8192,
-                messages=[{"role": "user", "content": prompt}]
+                messages=[{"role": "user", "content": prompt}],
+                **kwargs,
             )
-            return message.content[0].text.strip()
+            text = message.content[0].text.strip()
         except Exception as e:
             raise AIProviderError(f"Claude API error: {str(e)}")
+        return _strip_code_fences(text) if json_mode else text
@@ -1,3 +1,4 @@
+import functools
 import logging
 import os
 from typing import Optional
@@ -13,11 +14,19 @@ class ProviderFactory:
 
     @staticmethod
     def create(provider_name: Optional[str] = None) -> AIProvider:
+        """Return the shared provider for provider_name (default: AI_PROVIDER).
+
+        Env vars are resolved once per name and the provider instance is
+        reused; call ProviderFactory._create.cache_clear() after changing them.
+        """
         if provider_name is None:
             provider_name = os.getenv("AI_PROVIDER", "gemini")
+        # Normalize before the cache so None, "gemini" and "Gemini" share one instance
+        return ProviderFactory._create(provider_name.lower())
 
-        provider_name = provider_name.lower()
-
+    @staticmethod
+    @functools.lru_cache(maxsize=8)
+    def _create(provider_name: str) -> AIProvider:
         if provider_name == "gemini":
             api_key = os.getenv("GEMINI_API_KEY")
             model = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
@@ -1,33 +1,222 @@
+import asyncio
+import functools
+import importlib.util
+import os
+import random
+import threading
 import time
+from typing import Optional
+import httpx
 import google.genai as genai
+from google.genai import types as genai_types
 from .base import AIProvider, AIProviderError
 
-_RETRY_DELAYS = [5, 15]  # seconds between retries on 429
+# 429 retries: exponential backoff with full jitter so concurrent callers
+# don't retry in lockstep; a server Retry-After is used as a lower bound.
+_BASE_DELAY, _MAX_DELAY, _MAX_ATTEMPTS = 1.0, 30.0, 5
+_CACHE_TTL_S = 3600  # lifetime of explicit context caches for system prompts
+_CACHE_RETRY_S = 300  # wait before retrying a prompt Gemini refused to cache
+# Explicit caches must hold at least this many tokens (1024 on 2.5 Flash;
+# raise it for models with a higher floor). Shorter prompts are never sent
+# to caches.create and rely on Gemini's implicit prefix caching instead,
+# which the static-system-prompt-first layout already benefits from.
+_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CACHE_MIN_TOKENS", "1024"))
+_CHARS_PER_TOKEN = 4  # conservative English estimate; avoids a count_tokens RPC
+
+
+def _build_config(
+    json_mode: bool,
+    response_schema: Optional[dict],
+    system: Optional[str],
+    cached_content: Optional[str] = None,
+) -> Optional[genai_types.GenerateContentConfig]:
+    if not (json_mode or system or cached_content):
+        return None
+    return genai_types.GenerateContentConfig(
+        system_instruction=system,
+        cached_content=cached_content,
+        response_mime_type="application/json" if json_mode else None,
+        response_schema=response_schema if json_mode else None,
+    )
+
+
+def _is_rate_limited(e: Exception) -> bool:
+    err_str = str(e)
+    return "429" in err_str or "RESOURCE_EXHAUSTED" in err_str
+
+
+def _is_cache_too_small(e: Exception) -> bool:
+    """True when caches.create refused the content for being under the minimum."""
+    err_str = str(e)
+    return "too small" in err_str.lower() or "min_total_token_count" in err_str
+
+
+def _is_cache_missing(e: Exception, config: Optional[genai_types.GenerateContentConfig]) -> bool:
+    """True when a call that referenced a context cache failed because it is gone."""
+    if config is None or not config.cached_content:
+        return False
+    err_str = str(e)
+    return "404" in err_str or "NOT_FOUND" in err_str
+
+
+def _retry_delay(retry: int, e: Exception) -> float:
+    """Seconds to wait before retry number `retry` (0-based) after error e."""
+    delay = random.uniform(0, min(_MAX_DELAY, _BASE_DELAY * 2 ** retry))
+    headers = getattr(getattr(e, "response", None), "headers", None) or {}
+    try:
+        retry_after = float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return delay
+    return max(delay, min(retry_after, _MAX_DELAY))
+
+
+# Keep-alive pool for the SDK's httpx clients, sized for concurrent itinerary,
+# chat and embedding calls sharing one client. HTTP/2 needs the optional h2
+# package (pip install "httpx[http2]").
+_HTTP_LIMITS = {
+    "max_keepalive_connections": int(os.getenv("GEMINI_HTTP_KEEPALIVE", "50")),
+    "max_connections": int(os.getenv("GEMINI_HTTP_MAX_CONNECTIONS", "100")),
+}
+
+
+def _http_options() -> genai_types.HttpOptions:
+    client_args = {"limits": httpx.Limits(**_HTTP_LIMITS)}
+    if importlib.util.find_spec("h2") is not None:
+        client_args["http2"] = True
+    return genai_types.HttpOptions(client_args=client_args, async_client_args=dict(client_args))
+
+
+@functools.lru_cache(maxsize=4)
+def get_genai_client(api_key: str) -> genai.Client:
+    """One client (and HTTP connection pool) per API key, shared process-wide
+    by the providers and the embedding service."""
+    return genai.Client(api_key=api_key, http_options=_http_options())
 
 
 class GeminiProvider(AIProvider):
     """Google Gemini API provider."""
 
     def __init__(self, api_key: str, model: str = "gemini-2.5-flash"):
-        self.client = genai.Client(api_key=api_key)
+        self.client = get_genai_client(api_key)
         self.model = model
+        # system prompt -> (cache name or None, refresh-after monotonic time)
+        self._system_caches: dict = {}
+        # system prompt -> lock held while its cache is created; _cache_lock
+        # only guards the two dicts, never a network call
+        self._system_locks: dict = {}
+        self._cache_lock = threading.Lock()
+
+    def _cached_system(self, system: str) -> Optional[str]:
+        """Name of an explicit context cache holding `system`.
 
-    def generate_content(self, prompt: str) -> str:
+        Created once per prompt and refreshed shortly before the TTL runs out.
+        None, permanently, for prompts below the model's minimum cacheable
+        size (estimated locally, or reported by Gemini); the prompt is then
+        sent inline. Other creation failures are retried after _CACHE_RETRY_S.
+        """
+        entry = self._system_caches.get(system)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        with self._cache_lock:
+            key_lock = self._system_locks.setdefault(system, threading.Lock())
+        with key_lock:
+            # Another thread may have created it while we waited
+            now = time.monotonic()
+            entry = self._system_caches.get(system)
+            if entry and entry[1] > now:
+                return entry[0]
+            if len(system) < _CACHE_MIN_TOKENS * _CHARS_PER_TOKEN:
+                entry = (None, float("inf"))
+                with self._cache_lock:
+                    self._system_caches[system] = entry
+                return None
+            try:
+                cache = self.client.caches.create(
+                    model=self.model,
+                    config=genai_types.CreateCachedContentConfig(
+                        system_instruction=system, ttl=f"{_CACHE_TTL_S}s",
+                    ),
+                )
+                entry = (cache.name, now + _CACHE_TTL_S - 60)
+            except Exception as e:
+                print(f"Gemini context cache unavailable, sending system prompt inline: {e}")
+                entry = (None, float("inf") if _is_cache_too_small(e) else now + _CACHE_RETRY_S)
+            with self._cache_lock:
+                self._system_caches[system] = entry
+            return entry[0]
+
+    def _drop_cached_system(self, system: str) -> None:
+        """Forget a cache the server no longer has; the next call recreates it."""
+        with self._cache_lock:
+            self._system_caches.pop(system, None)
+
+    def _config(
+        self, json_mode: bool, response_schema: Optional[dict], system: Optional[str]
+    ) -> Optional[genai_types.GenerateContentConfig]:
+        cached = self._cached_system(system) if system else None
+        return _build_config(json_mode, response_schema, None if cached else system, cached)
+
+    def generate_content(
+        self,
+        prompt: str,
+        json_mode: bool = False,
+        response_schema: Optional[dict] = None,
+        system: Optional[str] = None,
+    ) -> str:
+        config = self._config(json_mode, response_schema, system)
         last_error = None
-        for attempt, delay in enumerate([0] + _RETRY_DELAYS):
-            if delay:
-                print(f"Gemini 429 rate limit — retrying in {delay}s (attempt {attempt + 1})")
+        for attempt in range(_MAX_ATTEMPTS):
+            if last_error is not None:
+                delay = _retry_delay(attempt - 1, last_error)
+                print(f"Gemini 429 rate limit — retrying in {delay:.1f}s (attempt {attempt + 1})")
                 time.sleep(delay)
             try:
                 response = self.client.models.generate_content(
                     model=self.model,
-                    contents=prompt
+                    contents=prompt,
+                    config=config,
                 )
                 return response.text.strip()
             except Exception as e:
+                if _is_cache_missing(e, config):
+                    # Cache expired or was evicted server-side; resend the prompt inline
+                    self._drop_cached_system(system)
+                    config = _build_config(json_mode, response_schema, system)
+                    continue
                 last_error = e
-                err_str = str(e)
-                if "429" not in err_str and "RESOURCE_EXHAUSTED" not in err_str:
+                if not _is_rate_limited(e):
                     # Not a rate-limit error — no point retrying
                     break
         raise AIProviderError(f"Error communicating with Gemini API: {str(last_error)}")
+
+    async def agenerate_content(
+        self,
+        prompt: str,
+        json_mode: bool = False,
+        response_schema: Optional[dict] = None,
+        system: Optional[str] = None,
+    ) -> str:
+        """Same as generate_content, on the SDK's native async client."""
+        config = await asyncio.to_thread(self._config, json_mode, response_schema, system)
+        last_error = None
+        for attempt in range(_MAX_ATTEMPTS):
+            if last_error is not None:
+                delay = _retry_delay(attempt - 1, last_error)
+                print(f"Gemini 429 rate limit — retrying in {delay:.1f}s (attempt {attempt + 1})")
+                await asyncio.sleep(delay)
+            try:
+                response = await self.client.aio.models.generate_content(
+                    model=self.model,
+                    contents=prompt,
+                    config=config,
+                )
+                return response.text.strip()
+            except Exception as e:
+                if _is_cache_missing(e, config):
+                    self._drop_cached_system(system)
+                    config = _build_config(json_mode, response_schema, system)
+                    continue
+                last_error = e
+                if not _is_rate_limited(e):
+                    break
+        raise AIProviderError(f"Error communicating with Gemini API: {str(last_error)}")
@@ -3,21 +3,24 @@ AI-powered itinerary generator.
 Uses an LLM provider (Gemini/Claude) to generate a rich, structured
 travel itinerary JSON from a conversation summary.
 """
+import asyncio
 import json
-from typing import Optional
+import re
+from typing import List, Optional
+
+import orjson
 from app.providers.base import AIProvider, AIProviderError
+from app.services.llm_cache import cache_key, itinerary_cache
 
 
-def _build_itinerary_prompt(conversation_summary: str) -> str:
-    return f"""Generate a complete, detailed travel itinerary in JSON format.
+# Static instructions and schema, sent as the system prompt ahead of the
+# per-request summary so providers can cache the prefix.
+ITINERARY_SYSTEM_PROMPT = """Generate a complete, detailed travel itinerary in JSON format.
 
 IMPORTANT: The response MUST be valid, complete JSON with NO markdown formatting and NO truncation.
 
-Conversation Summary (extract all travel details from this):
-{conversation_summary}
-
 Required JSON format:
-{{
+{
   "destination": "string",
   "start_date": "YYYY-MM-DD",
   "end_date": "YYYY-MM-DD",
@@ -29,29 +32,29 @@ Required JSON format:
   "accommodations": "string describing accommodation preferences",
   "special_requirements": "string or null",
   "days": [
-    {{
+    {
       "day": 1,
       "date": "YYYY-MM-DD",
       "activities": [
-        {{
+        {
           "id": "act_1_1",
           "title": "Activity name",
           "description": "Detailed description of the activity",
           "location": "Specific location name",
-          "coordinates": {{"latitude": 0.0, "longitude": 0.0}},
+          "coordinates": {"latitude": 0.0, "longitude": 0.0},
           "cost": 0,
           "currency": "USD",
           "duration_hours": 2.0,
           "category": "cultural|adventure|nature|food|relaxation|heritage",
           "keywords": "comma,separated,keywords,for,semantic,search"
-        }}
+        }
       ],
       "stays": [
-        {{
+        {
           "id": "stay_1",
           "name": "Hotel name",
           "location": "Location",
-          "coordinates": {{"latitude": 0.0, "longitude": 0.0}},
+          "coordinates": {"latitude": 0.0, "longitude": 0.0},
           "check_in_date": "YYYY-MM-DD",
           "check_out_date": "YYYY-MM-DD",
           "cost_per_night": 0,
@@ -59,26 +62,26 @@ Required JSON format:
           "total_cost": 0,
           "category": "hotel|hostel|resort|airbnb",
           "amenities": ["wifi", "breakfast", "pool"]
-        }}
+        }
       ],
       "rides": [
-        {{
+        {
           "id": "ride_1",
           "from_location": "Origin",
           "to_location": "Destination",
-          "from_coordinates": {{"latitude": 0.0, "longitude": 0.0}},
-          "to_coordinates": {{"latitude": 0.0, "longitude": 0.0}},
+          "from_coordinates": {"latitude": 0.0, "longitude": 0.0},
+          "to_coordinates": {"latitude": 0.0, "longitude": 0.0},
           "transportation_type": "flight|train|car|bus|tuk-tuk|ferry",
           "cost": 0,
           "currency": "USD",
           "duration_hours": 1.0,
           "departure_time": "HH:MM",
           "arrival_time": "HH:MM"
-        }}
+        }
       ]
-    }}
+    }
   ]
-}}
+}
 
 Instructions:
 1. Return ONLY raw JSON, no markdown code blocks, no ```json``` wrappers
@@ -95,50 +98,99 @@ Instructions:
 10. Ensure the itinerary respects any special requirements mentioned"""
 
 
+def _build_itinerary_prompt(conversation_summary: str) -> str:
+    return f"""Conversation Summary (extract all travel details from this):
+{conversation_summary}"""
+
+
+# Body of a ```/```json fence; a missing closing fence (truncated reply)
+# runs to the end of the text.
+_FENCE_RE = re.compile(r"```(?:json)?(.*?)(?:```|\Z)", re.DOTALL)
+
+
 def _extract_json_from_response(response_text: str) -> Optional[dict]:
     """Extract and parse JSON from an AI response, handling markdown wrappers."""
-    text = response_text
-
-    if "```json" in text:
-        json_start = text.find("```json") + 7
-        json_end = text.find("```", json_start)
-        text = text[json_start:json_end].strip()
-    elif "```" in text:
-        json_start = text.find("```") + 3
-        json_end = text.find("```", json_start)
-        text = text[json_start:json_end].strip()
+    fence = _FENCE_RE.search(response_text)
+    text = fence.group(1).strip() if fence else response_text
 
     if not text.rstrip().endswith("}"):
         print("Warning: JSON response appears to be incomplete/truncated. Attempting to fix...")
         text = _fix_truncated_json(text)
 
-    return json.loads(text)
+    return orjson.loads(text)
 
 
 def _fix_truncated_json(truncated: str) -> str:
-    """Attempt to fix truncated JSON by closing unclosed structures."""
-    open_braces = truncated.count('{') - truncated.count('}')
-    open_brackets = truncated.count('[') - truncated.count(']')
+    """Attempt to fix truncated JSON by closing unclosed structures.
 
-    fixed = truncated.rstrip()
-
-    if fixed.endswith(','):
-        fixed = fixed[:-1]
-
-    for _ in range(open_brackets):
-        fixed += ']'
+    One pass tracks string/escape state, open containers and whether an
+    object is waiting for a key, and remembers the last point where the text
+    ends on a complete value (or an opening bracket). A partial string value
+    is closed; anything else cut off mid-way (a key, a value after a colon,
+    a literal such as `tru` or `1.`) is trimmed back to that point, together
+    with its comma, before the closers are appended in nesting order. The
+    caller's orjson.loads is the only parse.
+    """
+    stack = []             # open containers, "{" or "["
+    expect_key = False     # inside an object, before a key
+    in_string = string_is_key = escaped = False
+    escape_start = hex_left = 0
+    literal_start = None   # start of a number/true/false/null being read
+    safe, safe_stack = 0, ()
 
-    for _ in range(open_braces):
-        fixed += '}'
+    for i, ch in enumerate(truncated):
+        if in_string:
+            if hex_left:
+                hex_left -= 1
+            elif escaped:
+                escaped = False
+                if ch == "u":
+                    hex_left = 4
+            elif ch == "\\":
+                escaped, escape_start = True, i
+            elif ch == '"':
+                in_string = False
+                if not string_is_key:
+                    safe, safe_stack = i + 1, tuple(stack)
+            continue
+        if literal_start is not None and (ch in ",:]}" or ch.isspace()):
+            literal_start = None
+            safe, safe_stack = i, tuple(stack)
+        if ch == '"':
+            in_string = True
+            string_is_key = expect_key
+            expect_key = False
+        elif ch in "{[":
+            stack.append(ch)
+            expect_key = ch == "{"
+            safe, safe_stack = i + 1, tuple(stack)
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            expect_key = False
+            safe, safe_stack = i + 1, tuple(stack)
+        elif ch == ",":
+            expect_key = bool(stack) and stack[-1] == "{"
+        elif ch == ":" or ch.isspace():
+            pass
+        elif literal_start is None:
+            literal_start = i
 
-    print(f"Attempted to fix JSON: closed {open_brackets} arrays and {open_braces} objects")
+    if in_string and not string_is_key:
+        # Keep a partial string value; drop an escape sequence cut in half
+        cut = escape_start if (escaped or hex_left) else len(truncated)
+        fixed, open_stack = truncated[:cut] + '"', stack
+    else:
+        if literal_start is not None:
+            try:
+                orjson.loads(truncated[literal_start:])
+                safe, safe_stack = len(truncated), tuple(stack)
+            except orjson.JSONDecodeError:
+                pass
+        fixed, open_stack = truncated[:safe], safe_stack
 
-    try:
-        json.loads(fixed)
-        return fixed
-    except json.JSONDecodeError as e:
-        print(f"JSON fix failed validation: {str(e)}")
-        return truncated
+    print(f"Attempted to fix JSON: closed {len(open_stack)} open arrays/objects")
+    return fixed + "".join("}" if c == "{" else "]" for c in reversed(open_stack))
 
 
 class AIItineraryGenerator:
@@ -157,11 +209,61 @@ class AIItineraryGenerator:
         """
         Generate a structured itinerary from the conversation summary.
         Returns a dict following the rich itinerary JSON schema.
+
+        Results are cached per (provider, model, prompt); concurrent identical
+        requests share one LLM call. Each caller gets its own copy.
         """
+        return itinerary_cache.get_or_compute(
+            self._cache_key(conversation_summary),
+            lambda: self._generate_uncached(conversation_summary),
+            semantic_text=conversation_summary,
+        )
+
+    def _cache_key(self, conversation_summary: str) -> str:
+        return cache_key(
+            provider=type(self.provider).__name__,
+            model=getattr(self.provider, "model", None),
+            system=ITINERARY_SYSTEM_PROMPT,
+            prompt=conversation_summary,
+        )
+
+    def _generate_uncached(self, conversation_summary: str) -> Optional[dict]:
         prompt = _build_itinerary_prompt(conversation_summary)
 
         try:
-            response_text = self.provider.generate_content(prompt)
+            response_text = self.provider.generate_content(
+                prompt, system=ITINERARY_SYSTEM_PROMPT
+            )
+            return _extract_json_from_response(response_text)
+        except json.JSONDecodeError as e:  # orjson.JSONDecodeError subclasses it
+            print(f"Error parsing JSON response: {str(e)}")
+            if 'response_text' in locals():
+                print(f"Last 200 chars of response: {response_text[-200:]}")
+            return None
+        except AIProviderError as e:
+            print(f"AI provider error generating itinerary: {str(e)}")
+            return None
+        except Exception as e:
+            print(f"Unexpected error generating itinerary: {str(e)}")
+            return None
+
+    async def agenerate_itinerary(self, conversation_summary: str) -> Optional[dict]:
+        """
+        Async generate_itinerary. Concurrent calls with the same prompt await
+        one in-flight LLM call, and results share the itinerary cache.
+        """
+        return await itinerary_cache.aget_or_compute(
+            self._cache_key(conversation_summary),
+            lambda: self._agenerate_uncached(conversation_summary),
+            semantic_text=conversation_summary,
+        )
+
+    async def _agenerate_uncached(self, conversation_summary: str) -> Optional[dict]:
+        # Same fallbacks as _generate_uncached: any failure yields None
+        try:
+            response_text = await self.provider.agenerate_content(
+                _build_itinerary_prompt(conversation_summary), system=ITINERARY_SYSTEM_PROMPT
+            )
             return _extract_json_from_response(response_text)
         except json.JSONDecodeError as e:
             print(f"Error parsing JSON response: {str(e)}")
@@ -175,6 +277,23 @@ class AIItineraryGenerator:
             print(f"Unexpected error generating itinerary: {str(e)}")
             return None
 
+    async def generate_itineraries_batch(
+        self, conversation_summaries: List[str], max_concurrency: int = 5
+    ) -> List[Optional[dict]]:
+        """
+        Generate several itineraries concurrently (network-bound, so N prompts
+        take roughly as long as the slowest one). Results are aligned with the
+        input; a failed or unparseable entry is None. Duplicate summaries
+        share one LLM call.
+        """
+        slots = asyncio.Semaphore(max_concurrency)
+
+        async def one(summary: str) -> Optional[dict]:
+            async with slots:
+                return await self.agenerate_itinerary(summary)
+
+        return list(await asyncio.gather(*(one(s) for s in conversation_summaries)))
+
     def extract_activities_for_matching(self, rich_itinerary: dict) -> list:
         """
         Flatten the rich itinerary into a list of activities ready for Milvus matching.
@@ -195,23 +314,20 @@ class AIItineraryGenerator:
         for day_idx, day_data in enumerate(rich_itinerary.get("days", [])):
             day_num = day_data.get("day", day_idx + 1)
             for act_idx, act in enumerate(day_data.get("activities", [])):
-                keywords = act.get("keywords", "")
-                if not keywords:
-                    # Build keywords from available fields
-                    parts = [
-                        act.get("title", ""),
-                        act.get("location", ""),
-                        act.get("category", ""),
-                        act.get("description", "")[:50],
-                    ]
-                    keywords = ",".join(p for p in parts if p)
+                title = act.get("title", "")
+                location = act.get("location", "")
+                description = act.get("description", "")
+                # Fall back to keywords built from the available fields
+                keywords = act.get("keywords") or ",".join(
+                    p for p in (title, location, act.get("category", ""), description[:50]) if p
+                )
 
                 flat.append({
                     "day": day_num,
                     "activity_name": act.get("title", "Activity"),
-                    "location": act.get("location", ""),
+                    "location": location,
                     "keywords": keywords,
-                    "description": act.get("description", ""),
+                    "description": description,
                     "_day_idx": day_idx,
                     "_act_idx": act_idx,
                     "_act_id": act.get("id", ""),
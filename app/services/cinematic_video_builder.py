@@ -19,7 +19,7 @@ Usage (called from app/api/itinerary.py):
     result = cinematic_builder.build(
         itinerary_id=itinerary.id,
         tenant_id=tenant_id,
-        rich_itinerary=json.loads(itinerary.rich_itinerary_json),
+        rich_itinerary=itinerary.rich_itinerary_json,
         activities=db_activities,   # list[ItineraryActivity]
         session=session,
     )
@@ -39,13 +39,12 @@ from urllib.parse import urlparse
 from urllib.request import urlopen
 
 import certifi
-from google.cloud import storage as gcs_storage
 from sqlmodel import Session, select
 
 from app.models.sql_models import CinematicClip, FinalVideo, ItineraryActivity, MapTransition
 from app.services.map_clip_generator import map_clip_generator
 from app.services.royalty_free_downloader import royalty_free_downloader
-from app.services.storage import storage_service
+from app.services.storage import FINAL_VIDEO_CHUNK_SIZE, storage_service
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +55,9 @@ _ENABLE_PEXELS = os.getenv("ENABLE_PEXELS_FALLBACK", "true").lower() == "true"
 _OUTPUT_WIDTH = 720
 _OUTPUT_HEIGHT = 1280
 
+# Shared across downloads: building a context reloads the CA bundle.
+_SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+
 
 @dataclass
 class ClipSegment:
@@ -140,7 +142,7 @@ class CinematicVideoBuilder:
         total_duration = self._trim_and_assemble(clip_plan, output_path)
 
         gcs_key = f"tenants/{tenant_id}/final-video/{itinerary_id}_cinematic.mp4"
-        final_url = storage_service.upload_file(output_path, gcs_key)
+        final_url = storage_service.upload_file(output_path, gcs_key, chunk_size=FINAL_VIDEO_CHUNK_SIZE)
         if os.path.exists(output_path):
             os.remove(output_path)
 
@@ -489,12 +491,10 @@ class CinematicVideoBuilder:
             parts = parsed.path.lstrip("/").split("/", 1)
             bucket_name = parts[0]
             key = parts[1] if len(parts) > 1 else ""
-            client = gcs_storage.Client()
-            blob = client.bucket(bucket_name).blob(key)
+            blob = storage_service.client.bucket(bucket_name).blob(key)
             blob.download_to_filename(local_path)
         else:
-            ssl_ctx = ssl.create_default_context(cafile=certifi.where())
-            with urlopen(url, context=ssl_ctx) as src, open(local_path, "wb") as dst:
+            with urlopen(url, context=_SSL_CONTEXT) as src, open(local_path, "wb") as dst:
                 shutil.copyfileobj(src, dst)
 
         return local_path
@@ -538,26 +538,21 @@ class CinematicVideoBuilder:
     @staticmethod
     def _ffmpeg_concat(input_paths: List[str], output_path: str) -> None:
         """Concatenate already-normalised clips using the concat demuxer."""
-        list_file = f"/tmp/concat_{os.getpid()}_{uuid.uuid4().hex[:6]}.txt"
-        try:
-            with open(list_file, "w") as f:
-                for p in input_paths:
-                    safe = p.replace("'", "'\\''")
-                    f.write(f"file '{safe}'\n")
-
-            cmd = [
-                "ffmpeg",
-                "-f", "concat",
-                "-safe", "0",
-                "-i", list_file,
-                "-c", "copy",
-                "-y",
-                output_path,
-            ]
-            subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        finally:
-            if os.path.exists(list_file):
-                os.remove(list_file)
+        # The listing is built in one pass and piped to ffmpeg on stdin.
+        listing = "".join(
+            "file '{}'\n".format(p.replace("'", "'\\''")) for p in input_paths
+        ).encode()
+        cmd = [
+            "ffmpeg",
+            "-f", "concat",
+            "-safe", "0",
+            "-protocol_whitelist", "file,pipe",
+            "-i", "pipe:0",
+            "-c", "copy",
+            "-y",
+            output_path,
+        ]
+        subprocess.run(cmd, input=listing, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
 
     @staticmethod
     def _ride_has_valid_coords(ride: dict) -> bool:
@@ -11,17 +11,21 @@ Uses the same google.genai SDK as the rest of the app (google-genai >= 1.0).
 import os
 from typing import List
 
+import numpy as np
 import google.genai as genai
 from google.genai import types as genai_types
 
-# Dimension of our embeddings (must match Milvus schema)
-EMBEDDING_DIM = 768
+from app.models.milvus_schema import EMBEDDING_DIM
+from app.providers.gemini import get_genai_client
 
 _EMBED_MODEL = "models/gemini-embedding-001"
 
+# Texts per embed_content request (Gemini batch embedding limit)
+EMBED_BATCH_SIZE = 100
+
 
 def _get_client() -> genai.Client:
-    return genai.Client(api_key=os.environ["GEMINI_API_KEY"])
+    return get_genai_client(os.environ["GEMINI_API_KEY"])
 
 
 def generate_embedding(text: str) -> List[float]:
@@ -62,3 +66,36 @@ def generate_query_embedding(text: str) -> List[float]:
         ),
     )
     return response.embeddings[0].values
+
+
+def _embed_many(texts: List[str], task_type: str) -> np.ndarray:
+    """Embed texts with one API request per EMBED_BATCH_SIZE chunk.
+
+    Returns an (N, EMBEDDING_DIM) float32 matrix, row i for texts[i].
+    """
+    out = np.empty((len(texts), EMBEDDING_DIM), dtype=np.float32)
+    if not texts:
+        return out
+    client = _get_client()
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        chunk = texts[start:start + EMBED_BATCH_SIZE]
+        response = client.models.embed_content(
+            model=_EMBED_MODEL,
+            contents=chunk,
+            config=genai_types.EmbedContentConfig(
+                taskType=task_type,
+                outputDimensionality=EMBEDDING_DIM,
+            ),
+        )
+        out[start:start + len(chunk)] = [e.values for e in response.embeddings]
+    return out
+
+
+def generate_embeddings(texts: List[str]) -> np.ndarray:
+    """Batch form of generate_embedding (RETRIEVAL_DOCUMENT)."""
+    return _embed_many(texts, "RETRIEVAL_DOCUMENT")
+
+
+def generate_query_embeddings(texts: List[str]) -> np.ndarray:
+    """Batch form of generate_query_embedding (RETRIEVAL_QUERY)."""
+    return _embed_many(texts, "RETRIEVAL_QUERY")
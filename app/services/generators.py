@@ -1,5 +1,5 @@
-import random
 from abc import ABC, abstractmethod
+from collections import deque
 
 
 class LLMPromptEngine:
@@ -89,20 +89,20 @@ class ItineraryGenerator:
         dest_lower = destination.lower()
 
         # Collect all matching activities from known destinations
-        all_activities = []
+        all_activities = deque()
         for key, activities in self.DESTINATION_DATA.items():
             if key in prompt_lower or key in dest_lower:
                 all_activities.extend(activities)
 
         # If nothing matched, use generic activities
         if not all_activities:
-            all_activities = self.GENERIC_ACTIVITIES * 3  # repeat for enough days
+            all_activities.extend(self.GENERIC_ACTIVITIES * 3)  # repeat for enough days
 
         # Assign activities to days
         result = []
         for day_num in range(1, days + 1):
             if all_activities:
-                activity = all_activities.pop(0)
+                activity = all_activities.popleft()
             else:
                 # Cycle back if we run out
                 idx = (day_num - 1) % len(self.GENERIC_ACTIVITIES)
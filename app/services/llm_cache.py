@@ -0,0 +1,197 @@
+"""
+LLM result cache for expensive structured generations (itineraries).
+
+Two tiers, both per-process. Each uvicorn worker keeps its own cache, so
+hits and single-flighting only cover requests served by the same worker:
+
+  1. Exact — sha256 of the canonical request (model, system prompt, prompt).
+  2. Semantic (opt-in) — cosine similarity between the embedding of the
+     request text and those of cached requests. Disabled unless a threshold
+     is configured, because near-identical summaries can still differ in
+     dates or trip length.
+
+Concurrent identical requests are single-flighted: one caller computes, the
+rest wait for its result (threads via get_or_compute, coroutines via
+aget_or_compute). Values are stored as orjson bytes and decoded per
+hit, so callers can mutate what they get back.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+import orjson
+
+logger = logging.getLogger("manike.llm_cache")
+
+
+def cache_key(**parts) -> str:
+    return hashlib.sha256(orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+class LLMCache:
+    """Thread-safe exact + semantic cache with single-flight computation."""
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 3600,
+        semantic_threshold: Optional[float] = None,
+        embed_fn: Optional[Callable[[str], list]] = None,
+    ):
+        self._data: OrderedDict = OrderedDict()  # key -> (expires_at, bytes)
+        self._vectors: OrderedDict = OrderedDict()  # key -> unit float32 vector
+        self._inflight: dict = {}
+        self._ainflight: dict = {}  # key -> asyncio.Task, event-loop thread only
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._threshold = semantic_threshold
+        self._embed_fn = embed_fn
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self._vectors.pop(key, None)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: bytes, vector: Optional[np.ndarray]) -> None:
+        self._data[key] = (time.monotonic() + self._ttl, value)
+        self._data.move_to_end(key)
+        if vector is not None:
+            self._vectors[key] = vector
+        while len(self._data) > self._maxsize:
+            evicted, _ = self._data.popitem(last=False)
+            self._vectors.pop(evicted, None)
+
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        try:
+            vector = np.asarray(self._embed_fn(text), dtype=np.float32)
+        except Exception as e:
+            logger.warning("Semantic cache embedding failed: %s", e)
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _semantic_lookup(self, vector: np.ndarray) -> Optional[bytes]:
+        with self._lock:
+            keys = list(self._vectors)
+            if not keys:
+                return None
+            scores = np.stack([self._vectors[k] for k in keys]) @ vector
+            best = int(np.argmax(scores))
+            if scores[best] < self._threshold:
+                return None
+            return self._get(keys[best])
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Optional[dict]],
+        semantic_text: Optional[str] = None,
+    ) -> Optional[dict]:
+        """Return the cached value for key, or compute, cache and return it.
+
+        None results are not cached. semantic_text enables the similarity
+        tier for this lookup when a threshold is configured.
+        """
+        with self._lock:
+            value = self._get(key)
+            if value is not None:
+                return orjson.loads(value)
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+
+        if not leader:
+            value = future.result()
+            return orjson.loads(value) if value is not None else None
+
+        value = None
+        try:
+            vector = None
+            if self._threshold is not None and self._embed_fn and semantic_text:
+                vector = self._embed(semantic_text)
+                if vector is not None:
+                    value = self._semantic_lookup(vector)
+            if value is None:
+                result = compute()
+                if result is not None:
+                    value = orjson.dumps(result)
+                    with self._lock:
+                        self._set(key, value, vector)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            future.set_result(value)
+        return orjson.loads(value) if value is not None else None
+
+    async def aget_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Optional[dict]]],
+        semantic_text: Optional[str] = None,
+    ) -> Optional[dict]:
+        """Async get_or_compute.
+
+        The first coroutine for a key starts the lookup/compute as a task;
+        concurrent callers await the same task, shielded so one caller's
+        cancellation does not cancel the others.
+        """
+        with self._lock:
+            value = self._get(key)
+        if value is None:
+            task = self._ainflight.get(key)
+            if task is None:
+                task = asyncio.ensure_future(self._acompute(key, compute, semantic_text))
+                self._ainflight[key] = task
+                task.add_done_callback(lambda _: self._ainflight.pop(key, None))
+            value = await asyncio.shield(task)
+        return orjson.loads(value) if value is not None else None
+
+    async def _acompute(self, key: str, compute, semantic_text: Optional[str]) -> Optional[bytes]:
+        vector = None
+        if self._threshold is not None and self._embed_fn and semantic_text:
+            vector = await asyncio.to_thread(self._embed, semantic_text)
+            if vector is not None:
+                value = self._semantic_lookup(vector)
+                if value is not None:
+                    return value
+        result = await compute()
+        if result is None:
+            return None
+        value = orjson.dumps(result)
+        with self._lock:
+            self._set(key, value, vector)
+        return value
+
+
+def _semantic_threshold() -> Optional[float]:
+    raw = os.getenv("ITINERARY_SEMANTIC_CACHE_THRESHOLD")
+    return float(raw) if raw else None
+
+
+def _embed_query(text: str) -> list:
+    from app.services.embedding import generate_query_embedding
+    return generate_query_embedding(text)
+
+
+itinerary_cache = LLMCache(
+    maxsize=int(os.getenv("ITINERARY_CACHE_SIZE", "256")),
+    ttl=float(os.getenv("ITINERARY_CACHE_TTL", "3600")),
+    semantic_threshold=_semantic_threshold(),
+    embed_fn=_embed_query,
+)
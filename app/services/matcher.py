@@ -11,12 +11,12 @@ Match quality uses a two-stage approach:
 import json
 import logging
 import re
-from typing import Optional, Set
+from typing import List, Optional, Set, Tuple
 
 from app.core.milvus_client import milvus_client
 from app.models.sql_models import ImageLibrary, CinematicClip
 from app.providers.factory import ProviderFactory
-from app.services.embedding import generate_query_embedding
+from app.services.embedding import generate_query_embedding, generate_query_embeddings
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +28,9 @@ MIN_MATCH_SCORE = float(0.50)
 LLM_MIN_IMAGE_SCORE = 5
 LLM_MIN_CLIP_SCORE  = 5
 
+# Fallback parser for LLM score lists that are not valid JSON
+_SCORE_PATTERN = re.compile(r'"id"\s*:\s*(\d+).*?"score"\s*:\s*(\d+)', re.DOTALL)
+
 _IMAGE_SCORING_PROMPT = """You are a travel photo curator matching library images to itinerary activities.
 
 Activity context: {activity_context}
@@ -148,7 +151,7 @@ def _score_with_llm(
         for item in parsed:
             scores_by_id[int(item["id"])] = int(item["score"])
     except (json.JSONDecodeError, KeyError, TypeError):
-        for m in re.finditer(r'"id"\s*:\s*(\d+).*?"score"\s*:\s*(\d+)', raw, re.DOTALL):
+        for m in _SCORE_PATTERN.finditer(raw):
             scores_by_id[int(m.group(1))] = int(m.group(2))
 
     if not scores_by_id:
@@ -199,36 +202,48 @@ def _cosine_pick_best(hits, url_field: str, blocked: Set[str]) -> Optional[Match
     return MatchedResult(id=best_id, url=best_meta.get(url_field))
 
 
-def match_image(
-    tenant_id: str,
+def _pick_best(
+    hits,
     query_text: str,
-    exclude_ids: Optional[Set[str]] = None,
+    url_field: str,
+    blocked: Set[str],
+    prompt_template: str,
+    min_score: int,
 ) -> Optional[MatchedResult]:
-    """
-    Find the best matching image from Milvus by semantic similarity + LLM scoring.
-    query_text: "Visit Galle Fort, heritage, sunset"
-    """
-    embedding = generate_query_embedding(query_text)
-    results = milvus_client.search_images(tenant_id, embedding, limit=10)
-    blocked = exclude_ids or set()
-
-    if not (results and len(results) > 0 and len(results[0]) > 0):
+    """LLM-scored pick over one query's hits, falling back to cosine ranking."""
+    if not hits:
         return None
 
-    hits = results[0]
-
+    kind = "clip" if url_field == "video_url" else "image"
     try:
         result = _score_with_llm(
-            hits, query_text, "image_url", blocked,
-            _IMAGE_SCORING_PROMPT, LLM_MIN_IMAGE_SCORE,
+            hits, query_text, url_field, blocked, prompt_template, min_score,
         )
         if result is not None:
             return result
         # LLM scored but nothing met the threshold — fall through to cosine
     except Exception as exc:
-        logger.warning("LLM image scoring failed (%s) — falling back to cosine ranking", exc)
+        logger.warning("LLM %s scoring failed (%s) — falling back to cosine ranking", kind, exc)
 
-    return _cosine_pick_best(hits, "image_url", blocked)
+    return _cosine_pick_best(hits, url_field, blocked)
+
+
+def match_image(
+    tenant_id: str,
+    query_text: str,
+    exclude_ids: Optional[Set[str]] = None,
+) -> Optional[MatchedResult]:
+    """
+    Find the best matching image from Milvus by semantic similarity + LLM scoring.
+    query_text: "Visit Galle Fort, heritage, sunset"
+    """
+    embedding = generate_query_embedding(query_text)
+    results = milvus_client.search_images(tenant_id, embedding, limit=10)
+    hits = results[0] if results else None
+    return _pick_best(
+        hits, query_text, "image_url", exclude_ids or set(),
+        _IMAGE_SCORING_PROMPT, LLM_MIN_IMAGE_SCORE,
+    )
 
 
 def match_clip(
@@ -242,22 +257,48 @@ def match_clip(
     """
     embedding = generate_query_embedding(query_text)
     results = milvus_client.search_clips(tenant_id, embedding, limit=10)
-    blocked = exclude_ids or set()
+    hits = results[0] if results else None
+    return _pick_best(
+        hits, query_text, "video_url", exclude_ids or set(),
+        _CLIP_SCORING_PROMPT, LLM_MIN_CLIP_SCORE,
+    )
 
-    if not (results and len(results) > 0 and len(results[0]) > 0):
-        return None
 
-    hits = results[0]
+def match_activities(
+    tenant_id: str,
+    query_texts: List[str],
+) -> List[Tuple[Optional[MatchedResult], Optional[MatchedResult]]]:
+    """
+    Match an image and a clip to every activity in one pass.
 
-    try:
-        result = _score_with_llm(
-            hits, query_text, "video_url", blocked,
+    All queries are embedded in a single API batch and searched with one
+    multi-vector Milvus RPC per collection. Picks then run in activity order,
+    and each one excludes media already chosen for an earlier activity.
+    Returns [(image, clip), ...] aligned with query_texts.
+    """
+    if not query_texts:
+        return []
+    embeddings = generate_query_embeddings(query_texts)
+    image_results = milvus_client.search_images_batch(tenant_id, embeddings, limit=10)
+    clip_results = milvus_client.search_clips_batch(tenant_id, embeddings, limit=10)
+
+    used_image_ids: Set[str] = set()
+    used_clip_ids: Set[str] = set()
+    matches = []
+    for i, query_text in enumerate(query_texts):
+        image = _pick_best(
+            image_results[i] if i < len(image_results) else None,
+            query_text, "image_url", used_image_ids,
+            _IMAGE_SCORING_PROMPT, LLM_MIN_IMAGE_SCORE,
+        )
+        clip = _pick_best(
+            clip_results[i] if i < len(clip_results) else None,
+            query_text, "video_url", used_clip_ids,
             _CLIP_SCORING_PROMPT, LLM_MIN_CLIP_SCORE,
         )
-        if result is not None:
-            return result
-        # LLM scored but nothing met the threshold — fall through to cosine
-    except Exception as exc:
-        logger.warning("LLM clip scoring failed (%s) — falling back to cosine ranking", exc)
-
-    return _cosine_pick_best(hits, "video_url", blocked)
+        if image:
+            used_image_ids.add(image.id)
+        if clip:
+            used_clip_ids.add(clip.id)
+        matches.append((image, clip))
+    return matches
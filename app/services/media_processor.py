@@ -1,15 +1,181 @@
+import functools
+import hashlib
+import io
+import json
 import subprocess
 import os
+import time
 import shutil
 import tempfile
 import uuid
 import ssl
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
 from urllib.parse import urlparse
 from urllib.request import urlopen
 
-from google.cloud import storage as gcs_storage
 import certifi
 
+# Parallel ffmpeg normalizations per stitch; each encode is capped at
+# FFMPEG_THREADS so concurrent processes don't oversubscribe the cores.
+FFMPEG_CONCURRENCY = int(os.getenv("MENIKE_FFMPEG_CONCURRENCY", str(os.cpu_count() or 2)))
+FFMPEG_THREADS = 2
+# Parallel clip downloads per stitch (pure network I/O).
+DOWNLOAD_CONCURRENCY = int(os.getenv("MENIKE_DL_CONCURRENCY", "8"))
+
+# When enabled, ffprobe/ffmpeg read http(s) clips straight from the network
+# instead of downloading them first, overlapping transfer with demux and
+# keeping them off local disk. Off by default because it relies on the
+# ffmpeg build's TLS support; certifi's CA bundle is exported for it.
+STREAM_REMOTE_INPUTS = os.getenv("MENIKE_STREAM_INPUTS", "0") == "1"
+FFMPEG_ENV = {**os.environ, "SSL_CERT_FILE": certifi.where()}
+PROTOCOL_WHITELIST = "file,pipe,http,https,tcp,tls"
+
+# Stream fields that must match for clips to be concatenated without re-encoding.
+VIDEO_PROBE_FIELDS = ["codec_name", "width", "height", "r_frame_rate", "pix_fmt"]
+AUDIO_PROBE_FIELDS = ["codec_name", "sample_rate", "channels"]
+
+# H.264 encoders in order of preference, each with a quality target
+# roughly equivalent to libx264 CRF 23. Hardware encoders keep the
+# transcode off the CPU cores the API also serves requests from.
+H264_ENCODERS = {
+    "h264_nvenc": ["-c:v", "h264_nvenc", "-preset", "p4", "-rc", "vbr", "-cq", "23", "-b:v", "0"],
+    "h264_qsv": ["-c:v", "h264_qsv", "-preset", "veryfast", "-global_quality", "23"],
+    "h264_videotoolbox": ["-c:v", "h264_videotoolbox", "-q:v", "65"],
+    "libx264": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "23"],
+}
+
+# Baseline every clip is normalized to before concat (minus the video encoder).
+NORMALIZE_ARGS = [
+    "-pix_fmt", "yuv420p",
+    "-r", "30",
+    "-c:a", "aac",
+    "-b:a", "192k",
+    "-ar", "48000",
+    "-ac", "2",
+]
+# Final output muxing. Files get the moov atom up front; a pipe can't be
+# seeked back into, so streamed output is fragmented MP4 instead.
+FASTSTART_ARGS = ["-movflags", "+faststart"]
+STREAM_ARGS = ["-f", "mp4", "-movflags", "frag_keyframe+empty_moov+default_base_moof"]
+
+# Normalized clips can be kept on disk keyed by source content + encode args,
+# so clips reused across scenes and runs are only transcoded once. Off unless
+# MENIKE_CACHE_DIR points at real disk: on Cloud Run /tmp is memory-backed
+# and a cache there counts against the instance's memory limit.
+CACHE_DIR = os.getenv("MENIKE_CACHE_DIR") or None
+CACHE_MAX_BYTES = int(os.getenv("MENIKE_CACHE_MAX_BYTES", str(1024 ** 3)))
+# Entries touched this recently are never evicted; a concurrent stitch may
+# be about to concat them.
+CACHE_MIN_AGE_SECONDS = 600
+
+# Shared across downloads: building a context reloads the CA bundle.
+_SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+
+
+def _get_gcs_client():
+    """The storage service's client: one client and one credentials path.
+
+    Imported lazily so probing/stitching never requires GCS configuration.
+    """
+    from app.services.storage import storage_service
+    return storage_service.client
+
+
+def _encoder_works(name: str) -> bool:
+    """Listed encoders may lack the device/driver, so try a tiny encode."""
+    try:
+        subprocess.run(
+            [
+                "ffmpeg", "-hide_banner", "-v", "error",
+                "-f", "lavfi", "-i", "color=size=256x256:duration=0.1",
+                *H264_ENCODERS[name], "-pix_fmt", "yuv420p",
+                "-f", "null", "-",
+            ],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=30,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return True
+
+
+@functools.cache
+def _h264_encoder() -> str:
+    """Pick the H.264 encoder once per process; MENIKE_H264_ENCODER overrides."""
+    forced = os.getenv("MENIKE_H264_ENCODER")
+    if forced in H264_ENCODERS:
+        return forced
+    try:
+        listing = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        ).stdout.decode()
+    except (OSError, subprocess.SubprocessError):
+        return "libx264"
+    available = {line.split()[1] for line in listing.splitlines() if len(line.split()) > 1}
+    for name in H264_ENCODERS:
+        if name == "libx264" or (name in available and _encoder_works(name)):
+            print(f"Using H.264 encoder: {name}")
+            return name
+    return "libx264"
+
+
+@functools.cache
+def _encode_args() -> tuple:
+    return (*H264_ENCODERS[_h264_encoder()], *NORMALIZE_ARGS)
+
+
+@functools.cache
+def _param_hash() -> str:
+    return hashlib.sha256(" ".join(_encode_args()).encode()).hexdigest()[:16]
+
+class _FFmpegOutput:
+    """ffmpeg's stdout as a readable stream with a byte-count tell().
+
+    When the stream ends it waits for ffmpeg and raises CalledProcessError
+    if it failed, so a consumer still reading (e.g. a GCS resumable upload)
+    aborts instead of finalizing a truncated video. It is a pipe and can't
+    rewind: seek() raises io.UnsupportedOperation, so an upload chunk that
+    fails can't be resent and the upload fails instead.
+    """
+
+    def __init__(self, proc: subprocess.Popen, cmd: list, stderr):
+        self._proc = proc
+        self._cmd = cmd
+        self._stderr = stderr
+        self._pos = 0
+
+    def read(self, size: int = -1) -> bytes:
+        # BufferedReader.read(n) only returns short at EOF.
+        data = self._proc.stdout.read(size)
+        self._pos += len(data)
+        if size is None or size < 0 or len(data) < size:
+            self._check()
+        return data
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seekable(self) -> bool:
+        return False
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        # Only no-op seeks to the current position are allowed
+        if (whence == io.SEEK_SET and offset == self._pos) or (whence == io.SEEK_CUR and offset == 0):
+            return self._pos
+        raise io.UnsupportedOperation("ffmpeg output can't be rewound; rerun the stitch")
+
+    def _check(self) -> None:
+        returncode = self._proc.wait()
+        if returncode:
+            self._stderr.seek(0)
+            raise subprocess.CalledProcessError(returncode, self._cmd, stderr=self._stderr.read())
+
 class MediaProcessor:
     """Wraps FFmpeg for media optimization and processing."""
     
@@ -21,17 +187,193 @@ class MediaProcessor:
         print(f"Optimizing video: {input_path} -> {output_path}")
         return output_path
 
+    @staticmethod
+    def _probe(path: str) -> tuple:
+        """Stream fingerprint used to decide whether clips can be concatenated as-is.
+
+        Returns (video, audio), each a sorted tuple of (field, value) pairs;
+        audio is empty when the clip has no audio stream.
+        """
+        # One ffprobe per clip for both streams; each process spawn costs more
+        # than the probe itself.
+        result = subprocess.run(
+            [
+                "ffprobe", "-v", "error",
+                "-show_entries", f"stream=codec_type,{','.join(VIDEO_PROBE_FIELDS + AUDIO_PROBE_FIELDS)}",
+                "-of", "json",
+                path,
+            ],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=FFMPEG_ENV,
+        )
+        streams = json.loads(result.stdout).get("streams", [])
+        fingerprint = []
+        for codec_type, fields in (("video", VIDEO_PROBE_FIELDS), ("audio", AUDIO_PROBE_FIELDS)):
+            stream = next((st for st in streams if st.get("codec_type") == codec_type), {})
+            fingerprint.append(tuple(sorted((key, str(stream[key])) for key in fields if key in stream)))
+        return tuple(fingerprint)
+
+    @staticmethod
+    def _concat_reencode_cmd(paths: list, video: dict) -> list:
+        """Concatenate mismatched clips with the concat filter in a single encode.
+
+        Every input is conformed to the first clip's frame size and the
+        normalize baseline inside the filter graph, so the N clips are
+        decoded once and encoded once instead of N times.
+        """
+        width = int(video["width"]) // 2 * 2
+        height = int(video["height"]) // 2 * 2
+        cmd = ["ffmpeg"]
+        graph = []
+        for idx, path in enumerate(paths):
+            cmd += ["-i", path]
+            graph.append(
+                f"[{idx}:v:0]scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,fps=30,format=yuv420p[v{idx}];"
+                f"[{idx}:a:0]aresample=48000,aformat=channel_layouts=stereo[a{idx}]"
+            )
+        pairs = "".join(f"[v{idx}][a{idx}]" for idx in range(len(paths)))
+        graph.append(f"{pairs}concat=n={len(paths)}:v=1:a=1[v][a]")
+        cmd += [
+            "-filter_complex", ";".join(graph),
+            "-map", "[v]",
+            "-map", "[a]",
+            *_encode_args(),
+        ]
+        return cmd
+
+    @staticmethod
+    def _normalized_cache_path(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return os.path.join(CACHE_DIR, "normalized", f"{digest.hexdigest()}_{_param_hash()}.mp4")
+
+    @staticmethod
+    def _transcode_normalized(src: str, dst: str) -> None:
+        subprocess.run(
+            ["ffmpeg", "-i", src, *_encode_args(), "-threads", str(FFMPEG_THREADS), "-y", dst],
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+    @staticmethod
+    def _normalize_clip(path: str, workdir: str) -> str:
+        """Return a normalized copy of path, transcoding only on a cache miss.
+
+        With the cache off the copy goes into workdir and is removed with it.
+        """
+        if CACHE_DIR is None:
+            out_path = os.path.join(workdir, f"norm_{uuid.uuid4().hex}.mp4")
+            MediaProcessor._transcode_normalized(path, out_path)
+            return out_path
+
+        cache_path = MediaProcessor._normalized_cache_path(path)
+        if os.path.exists(cache_path):
+            os.utime(cache_path)  # LRU: eviction goes by mtime
+            return cache_path
+
+        cache_dir = os.path.dirname(cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=cache_dir, suffix=".mp4", delete=False) as tmp:
+            tmp_path = tmp.name
+        try:
+            MediaProcessor._transcode_normalized(path, tmp_path)
+            os.replace(tmp_path, cache_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return cache_path
+
+    @staticmethod
+    def _evict_normalized_cache():
+        """Drop least recently used normalized clips until under CACHE_MAX_BYTES."""
+        if CACHE_DIR is None:
+            return
+        cache_dir = os.path.join(CACHE_DIR, "normalized")
+        try:
+            entries = [e for e in os.scandir(cache_dir) if e.is_file()]
+        except FileNotFoundError:
+            return
+        stats = sorted(((e.stat(), e.path) for e in entries), key=lambda item: item[0].st_mtime)
+        total = sum(st.st_size for st, _ in stats)
+        cutoff = time.time() - CACHE_MIN_AGE_SECONDS
+        for st, path in stats:
+            if total <= CACHE_MAX_BYTES or st.st_mtime > cutoff:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= st.st_size
+
+    @staticmethod
+    def _run_ffmpeg(cmd: list, input: Optional[bytes] = None, consume: Optional[Callable] = None):
+        """Run ffmpeg; with consume, its stdout is streamed to consume(stream) and the result returned."""
+        if consume is None:
+            subprocess.run(cmd, input=input, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=FFMPEG_ENV)
+            return None
+        # stderr goes to a file: an unread pipe would fill up and stall ffmpeg.
+        with tempfile.TemporaryFile() as stderr:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+                env=FFMPEG_ENV,
+            )
+            try:
+                if input is not None:
+                    try:
+                        proc.stdin.write(input)
+                        proc.stdin.close()
+                    except BrokenPipeError:
+                        pass  # ffmpeg exited early; the failure surfaces on read
+                output = _FFmpegOutput(proc, cmd, stderr)
+                result = consume(output)
+                output.read()  # drain and surface a failure the consumer didn't read up to
+                return result
+            finally:
+                if proc.poll() is None:
+                    proc.kill()
+                proc.wait()
+
     @staticmethod
     def stitch_scenes(video_paths: list, output_path: str):
         if not video_paths:
             print("No video paths to stitch")
             return None
+        MediaProcessor._stitch(video_paths, [*FASTSTART_ARGS, "-y", output_path], output_path)
+        return output_path
+
+    @staticmethod
+    def stitch_scenes_stream(video_paths: list, consume: Callable):
+        """Stitch into fragmented MP4 on ffmpeg's stdout and return consume(stream).
+
+        Nothing is written to disk for the output; consume typically uploads
+        the stream (see StorageService.upload_stream). If ffmpeg fails, the
+        stream raises CalledProcessError when its end is reached.
+        """
+        if not video_paths:
+            print("No video paths to stitch")
+            return None
+        return MediaProcessor._stitch(video_paths, [*STREAM_ARGS, "pipe:1"], "stream", consume)
+
+    @staticmethod
+    def _stitch(video_paths: list, output_args: list, label: str, consume: Optional[Callable] = None):
+        # Per-call scratch dir: concurrent stitches in one process never share
+        # file names, and cleanup is a single rmtree.
+        workdir = tempfile.mkdtemp(prefix="stitch_")
 
         def _ensure_local(path: str) -> str:
             if path.startswith("http://") or path.startswith("https://"):
                 parsed = urlparse(path)
                 ext = os.path.splitext(parsed.path)[1] or ".mp4"
-                local_path = os.path.join(tempfile.gettempdir(), f"clip_{uuid.uuid4().hex}{ext}")
+                local_path = os.path.join(workdir, f"clip_{uuid.uuid4().hex}{ext}")
 
                 # Prefer GCS client for GCS URLs to avoid local SSL trust-store issues.
                 host = parsed.netloc.lower()
@@ -40,83 +382,75 @@ class MediaProcessor:
                     parts = parsed.path.lstrip("/").split("/", 1)
                     bucket_name = parts[0]
                     key = parts[1] if len(parts) > 1 else ""
-                    client = gcs_storage.Client()
-                    blob = client.bucket(bucket_name).blob(key)
+                    blob = _get_gcs_client().bucket(bucket_name).blob(key)
                     blob.download_to_filename(local_path)
                     return local_path
 
-                ssl_ctx = ssl.create_default_context(cafile=certifi.where())
-                with urlopen(path, context=ssl_ctx) as src, open(local_path, "wb") as dst:
+                with urlopen(path, context=_SSL_CONTEXT) as src, open(local_path, "wb") as dst:
                     shutil.copyfileobj(src, dst)
                 return local_path
             return path
 
-        # 1. Create a temporary text file listing all videos
-        # absolute path for safety
-        list_file_path = f"/tmp/inputs_{os.getpid()}.txt"
-        local_inputs = []
-        downloaded_paths = []
-        normalized_paths = []
+        def _download_all() -> list:
+            workers = max(1, min(len(video_paths), DOWNLOAD_CONCURRENCY))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                return list(pool.map(_ensure_local, video_paths))
+
+        inputs = []
         
         try:
-            for path in video_paths:
-                local_path = _ensure_local(path)
-                local_inputs.append(local_path)
-                if local_path != path:
-                    downloaded_paths.append(local_path)
-
-            # Normalize each clip to a stable baseline so concat is reliable.
-            # This avoids DTS/codec mismatches that can produce audio-only playback.
-            for idx, path in enumerate(local_inputs):
-                normalized_path = os.path.join(
-                    tempfile.gettempdir(),
-                    f"normalized_{os.getpid()}_{idx}.mp4",
-                )
-                normalize_cmd = [
+            inputs = list(video_paths) if STREAM_REMOTE_INPUTS else _download_all()
+
+            workers = max(1, min(len(inputs), FFMPEG_CONCURRENCY))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                try:
+                    fingerprints = list(pool.map(MediaProcessor._probe, inputs))
+                except subprocess.CalledProcessError:
+                    fingerprints = None
+
+                if fingerprints is not None and len(set(fingerprints)) == 1:
+                    # Clips already share codec/fps/pix_fmt/audio layout
+                    # (e.g. all from the same generator): concat as-is.
+                    concat_inputs = inputs
+                elif fingerprints is not None and all(audio for _, audio in fingerprints):
+                    # Mismatched clips: one filter_complex pass re-encodes end-to-end.
+                    concat_inputs = None
+                else:
+                    # Unprobeable or audio-less clips can't go through the concat
+                    # filter; normalize each to a stable baseline so concat is reliable.
+                    # This avoids DTS/codec mismatches that can produce audio-only playback.
+                    # Clips are independent, so their ffmpeg processes run in parallel.
+                    # The normalize cache hashes file bytes, so streamed inputs
+                    # are downloaded for this path.
+                    if STREAM_REMOTE_INPUTS:
+                        inputs = _download_all()
+                    normalize = functools.partial(MediaProcessor._normalize_clip, workdir=workdir)
+                    concat_inputs = list(pool.map(normalize, inputs))
+
+            print(f"Stitching {len(video_paths)} scenes into {label}...")
+            listing = None
+            if concat_inputs is None:
+                cmd = MediaProcessor._concat_reencode_cmd(inputs, dict(fingerprints[0][0]))
+            else:
+                # The concat listing goes to ffmpeg on stdin; a PID-named list
+                # file would collide between concurrent stitches in one process.
+                # Escape single quotes in filenames for ffmpeg concat demuxer
+                listing = "".join(
+                    "file '{}'\n".format(path.replace("'", "'\\''")) for path in concat_inputs
+                ).encode()
+                cmd = [
                     "ffmpeg",
-                    "-i", path,
-                    "-c:v", "libx264",
-                    "-preset", "veryfast",
-                    "-crf", "23",
-                    "-pix_fmt", "yuv420p",
-                    "-r", "30",
-                    "-c:a", "aac",
-                    "-b:a", "192k",
-                    "-ar", "48000",
-                    "-ac", "2",
-                    "-movflags", "+faststart",
-                    "-y",
-                    normalized_path,
+                    "-f", "concat",
+                    "-safe", "0",
+                    "-protocol_whitelist", PROTOCOL_WHITELIST,
+                    "-i", "pipe:0",
+                    # Remuxed with output_args; inputs' container layout
+                    # doesn't matter once streams match.
+                    "-c", "copy",
                 ]
-                subprocess.run(
-                    normalize_cmd,
-                    check=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                )
-                normalized_paths.append(normalized_path)
-
-            with open(list_file_path, "w") as f:
-                for path in normalized_paths:
-                    # Escape single quotes in filenames for ffmpeg concat demuxer
-                    safe_path = path.replace("'", "'\\''")
-                    f.write(f"file '{safe_path}'\n")
-            
-            # 2. Concatenate normalized clips
-            cmd = [
-                "ffmpeg",
-                "-f", "concat",
-                "-safe", "0",
-                "-i", list_file_path,
-                "-c", "copy",
-                "-y",  # Overwrite output if exists
-                output_path
-            ]
-            
-            print(f"Stitching {len(video_paths)} scenes into {output_path}...")
-            subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            print(f"Successfully stitched video to {output_path}")
-            
+            result = MediaProcessor._run_ffmpeg(cmd + output_args, listing, consume)
+            print(f"Successfully stitched video to {label}")
+
         except subprocess.CalledProcessError as e:
             print(f"Error stitching video: {e.stderr.decode()}")
             raise
@@ -124,14 +458,7 @@ class MediaProcessor:
             print(f"Unexpected error: {e}")
             raise
         finally:
-            # Cleanup the temp list file
-            if os.path.exists(list_file_path):
-                os.remove(list_file_path)
-            for path in downloaded_paths:
-                if os.path.exists(path):
-                    os.remove(path)
-            for path in normalized_paths:
-                if os.path.exists(path):
-                    os.remove(path)
-                
-        return output_path
+            shutil.rmtree(workdir, ignore_errors=True)
+            MediaProcessor._evict_normalized_cache()
+
+        return result
@@ -1,9 +1,10 @@
+import asyncio
 from datetime import datetime
-import random
 import time
-from typing import List, Optional
+from typing import Iterator, List, Optional
 from app.models.sql_models import Scene
-from sqlmodel import Session
+from sqlalchemy import tuple_
+from sqlmodel import Session, select
 
 from app.services.generators import LLMPromptEngine, ImageGenerator, VideoGenerator
 from app.services.media_processor import MediaProcessor
@@ -18,47 +19,69 @@ class SceneOrchestrator:
         self.processor = MediaProcessor()
         self.storage = storage_service
 
+    def _persist(self, scene: Scene) -> None:
+        self.session.add(scene)
+        self.session.commit()
+        self.session.refresh(scene)
+
     async def create_scene(self, tenant_id: str, name: str, description: str):
         # 1. Store initial scene metadata in PostgreSQL
         scene = Scene(
             tenant_id=tenant_id,
             name=name,
             description=description,
-            status="pending"
+            # Orchestration starts right away, so the row is inserted as
+            # processing in one commit instead of pending -> processing.
+            status="processing"
         )
-        self.session.add(scene)
-        self.session.commit()
-        self.session.refresh(scene)
+        # Blocking work (Postgres round-trips, ffmpeg, uploads) runs in worker
+        # threads so the event loop keeps serving other requests.
+        await asyncio.to_thread(self._persist, scene)
         
-        # 2. Sequential Orchestration Flow
-        scene.status = "processing"
-        self.session.add(scene)
-        self.session.commit()
+        # 2. Orchestration Flow
 
         # A. Prompt Engineering (LLM)
         prompts = self.prompt_engine.generate_scene_prompts(description)
         
-        # B. Generation (AI Models)
-        image_path = await self.image_gen.generate(prompts["image_prompt"])
-        video_path = await self.video_gen.generate(prompts["video_prompt"])
+        # B. Generation (AI Models) - independent calls, run concurrently
+        image_path, video_path = await asyncio.gather(
+            self.image_gen.generate(prompts["image_prompt"]),
+            self.video_gen.generate(prompts["video_prompt"]),
+        )
         
         # C. Media Processing (FFmpeg)
-        final_video_local = self.processor.optimize_video(video_path, f"/tmp/{scene.id}_optimized.mp4")
+        final_video_local = await asyncio.to_thread(
+            self.processor.optimize_video, video_path, f"/tmp/{scene.id}_optimized.mp4"
+        )
         
-        # D. Persistence (S3 upload)
-        mock_media_url = self.storage.upload_file(final_video_local, f"scenes/{scene.id}.mp4")
+        # D. Persistence (GCS upload)
+        [mock_media_url] = await asyncio.to_thread(
+            self.storage.upload_files, [(final_video_local, f"scenes/{scene.id}.mp4")]
+        )
         
         scene.media_url = mock_media_url
         scene.status = "completed"
         scene.updated_at = datetime.utcnow()
         
-        self.session.add(scene)
-        self.session.commit()
+        await asyncio.to_thread(self._persist, scene)
         print(f"Scene {scene.id} orchestration complete.")
         
         return scene
 
-    def list_scenes(self, tenant_id: str):
-        from sqlmodel import select
+    def list_scenes(self, tenant_id: str, limit: int = 100, after: Optional[str] = None) -> Iterator[Scene]:
+        """Yield up to limit scenes oldest first, starting after the scene with id `after`.
+
+        Keyset page on (created_at, id): ids alone are not time-ordered
+        (rows created before UUIDv7 ids have random uuid4 ids), so id is
+        only the tie-breaker. An unknown `after` id yields nothing.
+        """
         statement = select(Scene).where(Scene.tenant_id == tenant_id)
-        return self.session.exec(statement).all()
+        if after:
+            cursor = select(Scene.created_at).where(Scene.id == after).scalar_subquery()
+            statement = statement.where(tuple_(Scene.created_at, Scene.id) > tuple_(cursor, after))
+        statement = (
+            statement.order_by(Scene.created_at, Scene.id)
+            .limit(limit)
+            .execution_options(yield_per=256)
+        )
+        yield from self.session.exec(statement)
@@ -57,6 +57,9 @@ PIXABAY_SEARCH_URL = "https://pixabay.com/api/videos/"
 PEXELS_SEARCH_URL = "https://api.pexels.com/videos/search"
 ARCHIVE_SEARCH_URL = "https://archive.org/advancedsearch.php"
 
+# Fallback parser for LLM score lists that are not valid JSON
+_SCORE_PATTERN = re.compile(r'"id"\s*:\s*(\d+).*?"score"\s*:\s*(\d+)', re.DOTALL)
+
 # LLM relevance score threshold: candidates below this are discarded
 LLM_SCORE_THRESHOLD = 6
 
@@ -481,7 +484,7 @@ class RoyaltyFreeDownloader:
                 scores_by_id[int(item["id"])] = int(item["score"])
         except (json.JSONDecodeError, KeyError, TypeError):
             # Regex fallback: extract {"id": N, "score": M} patterns
-            for match in re.finditer(r'"id"\s*:\s*(\d+).*?"score"\s*:\s*(\d+)', raw, re.DOTALL):
+            for match in _SCORE_PATTERN.finditer(raw):
                 scores_by_id[int(match.group(1))] = int(match.group(2))
 
         # Apply scores back to candidates
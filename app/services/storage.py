@@ -1,11 +1,17 @@
 import os
+import subprocess
 
 import google.auth
 from google.cloud import storage
+from google.cloud.storage import transfer_manager
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Resumable-upload chunk for final videos (must be a multiple of 256 KiB).
+# Fewer, larger PUTs for ~GiB files; the SDK default stays for small media.
+FINAL_VIDEO_CHUNK_SIZE = 32 * 1024 * 1024
+
 
 class StorageService:
     """GCS-backed storage service. Bucket is publicly readable; returns plain public URLs."""
@@ -26,15 +32,56 @@ class StorageService:
     def _public_url(self, key: str) -> str:
         return f"https://storage.googleapis.com/{self.bucket_name}/{key}"
 
-    def upload_file(self, local_path: str, remote_path: str) -> str:
+    def upload_file(self, local_path: str, remote_path: str, chunk_size: int | None = None) -> str:
         key = self._build_key(remote_path)
-        blob = self.bucket.blob(key)
+        blob = self.bucket.blob(key, chunk_size=chunk_size)
         try:
             blob.upload_from_filename(local_path)
         except Exception as exc:
             raise RuntimeError(f"GCS upload failed for {local_path}: {exc}") from exc
         return self._public_url(key)
 
+    def upload_files(self, pairs: list[tuple[str, str]]) -> list[str]:
+        """Upload (local_path, remote_path) pairs concurrently; returns public URLs in order."""
+        keys = [self._build_key(remote_path) for _, remote_path in pairs]
+        file_blob_pairs = [(local_path, self.bucket.blob(key)) for (local_path, _), key in zip(pairs, keys)]
+        results = transfer_manager.upload_many(
+            file_blob_pairs,
+            max_workers=min(len(pairs), (os.cpu_count() or 1) * 4) or 1,
+            worker_type=transfer_manager.THREAD,
+        )
+        for (local_path, _), result in zip(pairs, results):
+            if isinstance(result, Exception):
+                raise RuntimeError(f"GCS upload failed for {local_path}: {result}") from result
+        return [self._public_url(key) for key in keys]
+
+    def upload_stream(
+        self,
+        stream,
+        remote_path: str,
+        content_type: str | None = None,
+        chunk_size: int | None = None,
+    ) -> str:
+        """Upload a forward-only stream of unknown length (e.g. ffmpeg stdout).
+
+        Uses a resumable upload, which is only finalized once the stream is
+        exhausted; an exception raised by stream.read() abandons the upload
+        and leaves any existing object at remote_path untouched. A failed
+        chunk can't be retried from a forward-only stream, so the upload
+        fails as a whole and the caller has to regenerate the stream.
+        A CalledProcessError from the producer is re-raised as-is so callers
+        can report the process's own stderr.
+        """
+        key = self._build_key(remote_path)
+        blob = self.bucket.blob(key, chunk_size=chunk_size)
+        try:
+            blob.upload_from_file(stream, content_type=content_type)
+        except subprocess.CalledProcessError:
+            raise
+        except Exception as exc:
+            raise RuntimeError(f"GCS upload failed for key {key}: {exc}") from exc
+        return self._public_url(key)
+
     def upload_bytes(self, content: bytes, remote_path: str, content_type: str | None = None) -> str:
         key = self._build_key(remote_path)
         blob = self.bucket.blob(key)
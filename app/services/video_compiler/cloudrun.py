@@ -52,6 +52,8 @@ class CloudRunVideoCompiler(VideoCompiler):
             name=self.job_name,
             overrides=override,
         )
-        # Non-blocking — the worker updates the DB when it finishes.
+        # Only the dispatch RPC blocks (callers run it off the event loop);
+        # dispatch errors propagate, the job itself runs asynchronously and
+        # the worker updates the DB when it finishes.
         self.client.run_job(request=request)
         return CompileResult(video_url=None, status="processing", is_async=True)
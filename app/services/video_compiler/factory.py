@@ -1,3 +1,4 @@
+import functools
 import os
 from typing import Optional
 
@@ -9,7 +10,13 @@ class VideoCompilerFactory:
     """Factory class to create video compiler instances based on configuration."""
 
     @staticmethod
+    @functools.lru_cache(maxsize=4)
     def create(provider_name: Optional[str] = None) -> VideoCompiler:
+        """Return the shared compiler for provider_name (default: VIDEO_COMPILER).
+
+        Compilers are stateless per call, so one instance (and, for Cloud Run,
+        one JobsClient channel and dispatch pool) serves the whole process.
+        """
         if provider_name is None:
             provider_name = os.getenv("VIDEO_COMPILER", "local")
 
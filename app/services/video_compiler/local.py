@@ -1,9 +1,8 @@
-import os
 import subprocess
 
 from .base import VideoCompiler, CompileResult
 from app.services.media_processor import MediaProcessor
-from app.services.storage import storage_service
+from app.services.storage import FINAL_VIDEO_CHUNK_SIZE, storage_service
 
 
 class LocalVideoCompiler(VideoCompiler):
@@ -13,20 +12,19 @@ class LocalVideoCompiler(VideoCompiler):
         self.media_processor = MediaProcessor()
 
     def compile(self, clip_urls: list[str], itinerary_id: str, tenant_id: str) -> CompileResult:
-        output_path = f"/tmp/final_video_{itinerary_id}.mp4"
+        gcs_key = f"tenants/{tenant_id}/final-video/{itinerary_id}.mp4"
 
+        # ffmpeg's output is uploaded as it is produced; no local final file.
         try:
-            final_local = self.media_processor.stitch_scenes(clip_urls, output_path)
+            video_url = self.media_processor.stitch_scenes_stream(
+                clip_urls,
+                lambda stream: storage_service.upload_stream(
+                    stream, gcs_key, "video/mp4", chunk_size=FINAL_VIDEO_CHUNK_SIZE
+                ),
+            )
         except subprocess.CalledProcessError:
             raise RuntimeError(
                 "Unable to compile final video due to incompatible clip encoding/timestamps."
             )
 
-        gcs_key = f"tenants/{tenant_id}/final-video/{itinerary_id}.mp4"
-        video_url = storage_service.upload_file(final_local, gcs_key)
-
-        # Clean up temp file
-        if os.path.exists(output_path):
-            os.remove(output_path)
-
         return CompileResult(video_url=video_url, status="compiled", is_async=False)
@@ -116,7 +116,7 @@ else:
                           "(was it generated via the AI flow?).")
                     sys.exit(1)
 
-                rich_itinerary = json.loads(itinerary_row.rich_itinerary_json)
+                rich_itinerary = itinerary_row.rich_itinerary_json
 
                 activities = session.exec(
                     select(ItineraryActivity)
@@ -158,27 +158,23 @@ else:
     # -----------------------------------------------------------------------
     else:
         from app.services.media_processor import MediaProcessor
-        from app.services.storage import storage_service
+        from app.services.storage import FINAL_VIDEO_CHUNK_SIZE, storage_service
 
-        output_path = f"/tmp/final_video_{itinerary_id}.mp4"
         media_processor = MediaProcessor()
 
-        print(f"[worker] Stitching {len(clip_urls)} clips for itinerary {itinerary_id}...")
+        # The stitched video is streamed straight into GCS as ffmpeg writes it.
+        print(f"[worker] Stitching {len(clip_urls)} clips for itinerary {itinerary_id} "
+              f"and uploading to GCS: {gcs_key}")
         try:
-            media_processor.stitch_scenes(clip_urls, output_path)
-        except Exception as e:
-            print(f"ERROR during video stitching: {e}")
-            sys.exit(1)
-
-        print(f"[worker] Uploading to GCS: {gcs_key}")
-        try:
-            video_url = storage_service.upload_file(output_path, gcs_key)
+            video_url = media_processor.stitch_scenes_stream(
+                clip_urls,
+                lambda stream: storage_service.upload_stream(
+                    stream, gcs_key, "video/mp4", chunk_size=FINAL_VIDEO_CHUNK_SIZE
+                ),
+            )
         except Exception as e:
-            print(f"ERROR during GCS upload: {e}")
+            print(f"ERROR during video stitching/upload: {e}")
             sys.exit(1)
-        finally:
-            if os.path.exists(output_path):
-                os.remove(output_path)
 
         print(f"[worker] Upload complete: {video_url}")
 
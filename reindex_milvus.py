@@ -2,9 +2,12 @@
 Milvus re-indexing migration script.
 
 Run this after deploying the Gemini text-embedding-004 embedding change.
-It drops the old 128-dim image_vectors and clip_vectors collections,
-recreates them with the new 768-dim schema, then re-embeds every record
-from PostgreSQL and inserts it into Milvus.
+It drops the old experiences, image_vectors and clip_vectors collections,
+recreates them with the current 768-dim FLOAT16_VECTOR schema, then
+re-embeds every record and inserts it into Milvus. Images and clips are
+re-embedded from PostgreSQL; experiences only live in Milvus, so their
+metadata is read out of the old collection before it is dropped and
+re-embedded from its text fields.
 
 Usage:
     cd menike_backend_poc
@@ -29,15 +32,81 @@ from pymilvus import connections, utility, Collection
 
 from app.core.database import get_session
 from app.models.sql_models import ImageLibrary, CinematicClip
-from app.models.milvus_schema import get_image_vector_schema, get_clip_vector_schema
-from app.services.embedding import generate_embedding
-from app.core.milvus_client import milvus_client, MILVUS_HOST, MILVUS_PORT, IMAGE_COLLECTION_NAME, CLIP_COLLECTION_NAME
+from app.models.milvus_schema import (
+    EMBEDDING_DIM,
+    get_clip_vector_schema,
+    get_experience_schema,
+    get_image_vector_schema,
+)
+from app.services.embedding import EMBED_BATCH_SIZE, _EMBED_MODEL, generate_embeddings
+from app.core.milvus_client import (
+    milvus_client,
+    INSERT_BATCH_SIZE,
+    MILVUS_HOST,
+    MILVUS_PORT,
+    COLLECTION_NAME,
+    IMAGE_COLLECTION_NAME,
+    CLIP_COLLECTION_NAME,
+)
 from sqlmodel import select
 
 
 BATCH_SLEEP = 0.3  # seconds between Gemini API calls to avoid rate limiting
 
 
+def embed_rows(pending: list, label: str):
+    """Embed (id, tenant_id, text, metadata) items one API batch at a time.
+
+    Returns (rows ready for insert, number of failed items).
+    """
+    rows = []
+    failed = 0
+    for start in range(0, len(pending), EMBED_BATCH_SIZE):
+        chunk = pending[start:start + EMBED_BATCH_SIZE]
+        try:
+            embeddings = generate_embeddings([text for _, _, text, _ in chunk])
+        except Exception as e:
+            failed += len(chunk)
+            print(f"  FAILED batch {start}-{start + len(chunk)}: {e}")
+            continue
+        for (row_id, tenant_id, _, metadata), embedding in zip(chunk, embeddings):
+            rows.append((row_id, tenant_id, embedding, metadata))
+        print(f"  [{len(rows)}/{len(pending)}] {label} embedded")
+        time.sleep(BATCH_SLEEP)
+    return rows, failed
+
+
+def insert_rows(collection_name: str, rows: list, insert_fn):
+    """Insert rows chunk by chunk, then flush so they are persisted.
+
+    A failed chunk (after the client's own reconnect retries) is counted and
+    skipped instead of aborting the rest. Returns the number of rows that
+    failed to insert.
+    """
+    failed = 0
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        chunk = rows[start:start + INSERT_BATCH_SIZE]
+        try:
+            insert_fn(chunk)
+        except Exception as e:
+            failed += len(chunk)
+            print(f"  FAILED insert {start}-{start + len(chunk)}: {e}")
+    if len(rows) > failed:
+        Collection(collection_name).flush()
+    return failed
+
+
+def _insert_experience_rows(rows: list):
+    ids, tenant_ids, embeddings, extras = zip(*rows)
+    milvus_client.insert_experience([
+        list(ids),
+        list(tenant_ids),
+        list(embeddings),
+        [metadata for metadata, _ in extras],
+        [slug for _, slug in extras],
+    ])
+
+
 def drop_and_recreate(collection_name: str, schema_fn):
     print(f"\n[{collection_name}] Dropping old collection...")
     if utility.has_collection(collection_name):
@@ -46,44 +115,84 @@ def drop_and_recreate(collection_name: str, schema_fn):
     else:
         print(f"[{collection_name}] Did not exist, skipping drop.")
 
-    print(f"[{collection_name}] Recreating with 768-dim schema...")
+    print(f"[{collection_name}] Recreating with 768-dim FP16 schema...")
     milvus_client.create_collection(collection_name, schema_fn())
     print(f"[{collection_name}] Created.")
 
 
+def snapshot_experiences() -> list:
+    """Read (id, tenant_id, metadata, slug) of every experience before the drop."""
+    if not utility.has_collection(COLLECTION_NAME):
+        return []
+    # Plain Collection handle: the old collection may not match the current schema.
+    iterator = Collection(COLLECTION_NAME).query_iterator(
+        batch_size=1000, expr="", output_fields=["id", "tenant_id", "metadata", "slug"]
+    )
+    experiences = []
+    try:
+        while True:
+            batch = iterator.next()
+            if not batch:
+                break
+            experiences.extend(batch)
+    finally:
+        iterator.close()
+    print(f"\n[{COLLECTION_NAME}] Read {len(experiences)} experiences from the old collection.")
+    return experiences
+
+
+def reindex_experiences(experiences: list):
+    print(f"\n[{COLLECTION_NAME}] Re-embedding {len(experiences)} experiences...")
+    pending = []
+    for exp in experiences:
+        metadata = exp.get("metadata") or {}
+        location = metadata.get("location") or {}
+        text = " ".join(filter(None, [
+            metadata.get("name"),
+            metadata.get("shortDescription"),
+            metadata.get("description"),
+            " ".join(metadata.get("type") or []),
+            " ".join(metadata.get("tags") or []),
+            location.get("city") if isinstance(location, dict) else None,
+        ]))
+        metadata["embeddingMetadata"] = {
+            **(metadata.get("embeddingMetadata") or {}),
+            "model": _EMBED_MODEL,
+            "dimensions": EMBEDDING_DIM,
+        }
+        pending.append((exp["id"], exp["tenant_id"], text, (metadata, exp.get("slug") or "")))
+    rows, failed = embed_rows(pending, "experiences")
+
+    failed += insert_rows(COLLECTION_NAME, rows, _insert_experience_rows)
+    print(f"\n[{COLLECTION_NAME}] Done: {len(pending) - failed} inserted, {failed} failed.")
+
+
 def reindex_images(session):
     images = session.exec(select(ImageLibrary)).all()
     print(f"\n[image_vectors] Re-embedding {len(images)} images...")
-    ok = 0
-    failed = 0
+    pending = []
     for img in images:
-        try:
-            text = " ".join(filter(None, [
-                img.name,
-                img.tags,
-                img.location,
-                img.type,
-                img.description,
-            ]))
-            embedding = generate_embedding(text)
-            metadata = {
-                "name": img.name or "",
-                "tags": img.tags or "",
-                "location": img.location or "",
-                "image_url": img.image_url or "",
-                "description": (img.description or "")[:500],
-                "type": img.type or "",
-                "pg_id": img.id,
-            }
-            milvus_client.insert_image_vector(img.id, img.tenant_id, embedding, metadata)
-            ok += 1
-            print(f"  [{ok}/{len(images)}] OK: {img.name[:60]}")
-            time.sleep(BATCH_SLEEP)
-        except Exception as e:
-            failed += 1
-            print(f"  FAILED: {img.name[:60]} — {e}")
+        text = " ".join(filter(None, [
+            img.name,
+            img.tags,
+            img.location,
+            img.type,
+            img.description,
+        ]))
+        metadata = {
+            "name": img.name or "",
+            "tags": img.tags or "",
+            "location": img.location or "",
+            "image_url": img.image_url or "",
+            "description": (img.description or "")[:500],
+            "type": img.type or "",
+            "pg_id": img.id,
+        }
+        pending.append((img.id, img.tenant_id, text, metadata))
+    rows, failed = embed_rows(pending, "images")
 
-    print(f"\n[image_vectors] Done: {ok} inserted, {failed} failed.")
+    failed += insert_rows(IMAGE_COLLECTION_NAME, rows, milvus_client.insert_image_vectors)
+    print(f"\n[image_vectors] Done: {len(pending) - failed} inserted, {failed} failed.")
 
 
 def reindex_clips(session):
@@ -104,53 +213,53 @@ def reindex_clips(session):
         for r in rows
     ]
     print(f"\n[clip_vectors] Re-embedding {len(clips)} clips...")
-    ok = 0
-    failed = 0
+    pending = []
     for clip in clips:
-        try:
-            text = " ".join(filter(None, [
-                clip.name,
-                clip.tags,
-                clip.location,
-                clip.type,
-                clip.description,
-            ]))
-            embedding = generate_embedding(text)
-            metadata = {
-                "name": clip.name or "",
-                "tags": clip.tags or "",
-                "location": clip.location or "",
-                "video_url": clip.video_url or "",
-                "description": (clip.description or "")[:500],
-                "type": clip.type or "",
-                "duration": clip.duration or 0,
-                "pg_id": clip.id,
-            }
-            milvus_client.insert_clip_vector(clip.id, clip.tenant_id, embedding, metadata)
-            ok += 1
-            print(f"  [{ok}/{len(clips)}] OK: {clip.name[:60]}")
-            time.sleep(BATCH_SLEEP)
-        except Exception as e:
-            failed += 1
-            print(f"  FAILED: {clip.name[:60]} — {e}")
+        text = " ".join(filter(None, [
+            clip.name,
+            clip.tags,
+            clip.location,
+            clip.type,
+            clip.description,
+        ]))
+        metadata = {
+            "name": clip.name or "",
+            "tags": clip.tags or "",
+            "location": clip.location or "",
+            "video_url": clip.video_url or "",
+            "description": (clip.description or "")[:500],
+            "type": clip.type or "",
+            "duration": clip.duration or 0,
+            "pg_id": clip.id,
+        }
+        pending.append((clip.id, clip.tenant_id, text, metadata))
+    rows, failed = embed_rows(pending, "clips")
 
-    print(f"\n[clip_vectors] Done: {ok} inserted, {failed} failed.")
+    failed += insert_rows(CLIP_COLLECTION_NAME, rows, milvus_client.insert_clip_vectors)
+    print(f"\n[clip_vectors] Done: {len(pending) - failed} inserted, {failed} failed.")
 
 
 def main():
     print("=== Milvus Re-indexing: 128-dim → 768-dim (Gemini text-embedding-004) ===")
     print(f"Milvus: {MILVUS_HOST}:{MILVUS_PORT}")
+    milvus_client.ensure_connected()
+
+    # Experiences have no PostgreSQL source; keep their data before dropping
+    experiences = snapshot_experiences()
 
     # Drop and recreate collections with 768-dim schema
+    drop_and_recreate(COLLECTION_NAME, get_experience_schema)
     drop_and_recreate(IMAGE_COLLECTION_NAME, get_image_vector_schema)
     drop_and_recreate(CLIP_COLLECTION_NAME, get_clip_vector_schema)
 
+    reindex_experiences(experiences)
+
     # Re-embed all records from PostgreSQL
     with next(get_session()) as session:
         reindex_images(session)
         reindex_clips(session)
 
-    print("\n=== Re-indexing complete. ===")
+    print("\n=== Re-indexing complete (all collections flushed). ===")
     print("You can now regenerate itineraries and the new 768-dim embeddings will be used.")
 
 
@@ -89,6 +89,18 @@ GEMINI_MODEL=gemini-2.5-flash
 # CLAUDE_API_KEY=your_claude_api_key_here
 # CLAUDE_MODEL=claude-sonnet-4-6
 
+# ─── Chat session cache (optional; needs `pip install redis`) ────────────────
+# Share chat sessions across uvicorn workers. Leave unset for one process.
+# REDIS_URL=redis://localhost:6379/0
+# CHAT_SESSION_TTL=3600
+
+# ─── Itinerary LLM cache (optional) ──────────────────────────────────────────
+# Identical conversation summaries reuse a generated itinerary for the TTL.
+# Set a cosine threshold to also reuse near-identical ones (semantic tier).
+# ITINERARY_CACHE_SIZE=256
+# ITINERARY_CACHE_TTL=3600
+# ITINERARY_SEMANTIC_CACHE_THRESHOLD=0.97
+
 # ─── AWS S3 (for video/image uploads) ────────────────────────────────────────
 # S3_BUCKET_NAME=your-bucket
 # AWS_REGION=us-east-1
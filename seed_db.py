@@ -13,6 +13,39 @@ def seed_db():
         session.exec(text('ALTER TABLE "user" ADD COLUMN IF NOT EXISTS role VARCHAR DEFAULT \'tenant_admin\''))
         session.exec(text('CREATE INDEX IF NOT EXISTS ix_user_role ON "user" (role)'))
         session.exec(text('UPDATE "user" SET role = \'tenant_admin\' WHERE role IS NULL'))
+        # Tenants moved out of Milvus; the SQL row now carries the full profile.
+        session.exec(text('ALTER TABLE tenant ADD COLUMN IF NOT EXISTS email VARCHAR'))
+        session.exec(text('ALTER TABLE tenant ADD COLUMN IF NOT EXISTS contact_person VARCHAR'))
+        session.exec(text('ALTER TABLE tenant ADD COLUMN IF NOT EXISTS is_active BOOLEAN NOT NULL DEFAULT TRUE'))
+        session.exec(text('ALTER TABLE tenant ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL DEFAULT now()'))
+        # Composite indexes replace the single-column FK indexes they lead with.
+        for create_sql, obsolete in (
+            ('CREATE INDEX IF NOT EXISTS ix_chat_message_session_created '
+             'ON chat_message (session_id, created_at)', 'ix_chat_message_session_id'),
+            ('CREATE INDEX IF NOT EXISTS ix_chat_session_user_updated '
+             'ON chat_session (user_id, updated_at)', 'ix_chat_session_user_id'),
+            ('CREATE INDEX IF NOT EXISTS ix_itinerary_activity_itinerary_order '
+             'ON itinerary_activity (itinerary_id, order_index)', 'ix_itinerary_activity_itinerary_id'),
+            ('CREATE INDEX IF NOT EXISTS ix_scene_tenant_created_id '
+             'ON scene (tenant_id, created_at, id)', 'ix_scene_tenant_id'),
+        ):
+            session.exec(text(create_sql))
+            session.exec(text(f'DROP INDEX IF EXISTS {obsolete}'))
+        # TEXT -> JSONB columns. ALTER ... TYPE rewrites the table, so only run
+        # it while the column is still TEXT.
+        for table, column in (
+            ("chat_session", "requirements_json"),
+            ("itinerary", "rich_itinerary_json"),
+        ):
+            data_type = session.exec(text(
+                'SELECT data_type FROM information_schema.columns '
+                'WHERE table_name = :table AND column_name = :column'
+            ).bindparams(table=table, column=column)).scalar()
+            if data_type and data_type != "jsonb":
+                session.exec(text(
+                    f'ALTER TABLE {table} ALTER COLUMN {column} '
+                    f'TYPE JSONB USING {column}::jsonb'
+                ))
         session.commit()
 
         # Create default tenant
@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.chat import session as session_module
+from app.chat.session import ChatSessionStore, SessionBusyError
+
+
+class _Result:
+    def __init__(self, row):
+        self.row = row
+
+    def unique(self):
+        return self
+
+    def first(self):
+        return self.row
+
+
+class _FakeDB:
+    """Returns one ChatSession-shaped row for the rebuild query."""
+
+    def __init__(self):
+        self.row = SimpleNamespace(
+            is_deleted=False,
+            created_at=datetime(2026, 1, 1),
+            requirements_json={"destination": "Kandy"},
+            messages=[SimpleNamespace(role="assistant", content="Hello!")],
+        )
+
+    def exec(self, statement):
+        return _Result(self.row)
+
+
+def _store():
+    store = ChatSessionStore.__new__(ChatSessionStore)
+    store._sessions = {}
+    store._locks = {}
+    store._store_lock = threading.Lock()
+    store._redis = None
+    return store
+
+
+def test_in_process_lock_refuses_a_second_holder(monkeypatch):
+    monkeypatch.setattr(session_module, "SESSION_LOCK_WAIT_MS", 50)
+    store = _store()
+    errors = []
+
+    def second_request():
+        try:
+            with store.lock("s1"):
+                pass
+        except SessionBusyError as e:
+            errors.append(e)
+
+    with store.lock("s1"):
+        worker = threading.Thread(target=second_request)
+        worker.start()
+        worker.join()
+        # Other sessions are not affected
+        with store.lock("s2"):
+            pass
+    assert len(errors) == 1
+
+    # Released on exit, including after an exception inside the block
+    with pytest.raises(ValueError):
+        with store.lock("s1"):
+            raise ValueError
+    with store.lock("s1"):
+        pass
+
+
+def test_session_busy_is_not_a_timeout_error():
+    # Socket timeouts raise TimeoutError; they must not be reported as 409
+    assert not issubclass(SessionBusyError, TimeoutError)
+
+
+def test_concurrent_rebuilds_share_the_first_published_manager():
+    store = _store()
+    provider = object()
+    first = store._rebuild_from_db("s1", _FakeDB(), provider)
+    second = store._rebuild_from_db("s1", _FakeDB(), provider)
+    assert second is first
+    assert store.get_manager("s1") is first
+    assert first.chat_history == [{"role": "assistant", "content": "Hello!"}]
+
+
+def test_delete_drops_the_session_lock():
+    store = _store()
+    with store.lock("s1"):
+        pass
+    store.delete("s1")
+    assert "s1" not in store._locks
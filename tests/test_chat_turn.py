@@ -0,0 +1,78 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import threading
+from contextlib import contextmanager
+
+import pytest
+from fastapi import HTTPException
+
+from app.api import chat
+from app.chat.session import SessionBusyError
+
+
+class _FakeManager:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.turn_thread = None
+
+    def send_message(self, message):
+        self.turn_thread = threading.get_ident()
+        return f"echo: {message}"
+
+    def extract_requirements(self):
+        return {"destination": "Galle"}
+
+
+class _FakeStore:
+    def __init__(self, manager, busy=False):
+        self.manager = manager
+        self.busy = busy
+        self.persisted = []
+
+    @contextmanager
+    def lock(self, session_id):
+        if self.busy:
+            raise SessionBusyError(session_id)
+        yield
+
+    def get_manager(self, session_id, db=None, provider=None):
+        return self.manager
+
+    def persist_exchange(self, **kwargs):
+        self.persisted.append(kwargs)
+
+
+def test_turn_runs_off_the_event_loop_and_persists_with_the_manager(monkeypatch):
+    manager = _FakeManager()
+    store = _FakeStore(manager)
+    monkeypatch.setattr(chat, "chat_session_store", store)
+
+    async def run():
+        return threading.get_ident(), await chat._run_turn("s1", "hi", None, None, "t1")
+
+    loop_thread, turn = asyncio.run(run())
+
+    assert turn == (manager, "echo: hi", {"destination": "Galle"})
+    assert manager.turn_thread is not None
+    assert manager.turn_thread != loop_thread
+    assert len(store.persisted) == 1
+    persisted = store.persisted[0]
+    assert persisted["manager"] is manager
+    assert persisted["assistant_message"] == "echo: hi"
+    assert persisted["destination"] == "Galle"
+    assert not manager.lock.locked()
+
+
+def test_missing_session_returns_none(monkeypatch):
+    monkeypatch.setattr(chat, "chat_session_store", _FakeStore(None))
+    assert asyncio.run(chat._run_turn("s1", "hi", None, None, "t1")) is None
+
+
+def test_busy_session_is_a_conflict(monkeypatch):
+    monkeypatch.setattr(chat, "chat_session_store", _FakeStore(_FakeManager(), busy=True))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(chat._run_turn("s1", "hi", None, None, "t1"))
+    assert exc.value.status_code == 409
@@ -0,0 +1,45 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from app.services.video_compiler.cloudrun import CloudRunVideoCompiler
+
+
+class _JobsClient:
+    def __init__(self, error=None):
+        self.error = error
+        self.requests = []
+
+    def run_job(self, request):
+        self.requests.append(request)
+        if self.error:
+            raise self.error
+
+
+def _compiler(client):
+    # Skip __init__: it needs CLOUD_RUN_JOB_NAME and GCP credentials
+    compiler = CloudRunVideoCompiler.__new__(CloudRunVideoCompiler)
+    compiler.job_name = "projects/p/locations/us-central1/jobs/video-compiler"
+    compiler.region = "us-central1"
+    compiler.client = client
+    return compiler
+
+
+def test_dispatch_returns_processing():
+    client = _JobsClient()
+    result = _compiler(client).compile_cinematic("itin-1", "tenant-1", target_seconds=30)
+    assert result.status == "processing"
+    assert result.is_async
+    env = {e.name: e.value for e in client.requests[0].overrides.container_overrides[0].env}
+    assert env["ITINERARY_ID"] == "itin-1"
+    assert env["TARGET_SECONDS"] == "30"
+
+
+def test_dispatch_failure_reaches_the_caller():
+    client = _JobsClient(error=RuntimeError("PERMISSION_DENIED"))
+    with pytest.raises(RuntimeError, match="PERMISSION_DENIED"):
+        _compiler(client).compile_cinematic("itin-1", "tenant-1")
+    with pytest.raises(RuntimeError):
+        _compiler(client).compile(["https://example.com/a.mp4"], "itin-1", "tenant-1")
@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import base64
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.models.experience import Experience, _to_float32_vector
+from app.models.milvus_schema import EMBEDDING_DIM
+
+
+def _vector():
+    return np.linspace(-1, 1, EMBEDDING_DIM, dtype=np.float32)
+
+
+def _b64(vector, dtype):
+    return base64.b64encode(vector.astype(dtype).tobytes()).decode()
+
+
+def _experience(**overrides):
+    data = {
+        "id": "exp-1",
+        "tenantId": "tenant-1",
+        "name": "Galle Fort walk",
+        "description": "Walk the ramparts",
+        "shortDescription": "Ramparts",
+        "type": ["heritage"],
+        "location": {"latitude": 6.03, "longitude": 80.22, "address": "Fort", "city": "Galle", "country": "LK"},
+        "price": {"currency": "USD", "basePrice": 20},
+        "duration": {"minutes": 90, "displayText": "1.5 hours"},
+        "difficulty": "easy",
+        "bestSeasons": ["winter"],
+        "groupSize": {"default": {"minimum": 1, "maximum": 10}},
+        "reviewAggregate": {"averageRating": 4.5, "totalReviews": 10},
+        "slug": "galle-fort-walk",
+        "embedding": _vector().tolist(),
+        "embeddingMetadata": {"model": "test", "dimensions": EMBEDDING_DIM, "version": "1"},
+        "createdBy": "admin",
+        "updatedBy": "admin",
+    }
+    data.update(overrides)
+    return data
+
+
+def test_number_list_is_packed_as_float32():
+    vec = _to_float32_vector(_vector().tolist())
+    assert vec.dtype == np.float32
+    assert vec.shape == (EMBEDDING_DIM,)
+
+
+def test_base64_float32_is_the_default():
+    np.testing.assert_array_equal(_to_float32_vector(_b64(_vector(), "<f4")), _vector())
+
+
+def test_base64_float16_needs_explicit_dtype():
+    encoded = _b64(_vector(), "<f2")
+    np.testing.assert_allclose(_to_float32_vector(encoded, "float16"), _vector(), atol=1e-3)
+    # Same bytes read as float32 are the wrong length, not silently reinterpreted
+    with pytest.raises(ValueError):
+        _to_float32_vector(encoded)
+
+
+@pytest.mark.parametrize("value", [
+    [0.1] * (EMBEDDING_DIM - 1),
+    [[0.1] * EMBEDDING_DIM],
+    ["a"] * EMBEDDING_DIM,
+    base64.b64encode(b"\0" * 12).decode(),
+    "not base64!",
+])
+def test_bad_embeddings_are_rejected(value):
+    with pytest.raises(ValueError):
+        _to_float32_vector(value)
+
+
+def test_experience_decodes_with_embedding_dtype():
+    experience = Experience.model_validate(
+        _experience(embedding=_b64(_vector(), "<f2"), embeddingDtype="float16")
+    )
+    np.testing.assert_allclose(experience.embedding, _vector(), atol=1e-3)
+    assert "embeddingDtype" not in experience.model_dump()
+
+
+def test_experience_rejects_wrong_dimension():
+    with pytest.raises(ValidationError):
+        Experience.model_validate(_experience(embedding=[0.1, 0.2]))
+    with pytest.raises(ValidationError):
+        Experience.model_validate(_experience(embedding=_b64(_vector(), "<f4"), embeddingDtype="float64"))
@@ -0,0 +1,56 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import io
+import subprocess
+import tempfile
+
+import pytest
+
+from app.services.media_processor import _FFmpegOutput
+
+
+def _spawn(code: str, stderr):
+    # A stand-in for ffmpeg: any process writing to stdout works
+    cmd = [sys.executable, "-c", code]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr)
+    return _FFmpegOutput(proc, cmd, stderr)
+
+
+def test_successful_stream_reads_to_eof():
+    with tempfile.TemporaryFile() as stderr:
+        output = _spawn("import sys; sys.stdout.buffer.write(b'x' * 1000)", stderr)
+        chunks = iter(lambda: output.read(256), b"")
+        assert b"".join(chunks) == b"x" * 1000
+        assert output.tell() == 1000
+
+
+def test_failed_process_aborts_the_reader():
+    code = "import sys; sys.stdout.buffer.write(b'partial'); sys.stderr.write('boom'); sys.exit(1)"
+    with tempfile.TemporaryFile() as stderr:
+        output = _spawn(code, stderr)
+        with pytest.raises(subprocess.CalledProcessError) as info:
+            while output.read(256):
+                pass
+        assert info.value.returncode == 1
+        assert b"boom" in info.value.stderr
+
+
+def test_read_all_raises_on_failure():
+    with tempfile.TemporaryFile() as stderr:
+        output = _spawn("import sys; sys.exit(3)", stderr)
+        with pytest.raises(subprocess.CalledProcessError):
+            output.read()
+
+
+def test_output_cannot_rewind():
+    with tempfile.TemporaryFile() as stderr:
+        output = _spawn("import sys; sys.stdout.buffer.write(b'abcdef')", stderr)
+        assert not output.seekable()
+        assert output.seek(0) == 0  # no-op seek at the current position
+        output.read(3)
+        assert output.seek(0, io.SEEK_CUR) == 3
+        with pytest.raises(io.UnsupportedOperation):
+            output.seek(0)
+        output.read()
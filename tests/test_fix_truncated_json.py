@@ -0,0 +1,52 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+
+from app.services.ai_itinerary_generator import _fix_truncated_json
+
+
+def _fixed(truncated: str):
+    return orjson.loads(_fix_truncated_json(truncated))
+
+
+def test_closes_nested_structures_in_order():
+    assert _fixed('{"days": [{"day": 1}, {"day": 2') == {"days": [{"day": 1}, {"day": 2}]}
+
+
+def test_drops_trailing_comma():
+    assert _fixed('{"tags": [1, 2,  ') == {"tags": [1, 2]}
+
+
+def test_ignores_brackets_inside_strings():
+    assert _fixed('{"title": "Beach [day] {fun') == {"title": "Beach [day] {fun"}
+
+
+def test_handles_escapes_in_strings():
+    assert _fixed('{"quote": "say \\"hi\\" [x]", "next": [') == {"quote": 'say "hi" [x]', "next": []}
+    assert _fixed('{"path": "a\\') == {"path": "a"}
+
+
+def test_complete_json_is_unchanged():
+    complete = '{"days": [{"day": 1}]}'
+    assert _fix_truncated_json(complete) == complete
+
+
+def test_trims_an_incomplete_key_or_value():
+    assert _fixed('{"a": ') == {}
+    assert _fixed('{"a": 1, "b') == {"a": 1}
+    assert _fixed('{"a": 1, "b"') == {"a": 1}
+    assert _fixed('{"a": 1, "b": ') == {"a": 1}
+
+
+def test_trims_partial_literals():
+    assert _fixed('[true, tru') == [True]
+    assert _fixed('{"n": 1.') == {}
+    assert _fixed('{"ok": [null, fals') == {"ok": [None]}
+    assert _fixed('{"n": 12') == {"n": 12}
+
+
+def test_drops_a_half_written_unicode_escape():
+    assert _fixed('{"s": "caf\\u00') == {"s": "caf"}
+    assert _fixed('{"s": "caf\\u00e9') == {"s": "café"}
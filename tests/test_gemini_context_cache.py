@@ -0,0 +1,87 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import threading
+from types import SimpleNamespace
+
+from app.providers import gemini
+from app.providers.gemini import GeminiProvider
+
+LONG_PROMPT = "x" * (gemini._CACHE_MIN_TOKENS * gemini._CHARS_PER_TOKEN)
+
+
+class _Caches:
+    def __init__(self, error=None):
+        self.error = error
+        self.created = 0
+
+    def create(self, model, config):
+        self.created += 1
+        if self.error:
+            raise self.error
+        return SimpleNamespace(name=f"cachedContents/{self.created}")
+
+
+class _Models:
+    def __init__(self, fail_cached=False):
+        self.fail_cached = fail_cached
+        self.configs = []
+
+    def generate_content(self, model, contents, config):
+        self.configs.append(config)
+        if self.fail_cached and config.cached_content:
+            raise RuntimeError("404 NOT_FOUND. Cached content not found")
+        return SimpleNamespace(text=" ok ")
+
+
+def _provider(caches=None, models=None):
+    # Skip __init__: it builds a real genai client
+    provider = GeminiProvider.__new__(GeminiProvider)
+    provider.model = "gemini-2.5-flash"
+    provider.client = SimpleNamespace(caches=caches or _Caches(), models=models or _Models())
+    provider._system_caches = {}
+    provider._system_locks = {}
+    provider._cache_lock = threading.Lock()
+    return provider
+
+
+def test_short_prompts_are_never_sent_to_caches_create():
+    caches = _Caches()
+    provider = _provider(caches)
+    assert provider._cached_system("short system prompt") is None
+    assert provider._cached_system("short system prompt") is None
+    assert caches.created == 0
+
+
+def test_long_prompts_are_cached_once():
+    caches = _Caches()
+    provider = _provider(caches)
+    assert provider._cached_system(LONG_PROMPT) == "cachedContents/1"
+    assert provider._cached_system(LONG_PROMPT) == "cachedContents/1"
+    assert caches.created == 1
+
+
+def test_too_small_refusal_is_permanent():
+    caches = _Caches(RuntimeError("400 INVALID_ARGUMENT. Cached content is too small. min_total_token_count=1024"))
+    provider = _provider(caches)
+    assert provider._cached_system(LONG_PROMPT) is None
+    assert provider._cached_system(LONG_PROMPT) is None
+    assert caches.created == 1
+    assert provider._system_caches[LONG_PROMPT][1] == float("inf")
+
+
+def test_other_refusals_are_retried_later():
+    provider = _provider(_Caches(RuntimeError("503 UNAVAILABLE")))
+    assert provider._cached_system(LONG_PROMPT) is None
+    assert provider._system_caches[LONG_PROMPT][1] != float("inf")
+
+
+def test_expired_server_cache_falls_back_to_inline_prompt():
+    models = _Models(fail_cached=True)
+    provider = _provider(models=models)
+    assert provider.generate_content("plan a trip", system=LONG_PROMPT) == "ok"
+    assert models.configs[0].cached_content == "cachedContents/1"
+    assert models.configs[1].cached_content is None
+    assert models.configs[1].system_instruction == LONG_PROMPT
+    assert LONG_PROMPT not in provider._system_caches
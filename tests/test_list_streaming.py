@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.responses import NDJSON_MEDIA_TYPE, stream_json_rows
+
+ROWS = [
+    {"id": "a", "createdAt": datetime(2026, 1, 1, 12, 0)},
+    {"id": "b", "createdAt": datetime(2026, 1, 2, 12, 0)},
+]
+
+
+def _client(rows):
+    app = FastAPI()
+
+    @app.get("/items")
+    async def items(request: Request):
+        return stream_json_rows(request, (dict(row) for row in rows))
+
+    return TestClient(app)
+
+
+def test_json_array_is_the_default():
+    response = _client(ROWS).get("/items")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/json")
+    assert response.json() == [
+        {"id": "a", "createdAt": "2026-01-01T12:00:00"},
+        {"id": "b", "createdAt": "2026-01-02T12:00:00"},
+    ]
+
+
+def test_empty_listing_is_an_empty_array():
+    assert _client([]).get("/items").json() == []
+
+
+def test_ndjson_on_request():
+    response = _client(ROWS).get("/items", headers={"Accept": NDJSON_MEDIA_TYPE})
+    assert response.headers["content-type"].startswith(NDJSON_MEDIA_TYPE)
+    lines = response.text.splitlines()
+    assert lines == [
+        '{"id":"a","createdAt":"2026-01-01T12:00:00"}',
+        '{"id":"b","createdAt":"2026-01-02T12:00:00"}',
+    ]
@@ -0,0 +1,95 @@
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import threading
+import time
+
+from app.services.llm_cache import LLMCache
+
+
+def _fail():
+    raise AssertionError("compute should not run on a cache hit")
+
+
+def test_get_or_compute_single_flights_concurrent_threads():
+    cache = LLMCache()
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"days": 3}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)  # let the followers block on the leader's in-flight future
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert results == [{"days": 3}] * 5
+
+
+def test_aget_or_compute_single_flights_concurrent_coroutines():
+    cache = LLMCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"days": 2}
+
+    async def run():
+        return await asyncio.gather(*(cache.aget_or_compute("k", compute) for _ in range(5)))
+
+    results = asyncio.run(run())
+    assert len(calls) == 1
+    assert results == [{"days": 2}] * 5
+
+
+def test_hits_are_independent_copies():
+    cache = LLMCache()
+    first = cache.get_or_compute("k", lambda: {"days": [1, 2]})
+    first["days"].append(3)
+    assert cache.get_or_compute("k", _fail) == {"days": [1, 2]}
+
+
+def test_none_and_expired_results_are_recomputed():
+    cache = LLMCache()
+    calls = []
+    cache.get_or_compute("k", lambda: calls.append(1))
+    cache.get_or_compute("k", lambda: calls.append(1))
+    assert len(calls) == 2
+
+    expired = LLMCache(ttl=-1)  # every entry is already stale
+    expired.get_or_compute("k", lambda: calls.append(1) or {"v": 1})
+    expired.get_or_compute("k", lambda: calls.append(1) or {"v": 1})
+    assert len(calls) == 4
+
+
+def test_semantic_tier_reuses_similar_requests_only():
+    vectors = {
+        "trip to galle": [1.0, 0.0, 0.0],
+        "galle trip": [0.99, 0.1, 0.0],
+        "kandy hike": [0.0, 1.0, 0.0],
+    }
+    cache = LLMCache(semantic_threshold=0.95, embed_fn=vectors.__getitem__)
+    cache.get_or_compute("a", lambda: {"plan": "galle"}, semantic_text="trip to galle")
+
+    assert cache.get_or_compute("b", _fail, semantic_text="galle trip") == {"plan": "galle"}
+    assert cache.get_or_compute("c", lambda: {"plan": "kandy"}, semantic_text="kandy hike") == {"plan": "kandy"}
+
+
+def test_semantic_tier_is_off_without_threshold():
+    cache = LLMCache(embed_fn=lambda text: [1.0, 0.0])
+    cache.get_or_compute("a", lambda: {"plan": "galle"}, semantic_text="trip to galle")
+    assert cache.get_or_compute("b", lambda: {"plan": "other"}, semantic_text="galle trip") == {"plan": "other"}
@@ -1,9 +1,12 @@
 from fastapi.testclient import TestClient
 from app.main import app
+from app.core.auth import get_current_super_admin
 import uuid
 
 def test_tenant_crud():
     print("Starting Tenant CRUD verification...")
+    # Tenant routes are super-admin only; skip the JWT for this check
+    app.dependency_overrides[get_current_super_admin] = lambda: None
     # Using 'with' triggers startup events
     with TestClient(app) as client:
         tenant_id = f"tenant-{uuid.uuid4()}"
@@ -64,6 +67,8 @@ def test_tenant_crud():
             import traceback
             print(f"Test encountered an error: {e}")
             traceback.print_exc()
+        finally:
+            app.dependency_overrides.pop(get_current_super_admin, None)
 
 if __name__ == "__main__":
     test_tenant_crud()